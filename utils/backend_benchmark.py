@@ -0,0 +1,207 @@
+"""
+Embedding Backend Benchmark
+===========================
+Compares the CPU-optimized embedding backends of embedding_service.py
+('int8' dynamic quantization, 'onnx' runtime) against the float32 PyTorch
+model on the schema's column strings:
+
+    - throughput (strings/s, after one warm-up pass)
+    - cosine agreement: per-column cosine between candidate and float
+      embeddings (mean / min)
+    - cluster agreement: KMeans on the float embeddings, then on the
+      candidate embeddings starting from the float centroids, compared by
+      adjusted Rand index and the number of columns that land
+      in a different cluster (after best one-to-one cluster matching)
+
+A backend passes when it stays within MIN_MEAN_COSINE and
+MIN_CLUSTER_AGREEMENT; only then should EMBEDDING_BACKEND be switched.
+
+Requirements:
+    pip install sentence-transformers scikit-learn scipy numpy
+    pip install optimum[onnxruntime]     # for the 'onnx' backend
+
+Usage:
+    python backend_benchmark.py
+
+Author: Migration Analysis Tool
+"""
+
+import json
+import time
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+from db_service import get_table_columns
+from embedding_service import MODEL_NAME, load_model
+from schema_model import SchemaModel
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+REFERENCE_BACKEND = 'torch'
+CANDIDATE_BACKENDS = ['int8', 'onnx']
+
+# Column strings are repeated up to this many for the throughput measurement
+MIN_BENCHMARK_STRINGS = 2000
+BATCH_SIZE = 64
+
+# Clusters for the agreement check (None = number of tables)
+N_CLUSTERS = None
+
+# Acceptance tolerances
+MIN_MEAN_COSINE = 0.99
+MIN_CLUSTER_AGREEMENT = 0.95        # adjusted Rand index
+
+OUTPUT_FILE = "../output/embedding_backend_report.json"
+
+# ============================================================
+# MEASUREMENTS
+# ============================================================
+
+def measure_throughput(model, texts: list, min_strings: int = MIN_BENCHMARK_STRINGS,
+                       batch_size: int = BATCH_SIZE) -> tuple:
+    """
+    Encode texts and time a repeated corpus of at least min_strings strings.
+
+    Args:
+        model: Model exposing encode()
+        texts: Column strings
+        min_strings: Size of the timed corpus
+        batch_size: Strings per forward pass
+
+    Returns:
+        (embeddings of texts, strings per second)
+    """
+    embeddings = np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=False),
+                            dtype=np.float32)
+    corpus = (texts * (min_strings // max(len(texts), 1) + 1))[:max(min_strings, len(texts))]
+    start = time.perf_counter()
+    model.encode(corpus, batch_size=batch_size, show_progress_bar=False)
+    return embeddings, len(corpus) / (time.perf_counter() - start)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Row-wise cosine between two aligned embedding matrices."""
+    dots = np.einsum('ij,ij->i', reference, candidate)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosines = dots / np.maximum(norms, 1e-12)
+    return {'mean': float(cosines.mean()), 'min': float(cosines.min()),
+            'p01': float(np.percentile(cosines, 1))}
+
+
+def cluster_agreement(reference: np.ndarray, candidate: np.ndarray, n_clusters: int) -> dict:
+    """
+    Compare KMeans assignments of the two embeddings.
+
+    Args:
+        reference: Float model embeddings
+        candidate: Candidate backend embeddings
+        n_clusters: Number of clusters
+
+    Returns:
+        Dictionary with ari, moved (columns in a different matched cluster)
+        and moved_fraction
+    """
+    ref_model = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto').fit(reference)
+    ref_labels = ref_model.labels_
+    # Start from the reference centroids so only backend drift moves columns
+    cand_labels = KMeans(n_clusters=n_clusters, init=ref_model.cluster_centers_.astype(candidate.dtype),
+                         n_init=1).fit_predict(candidate)
+
+    # Cluster ids are arbitrary: match them one-to-one by maximum overlap
+    contingency = np.zeros((n_clusters, n_clusters), dtype=np.int64)
+    np.add.at(contingency, (ref_labels, cand_labels), 1)
+    rows, cols = linear_sum_assignment(-contingency)
+    moved = len(ref_labels) - int(contingency[rows, cols].sum())
+    return {'ari': float(adjusted_rand_score(ref_labels, cand_labels)),
+            'moved': moved, 'moved_fraction': moved / len(ref_labels)}
+
+
+def compare_backends(texts: list, candidates: list = CANDIDATE_BACKENDS,
+                     reference: str = REFERENCE_BACKEND, n_clusters: int = None) -> dict:
+    """
+    Benchmark candidate backends against the reference backend.
+
+    Args:
+        texts: Column strings
+        candidates: Backend names to evaluate
+        reference: Reference backend name
+        n_clusters: Clusters for the agreement check (None = number of tables)
+
+    Returns:
+        Dictionary backend -> report (unavailable backends carry 'error')
+    """
+    if n_clusters is None:
+        n_clusters = SchemaModel(texts).n_tables
+    n_clusters = max(2, min(n_clusters, len(texts)))
+
+    start = time.perf_counter()
+    model = load_model(MODEL_NAME, 'cpu', reference)
+    ref_embeddings, ref_rate = measure_throughput(model, texts)
+    reports = {reference: {'load_seconds': time.perf_counter() - start,
+                           'strings_per_second': ref_rate}}
+    del model
+
+    for backend in candidates:
+        start = time.perf_counter()
+        try:
+            model = load_model(MODEL_NAME, 'cpu', backend)
+        except Exception as e:
+            reports[backend] = {'error': f"{type(e).__name__}: {e}"}
+            continue
+        load_seconds = time.perf_counter() - start
+        embeddings, rate = measure_throughput(model, texts)
+        del model
+
+        cosine = cosine_agreement(ref_embeddings, embeddings)
+        clusters = cluster_agreement(ref_embeddings, embeddings, n_clusters)
+        reports[backend] = {
+            'load_seconds': load_seconds,
+            'strings_per_second': rate,
+            'speedup': rate / ref_rate,
+            'cosine': cosine,
+            'clusters': clusters,
+            'passed': cosine['mean'] >= MIN_MEAN_COSINE and clusters['ari'] >= MIN_CLUSTER_AGREEMENT
+        }
+    return reports
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Embedding Backend Benchmark")
+    print("=" * 70)
+
+    table_columns = get_table_columns()
+    print(f"✅ {len(table_columns)} columns, timing {max(MIN_BENCHMARK_STRINGS, len(table_columns))} "
+          f"strings per backend")
+
+    reports = compare_backends(table_columns, n_clusters=N_CLUSTERS)
+    ref = reports[REFERENCE_BACKEND]
+    print(f"\n {REFERENCE_BACKEND:<6} {ref['strings_per_second']:>9.0f} strings/s (reference)")
+    for backend in CANDIDATE_BACKENDS:
+        r = reports[backend]
+        if 'error' in r:
+            print(f"⚠️ {backend:<6} unavailable: {r['error']}")
+            continue
+        status = "✅" if r['passed'] else "❌"
+        print(f"{status} {backend:<6} {r['strings_per_second']:>9.0f} strings/s "
+              f"({r['speedup']:.2f}x) | cosine mean {r['cosine']['mean']:.4f} "
+              f"min {r['cosine']['min']:.4f} | ARI {r['clusters']['ari']:.3f}, "
+              f"{r['clusters']['moved']} columns moved")
+
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=2)
+    print(f"\n✅ Report saved to: {OUTPUT_FILE}")
+    print(f"   Tolerances: mean cosine >= {MIN_MEAN_COSINE}, ARI >= {MIN_CLUSTER_AGREEMENT}")
+
+
+if __name__ == "__main__":
+    main()
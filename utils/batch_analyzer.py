@@ -0,0 +1,376 @@
+"""
+Batch Database Analyzer
+=======================
+Runs the embedding / clustering / CQL flow of gemini_migration_analyzer.py
+over every SQLite database found under a directory, paying the
+torch / sentence-transformers import and model load only once:
+
+    1. SQLite files are discovered by their file header (not extension)
+    2. schemas are extracted concurrently in a process pool
+    3. all column strings are streamed into ONE warm embedding process,
+       which encodes them in large batches across database boundaries
+       (identical column strings are encoded once)
+    4. each database's embeddings fan out to a second process pool for
+       clustering, type inference and CQL generation
+
+Outputs per database go to ../output/batch/<database>/, and the run
+reports aggregate throughput in databases/minute.
+
+Requirements:
+    pip install sentence-transformers scikit-learn numpy
+
+Usage:
+    python batch_analyzer.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import threading
+import multiprocessing as mp
+import numpy as np
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from db_service import extract_table_columns
+from schema_model import SchemaModel
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+# Directory searched (recursively) for SQLite databases
+INPUT_DIR = "../db"
+
+# Per-database outputs go to OUTPUT_DIR/<database>/
+OUTPUT_DIR = "../output/batch"
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Strings per model.encode() call in the warm embedding process
+EMBED_BATCH_SIZE = 1024
+
+# Cached string embeddings kept for cross-database dedupe
+EMBED_CACHE_SIZE = 200_000
+
+# Worker processes for schema extraction and per-database analysis (None = CPUs)
+MAX_WORKERS = None
+
+# Infer CQL column types per database (one sampled pass per database)
+INFER_COLUMN_TYPES = True
+
+# How often the main process checks that the embedding process is alive
+EMBEDDER_POLL_SECONDS = 1.0
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# ============================================================
+# DISCOVERY AND EXTRACTION
+# ============================================================
+
+def discover_sqlite_files(root: str) -> list:
+    """
+    Find SQLite database files under root by their 16-byte header.
+
+    Args:
+        root: Directory to search
+
+    Returns:
+        Sorted list of file paths
+    """
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    if f.read(16) == SQLITE_HEADER:
+                        found.append(path)
+            except OSError:
+                continue
+    return sorted(found)
+
+
+def _extract(db_path: str) -> tuple:
+    start = time.perf_counter()
+    return db_path, extract_table_columns(db_path), time.perf_counter() - start
+
+
+def output_name(db_path: str, root: str) -> str:
+    """Filesystem-safe, unique output directory name for a database."""
+    relative = os.path.relpath(db_path, root)
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', relative)
+
+
+# ============================================================
+# WARM EMBEDDING PROCESS
+# ============================================================
+
+def _embedding_worker(model_name: str, batch_size: int, cache_size: int, inbox, outbox):
+    """
+    Long-lived embedding process.
+
+    Receives (db_id, columns) messages (None = no more input), encodes
+    the not-yet-seen strings of all pending databases in batches of up to
+    batch_size and sends (db_id, embeddings) back as soon as every column
+    of a database is available. Any failure (model load, encoding) is
+    reported as ('error', message) instead of 'done'.
+    """
+    try:
+        start = time.perf_counter()
+        from embedding_service import load_model
+        model = load_model(model_name)
+        outbox.put(('ready', time.perf_counter() - start))
+
+        cache = {}
+        pending = {}            # db_id -> columns
+        waiting = []            # strings queued for encoding
+        queued = set()
+        finished = False
+        encoded = 0
+
+        while not finished or waiting:
+            # Block for input only when there is nothing to encode
+            block = not waiting and not finished
+            while True:
+                try:
+                    message = inbox.get(block=block)
+                except queue.Empty:
+                    break
+                block = False
+                if message is None:
+                    finished = True
+                    break
+                db_id, columns = message
+                pending[db_id] = columns
+                for column in columns:
+                    if column not in cache and column not in queued:
+                        queued.add(column)
+                        waiting.append(column)
+                if len(waiting) >= batch_size:
+                    break
+
+            if waiting:
+                batch, waiting = waiting[:batch_size], waiting[batch_size:]
+                vectors = model.encode(batch, batch_size=min(batch_size, 256), show_progress_bar=False)
+                for column, vector in zip(batch, vectors):
+                    cache[column] = vector
+                    queued.discard(column)
+                encoded += len(batch)
+
+            for db_id in [d for d, cols in pending.items() if all(c in cache for c in cols)]:
+                columns = pending.pop(db_id)
+                outbox.put((db_id, np.stack([cache[c] for c in columns]) if columns else None))
+
+            if len(cache) > cache_size:
+                needed = {c for cols in pending.values() for c in cols}
+                cache = {c: v for c, v in cache.items() if c in needed}
+
+        outbox.put(('done', encoded))
+    except Exception as e:
+        outbox.put(('error', repr(e)))
+
+
+# ============================================================
+# PER-DATABASE ANALYSIS
+# ============================================================
+
+def analyze_database(db_path: str, columns: list, embeddings: np.ndarray, output_dir: str) -> dict:
+    """
+    Cluster one database's columns and write its CQL schema.
+
+    Args:
+        db_path: Path to the SQLite database
+        columns: List of table.column strings
+        embeddings: Array aligned with columns
+        output_dir: Directory for this database's outputs
+
+    Returns:
+        Summary dictionary
+    """
+    from sklearn.cluster import KMeans
+    from gemini_migration_analyzer import generate_cassandra_schema
+    from type_inference import infer_column_types
+
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    schema = SchemaModel(columns)
+    n_clusters = min(schema.n_tables, len(columns))
+    if n_clusters > 1:
+        labels = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto').fit_predict(embeddings)
+    else:
+        labels = np.zeros(len(columns), dtype=int)
+
+    clusters = defaultdict(list)
+    for column, label in zip(columns, labels):
+        clusters[int(label)].append(column)
+    embedding_tables = schema.cluster_tables(labels)
+
+    column_types = infer_column_types(db_path) if INFER_COLUMN_TYPES else None
+    with open(os.path.join(output_dir, "schema_columns.json"), 'w', encoding='utf-8') as f:
+        json.dump(columns, f, indent=2)
+    with open(os.path.join(output_dir, "embedding_suggested_tables.json"), 'w', encoding='utf-8') as f:
+        json.dump(embedding_tables, f, indent=2)
+    with open(os.path.join(output_dir, "cassandra_schema.cql"), 'w', encoding='utf-8') as f:
+        f.write(generate_cassandra_schema(clusters, None, column_types))
+
+    return {'columns': len(columns), 'tables': len(embedding_tables),
+            'seconds': time.perf_counter() - start}
+
+
+# ============================================================
+# BATCH DRIVER
+# ============================================================
+
+def run_batch(root: str = INPUT_DIR, output_dir: str = OUTPUT_DIR,
+              max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Analyze every SQLite database under root.
+
+    Args:
+        root: Directory to search
+        output_dir: Output root
+        max_workers: Worker processes per pool
+
+    Returns:
+        Dictionary with per-database results, failures and timings
+    """
+    start = time.perf_counter()
+    databases = discover_sqlite_files(root)
+    if not databases:
+        return {'databases': {}, 'failed': {}, 'timings': {'total': 0.0}}
+
+    # Start loading the model while schemas are being extracted
+    inbox, outbox = mp.Queue(), mp.Queue()
+    embedder = mp.Process(target=_embedding_worker,
+                          args=(MODEL_NAME, EMBED_BATCH_SIZE, EMBED_CACHE_SIZE, inbox, outbox),
+                          daemon=True)
+    embedder.start()
+
+    results, failed, schemas = {}, {}, {}
+    timings = {}
+    lock = threading.Lock()
+    awaiting = set()        # databases sent to the embedder, no embeddings yet
+    embedding_error = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as extract_pool, \
+            ProcessPoolExecutor(max_workers=max_workers) as analysis_pool:
+        analysis_futures = {}
+
+        def pump():
+            # Fan finished embeddings out to the analysis pool as they arrive
+            while True:
+                try:
+                    message = outbox.get(timeout=EMBEDDER_POLL_SECONDS)
+                except queue.Empty:
+                    if embedder.is_alive():
+                        continue
+                    try:
+                        message = outbox.get(timeout=EMBEDDER_POLL_SECONDS)
+                    except queue.Empty:
+                        message = ('error', f"embedding process exited with code {embedder.exitcode}")
+                if message[0] == 'error':
+                    # Nothing more will arrive: fail what is pending instead of waiting
+                    with lock:
+                        embedding_error.append(message[1])
+                        for db_path in awaiting:
+                            failed[db_path] = f"embedding failed: {message[1]}"
+                        awaiting.clear()
+                    timings['embedding_done'] = time.perf_counter() - start
+                    return
+                if message[0] == 'ready':
+                    timings['model_load'] = message[1]
+                    continue
+                if message[0] == 'done':
+                    timings['strings_encoded'] = message[1]
+                    timings['embedding_done'] = time.perf_counter() - start
+                    return
+                db_path, embeddings = message
+                with lock:
+                    awaiting.discard(db_path)
+                columns = schemas[db_path]
+                if not columns:
+                    with lock:
+                        failed[db_path] = "no user tables"
+                    continue
+                target = os.path.join(output_dir, output_name(db_path, root))
+                future = analysis_pool.submit(analyze_database, db_path, columns, embeddings, target)
+                with lock:
+                    analysis_futures[future] = db_path
+
+        pump_thread = threading.Thread(target=pump, daemon=True)
+        pump_thread.start()
+
+        extract_futures = {extract_pool.submit(_extract, db): db for db in databases}
+        for future in as_completed(extract_futures):
+            try:
+                db_path, columns, _ = future.result()
+            except Exception as e:
+                with lock:
+                    failed[extract_futures[future]] = f"schema extraction failed: {e}"
+                continue
+            with lock:
+                if embedding_error:
+                    failed[db_path] = f"embedding failed: {embedding_error[0]}"
+                    continue
+                schemas[db_path] = columns
+                awaiting.add(db_path)
+            inbox.put((db_path, columns))
+        timings['extraction_done'] = time.perf_counter() - start
+        inbox.put(None)
+
+        pump_thread.join()
+        embedder.join(timeout=EMBEDDER_POLL_SECONDS)
+        if embedder.is_alive():
+            embedder.terminate()
+        for future in as_completed(list(analysis_futures)):
+            db_path = analysis_futures[future]
+            try:
+                results[db_path] = future.result()
+            except Exception as e:
+                failed[db_path] = f"analysis failed: {e}"
+
+    timings['total'] = time.perf_counter() - start
+    return {'databases': results, 'failed': failed, 'timings': timings}
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Batch Database Analyzer")
+    print("=" * 70)
+
+    summary = run_batch()
+    results, failed, t = summary['databases'], summary['failed'], summary['timings']
+    if not results and not failed:
+        print(f"⚠️ No SQLite databases found under {INPUT_DIR}")
+        return
+
+    for db_path, r in sorted(results.items()):
+        print(f"✅ {db_path:<45} {r['columns']:>5} columns -> {r['tables']:>3} CQL tables "
+              f"({r['seconds']:.2f}s)")
+    for db_path, reason in failed.items():
+        print(f"❌ {db_path}: {reason}")
+
+    total_columns = sum(r['columns'] for r in results.values())
+    minutes = t['total'] / 60
+    print(f"\n Model load:        {t.get('model_load', 0):.2f}s (once)")
+    print(f" Schemas extracted: {t.get('extraction_done', 0):.2f}s")
+    print(f" Embeddings done:   {t.get('embedding_done', 0):.2f}s "
+          f"({t.get('strings_encoded', 0):,} unique strings of {total_columns:,} columns)")
+    print(f" Total:             {t['total']:.2f}s")
+    print(f"\n✅ Throughput: {len(results) / minutes if minutes else 0:.1f} databases/minute "
+          f"({total_columns / t['total'] if t['total'] else 0:.0f} columns/s)")
+    print(f"   Outputs in: {OUTPUT_DIR}/<database>/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,629 @@
+"""
+In-Process Cassandra Emulator
+=============================
+A lightweight stand-in for a Cassandra cluster that executes the CQL
+written by generate_cassandra_schema(), so proposed designs can be loaded
+and load-tested offline.
+
+The emulator keeps Cassandra's storage model rather than its distribution:
+rows live in partitions keyed by the partition key, each partition is
+ordered by its clustering columns, writes are upserts on the full primary
+key, and reads must restrict the partition key unless ALLOW FILTERING is
+given. Every query records rows touched, partitions touched and latency,
+which is what a design comparison needs.
+
+Supported statements:
+    CREATE KEYSPACE / USE / CREATE TABLE   (via cql_parser)
+    INSERT INTO t (a, b) VALUES (?, ?)
+    SELECT cols FROM t WHERE pk = ? [AND ck >= ? ...] [LIMIT n] [ALLOW FILTERING]
+
+Usage:
+    python cassandra_emulator.py
+
+Author: Migration Analysis Tool
+"""
+
+import re
+import time
+import sqlite3
+import numpy as np
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from decimal import Decimal
+
+from cql_parser import parse_cql_schema
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+CQL_FILE_PATH = "../output/cassandra_schema.cql"
+DB_PATH = "../db/chinook.db"
+
+# Partition-key reads issued per table in the demo benchmark
+READS_PER_TABLE = 1000
+
+# ============================================================
+# TYPE HANDLING
+# ============================================================
+
+_COERCERS = {
+    'int': int, 'bigint': int, 'smallint': int, 'tinyint': int, 'varint': int,
+    'counter': int,
+    'float': float, 'double': float,
+    'decimal': lambda v: Decimal(str(v)),
+    'boolean': lambda v: v if isinstance(v, bool) else str(v).lower() in ('1', 'true'),
+    'text': str, 'varchar': str, 'ascii': str,
+    'timestamp': str, 'date': str, 'uuid': str, 'timeuuid': str,
+}
+
+
+def coerce_value(value, cql_type: str):
+    """
+    Convert a Python value to the representation used for a CQL type,
+    so that clustering order follows the declared type (e.g. 10 > 9 for
+    int, but '10' < '9' for text).
+
+    Args:
+        value: Raw value (None stays None)
+        cql_type: Declared CQL type
+
+    Returns:
+        Coerced value
+    """
+    if value is None:
+        return None
+    return _COERCERS.get(cql_type, str)(value)
+
+
+class _Descending:
+    """Wrapper that inverts ordering for DESC clustering columns."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+class QueryStats:
+    """Counters for one named query (or one table's reads/writes)."""
+
+    def __init__(self):
+        self.executions = 0
+        self.rows_returned = 0
+        self.rows_touched = 0
+        self.partitions_touched = 0
+        self.latencies_ns = []
+
+    def record(self, rows_returned: int, rows_touched: int, partitions_touched: int,
+               latency_ns: int):
+        self.executions += 1
+        self.rows_returned += rows_returned
+        self.rows_touched += rows_touched
+        self.partitions_touched += partitions_touched
+        self.latencies_ns.append(latency_ns)
+
+    def summary(self) -> dict:
+        latencies = np.array(self.latencies_ns, dtype=np.float64) / 1000.0
+        has = len(latencies) > 0
+        return {
+            'executions': self.executions,
+            'rows_returned': self.rows_returned,
+            'rows_touched': self.rows_touched,
+            'rows_touched_per_query': self.rows_touched / self.executions if self.executions else 0.0,
+            'partitions_touched': self.partitions_touched,
+            'latency_us_p50': float(np.percentile(latencies, 50)) if has else 0.0,
+            'latency_us_p95': float(np.percentile(latencies, 95)) if has else 0.0,
+            'latency_us_p99': float(np.percentile(latencies, 99)) if has else 0.0,
+            'latency_us_mean': float(latencies.mean()) if has else 0.0,
+        }
+
+
+class EmulatedTable:
+    """
+    One CQL table: partition key -> {clustering key -> row}, with the
+    clustering keys of each partition kept in sorted order.
+    """
+
+    def __init__(self, definition: dict):
+        self.keyspace = definition['keyspace']
+        self.name = definition['name']
+        self.columns = [c for c, _ in definition['columns']]
+        self.types = dict(definition['columns'])
+        self.partition_key = definition['partition_key']
+        self.clustering_key = definition['clustering_key']
+        self.descending = [definition['clustering_order'].get(c, 'ASC') == 'DESC'
+                           for c in self.clustering_key]
+        self.partitions = {}
+        # Sorted clustering keys per partition, rebuilt lazily after writes
+        self._sorted = {}
+        self.rows_written = 0
+
+    def _clustering_sort_key(self, values: tuple) -> tuple:
+        key = []
+        for value, desc in zip(values, self.descending):
+            key.append(_Descending(value) if desc else value)
+        return tuple(key)
+
+    def upsert(self, row: dict):
+        """
+        Write one row (Cassandra INSERT semantics: last write wins on the
+        full primary key, missing columns are null).
+
+        Args:
+            row: Dictionary of column -> value
+        """
+        values = {c: coerce_value(row.get(c), self.types[c]) for c in self.columns}
+        pk = tuple(values[c] for c in self.partition_key)
+        if None in pk:
+            raise ValueError(f"❌ Invalid null value in partition key for {self.name}")
+        clustering = tuple(values[c] for c in self.clustering_key)
+        if None in clustering:
+            raise ValueError(f"❌ Invalid null value in clustering column for {self.name}")
+        ck = self._clustering_sort_key(clustering)
+        partition = self.partitions.get(pk)
+        if partition is None:
+            partition = self.partitions[pk] = {}
+        partition[ck] = values
+        self._sorted.pop(pk, None)
+        self.rows_written += 1
+
+    def sorted_keys(self, pk: tuple) -> list:
+        keys = self._sorted.get(pk)
+        if keys is None:
+            keys = self._sorted[pk] = sorted(self.partitions[pk])
+        return keys
+
+    def row_count(self) -> int:
+        return sum(len(p) for p in self.partitions.values())
+
+
+# ============================================================
+# EMULATOR
+# ============================================================
+
+_INSERT_RE = re.compile(
+    r"INSERT\s+INTO\s+([\w.]+)\s*\((.*?)\)\s*VALUES\s*\((.*?)\)", re.IGNORECASE | re.DOTALL
+)
+_SELECT_RE = re.compile(
+    r"SELECT\s+(.*?)\s+FROM\s+([\w.]+)(?:\s+WHERE\s+(.*?))?(?:\s+LIMIT\s+(\d+))?"
+    r"(\s+ALLOW\s+FILTERING)?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_CONDITION_RE = re.compile(r"(\w+)\s*(=|>=|<=|>|<)\s*\?")
+
+
+class CassandraEmulator:
+    """
+    In-process emulator for the CQL produced by this project.
+
+    Example:
+        db = CassandraEmulator()
+        db.execute_schema(open("../output/cassandra_schema.cql").read())
+        db.bulk_load("invoices_data", rows)
+        db.execute("SELECT * FROM invoices_data WHERE invoices_InvoiceId = ?", [42])
+        print(db.stats())
+    """
+
+    def __init__(self):
+        self.keyspaces = {}
+        self.tables = {}
+        self.current_keyspace = None
+        self.warnings = []
+        self.query_stats = defaultdict(QueryStats)
+
+    # ------------------------------------------------------------
+    # DDL
+    # ------------------------------------------------------------
+
+    def execute_schema(self, cql_text: str):
+        """
+        Apply CREATE KEYSPACE / USE / CREATE TABLE statements.
+
+        A repeated table name is ignored when declared IF NOT EXISTS (as
+        Cassandra would) and recorded in self.warnings, since the second
+        definition's columns silently never exist.
+
+        Args:
+            cql_text: CQL schema text
+        """
+        schema = parse_cql_schema(cql_text)
+        for name, options in schema['keyspaces'].items():
+            self.keyspaces[name] = options
+            self.current_keyspace = self.current_keyspace or name
+
+        for definition in schema['tables']:
+            if definition['keyspace'] not in self.keyspaces:
+                raise ValueError(f"❌ Keyspace {definition['keyspace']} does not exist")
+            name = definition['name']
+            if name in self.tables:
+                if not definition['if_not_exists']:
+                    raise ValueError(f"❌ Table {name} already exists")
+                kept = set(self.tables[name].columns)
+                lost = [c for c, _ in definition['columns'] if c not in kept]
+                self.warnings.append(
+                    f"{name} declared again ({definition['comment']}); "
+                    f"ignored by IF NOT EXISTS, {len(lost)} columns not created"
+                )
+                continue
+            missing = [c for c in definition['partition_key'] + definition['clustering_key']
+                       if c not in dict(definition['columns'])]
+            if not definition['partition_key'] or missing:
+                raise ValueError(f"❌ Invalid primary key for table {name}: {missing}")
+            self.tables[name] = EmulatedTable(definition)
+
+    def _table(self, name: str) -> EmulatedTable:
+        name = name.split('.')[-1]
+        if name not in self.tables:
+            raise ValueError(f"❌ unconfigured table {name}")
+        return self.tables[name]
+
+    # ------------------------------------------------------------
+    # WRITES
+    # ------------------------------------------------------------
+
+    def insert(self, table_name: str, row: dict):
+        """Insert (upsert) a single row."""
+        table = self._table(table_name)
+        start = time.perf_counter_ns()
+        table.upsert(row)
+        self.query_stats[f"INSERT {table.name}"].record(
+            0, 1, 1, time.perf_counter_ns() - start
+        )
+
+    def bulk_load(self, table_name: str, rows, columns: list = None) -> dict:
+        """
+        Load many rows into a table.
+
+        Args:
+            table_name: Target table
+            rows: Iterable of dicts, or of tuples when columns is given
+            columns: Column names for tuple rows
+
+        Returns:
+            Dictionary with rows written, rows rejected (null partition
+            key or clustering column), rows stored, partitions and throughput (rows written
+            minus rows stored is how many rows were overwritten because
+            they shared a primary key)
+        """
+        table = self._table(table_name)
+        start = time.perf_counter_ns()
+        written = 0
+        rejected = 0
+        required = table.partition_key + table.clustering_key
+        for row in rows:
+            if columns is not None:
+                row = dict(zip(columns, row))
+            if any(row.get(c) is None for c in required):
+                rejected += 1
+                continue
+            table.upsert(row)
+            written += 1
+        elapsed = time.perf_counter_ns() - start
+        self.query_stats[f"BULK LOAD {table.name}"].record(0, written, len(table.partitions), elapsed)
+        stored = table.row_count()
+        return {
+            'rows_written': written,
+            'rows_rejected': rejected,
+            'rows_stored': stored,
+            'partitions': len(table.partitions),
+            'rows_per_second': written / (elapsed / 1e9) if elapsed else 0.0
+        }
+
+    # ------------------------------------------------------------
+    # READS
+    # ------------------------------------------------------------
+
+    def select(self, table_name: str, partition_key: tuple = None, clustering_range: dict = None,
+               limit: int = None, allow_filtering: bool = False, predicate=None,
+               query_name: str = None) -> list:
+        """
+        Read rows from a table.
+
+        Args:
+            table_name: Table to read
+            partition_key: Tuple of partition key values; None = full scan
+                (requires allow_filtering, like Cassandra)
+            clustering_range: Optional {'start': tuple, 'end': tuple,
+                'start_inclusive': bool, 'end_inclusive': bool} on a prefix
+                of the clustering columns
+            limit: Maximum rows to return
+            allow_filtering: Permit a full scan / non-key predicate
+            predicate: Optional row filter (requires allow_filtering)
+            query_name: Name to aggregate stats under (default "SELECT <table>")
+
+        Returns:
+            List of row dicts
+        """
+        table = self._table(table_name)
+        if (partition_key is None or predicate is not None) and not allow_filtering:
+            raise ValueError(
+                f"❌ Cannot execute this query on {table.name} as it might involve data "
+                f"filtering; restrict the partition key or use ALLOW FILTERING"
+            )
+
+        start = time.perf_counter_ns()
+        result = []
+        touched = 0
+        partitions_touched = 0
+
+        if partition_key is not None:
+            pk = tuple(coerce_value(v, table.types[c])
+                       for v, c in zip(partition_key, table.partition_key))
+            candidates = [pk] if pk in table.partitions else []
+        else:
+            candidates = list(table.partitions)
+
+        for pk in candidates:
+            partition = table.partitions[pk]
+            keys = table.sorted_keys(pk)
+            lo, hi = 0, len(keys)
+            if clustering_range:
+                lo, hi = self._clustering_bounds(table, keys, clustering_range)
+            partitions_touched += 1
+            for ck in keys[lo:hi]:
+                touched += 1
+                row = partition[ck]
+                if predicate is None or predicate(row):
+                    result.append(row)
+                    if limit is not None and len(result) >= limit:
+                        break
+            if limit is not None and len(result) >= limit:
+                break
+
+        self.query_stats[query_name or f"SELECT {table.name}"].record(
+            len(result), touched, partitions_touched, time.perf_counter_ns() - start
+        )
+        return result
+
+    def _clustering_bounds(self, table: EmulatedTable, keys: list, rng: dict) -> tuple:
+        """Binary-search the slice of sorted clustering keys inside a range."""
+        def bound(values):
+            n = len(values)
+            coerced = tuple(coerce_value(v, table.types[c])
+                            for v, c in zip(values, table.clustering_key[:n]))
+            return n, table._clustering_sort_key(coerced)
+
+        lo, hi = 0, len(keys)
+        if rng.get('start') is not None:
+            n, key = bound(rng['start'])
+            prefixes = [k[:n] for k in keys]
+            lo = (bisect_left if rng.get('start_inclusive', True) else bisect_right)(prefixes, key)
+        if rng.get('end') is not None:
+            n, key = bound(rng['end'])
+            prefixes = [k[:n] for k in keys]
+            hi = (bisect_right if rng.get('end_inclusive', True) else bisect_left)(prefixes, key)
+        return lo, max(lo, hi)
+
+    # ------------------------------------------------------------
+    # CQL STATEMENTS
+    # ------------------------------------------------------------
+
+    def execute(self, statement: str, params: list = None) -> list:
+        """
+        Execute a single INSERT or SELECT statement with ? placeholders.
+
+        Args:
+            statement: CQL statement
+            params: Bound values, in placeholder order
+
+        Returns:
+            List of row dicts (empty for INSERT)
+        """
+        params = list(params or [])
+        statement = statement.strip().rstrip(';')
+
+        insert = _INSERT_RE.match(statement)
+        if insert:
+            columns = [c.strip() for c in insert.group(2).split(',')]
+            self.insert(insert.group(1), dict(zip(columns, params)))
+            return []
+
+        select = _SELECT_RE.match(statement)
+        if not select:
+            raise ValueError(f"❌ Unsupported statement: {statement[:60]}")
+        projection, table_name, where, limit, filtering = select.groups()
+        table = self._table(table_name)
+
+        conditions = _CONDITION_RE.findall(where or '')
+        if len(conditions) != len(params):
+            raise ValueError(f"❌ Expected {len(conditions)} bound values, got {len(params)}")
+        equals = {}
+        ranges = []
+        for (column, op), value in zip(conditions, params):
+            if column not in table.types:
+                raise ValueError(f"❌ Undefined column name {column}")
+            if op == '=':
+                equals[column] = value
+            else:
+                ranges.append((column, op, value))
+
+        partition_key = None
+        if all(c in equals for c in table.partition_key):
+            partition_key = tuple(equals.pop(c) for c in table.partition_key)
+
+        # Equality on a clustering prefix, then at most one range on the next column
+        clustering_range = None
+        prefix = []
+        for column in table.clustering_key:
+            if column in equals:
+                prefix.append(equals.pop(column))
+            else:
+                break
+        start = end = tuple(prefix) if prefix else None
+        start_inclusive = end_inclusive = True
+        next_column = table.clustering_key[len(prefix)] if len(prefix) < len(table.clustering_key) else None
+        leftover = []
+        # On a DESC column, a lower value bound is the end of the sorted slice
+        next_descending = next_column is not None and \
+            table.descending[table.clustering_key.index(next_column)]
+        for column, op, value in ranges:
+            if column == next_column and partition_key is not None:
+                if (op in ('>', '>=')) != next_descending:
+                    start, start_inclusive = tuple(prefix) + (value,), op in ('>=', '<=')
+                else:
+                    end, end_inclusive = tuple(prefix) + (value,), op in ('<=', '>=')
+            else:
+                leftover.append((column, op, value))
+        if start is not None or end is not None:
+            clustering_range = {'start': start, 'end': end,
+                                'start_inclusive': start_inclusive, 'end_inclusive': end_inclusive}
+
+        predicate = None
+        filters = [(c, '=', v) for c, v in equals.items()] + leftover
+        if filters:
+            ops = {'=': lambda a, b: a == b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+                   '<': lambda a, b: a < b, '<=': lambda a, b: a <= b}
+            filters = [(c, ops[op], coerce_value(v, table.types[c])) for c, op, v in filters]
+            predicate = lambda row: all(row[c] is not None and f(row[c], v) for c, f, v in filters)
+
+        rows = self.select(
+            table.name, partition_key, clustering_range,
+            int(limit) if limit else None, bool(filtering), predicate,
+            query_name=' '.join(statement.split())
+        )
+        if projection.strip() != '*':
+            wanted = [c.strip() for c in projection.split(',')]
+            rows = [{c: row[c] for c in wanted} for row in rows]
+        return rows
+
+    # ------------------------------------------------------------
+    # REPORTING
+    # ------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Return per-query counters and per-table storage statistics.
+
+        Returns:
+            Dictionary with 'queries' and 'tables'
+        """
+        tables = {}
+        for name, table in self.tables.items():
+            sizes = [len(p) for p in table.partitions.values()]
+            tables[name] = {
+                'rows_written': table.rows_written,
+                'rows_stored': sum(sizes),
+                'partitions': len(sizes),
+                'max_partition_rows': max(sizes) if sizes else 0,
+                'mean_partition_rows': float(np.mean(sizes)) if sizes else 0.0
+            }
+        return {
+            'queries': {name: s.summary() for name, s in self.query_stats.items()},
+            'tables': tables
+        }
+
+    def reset_stats(self):
+        """Clear all query counters (storage is kept)."""
+        self.query_stats = defaultdict(QueryStats)
+
+
+# ============================================================
+# SOURCE DATA LOADING
+# ============================================================
+
+def load_from_source(emulator: CassandraEmulator, db_path: str) -> dict:
+    """
+    Bulk-load every emulated table from the source SQLite database.
+
+    Generated column names are "<source table>_<column>"; each table is
+    filled from the source table that owns its partition key, and columns
+    from other source tables are left null (the generator records no join
+    path between them).
+
+    Args:
+        emulator: Emulator with the schema applied
+        db_path: Source SQLite database
+
+    Returns:
+        Dictionary of table -> bulk_load() result
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    source = {}
+    for (table,) in cursor.fetchall():
+        cursor.execute(f"PRAGMA table_info({table})")
+        for row in cursor.fetchall():
+            source[f"{table}_{row[1]}"] = (table, row[1])
+
+    results = {}
+    for name, table in emulator.tables.items():
+        owner = source.get(table.partition_key[0], (None,))[0]
+        mapped = [(c, source[c][1]) for c in table.columns if source.get(c, (None,))[0] == owner]
+        if owner is None or not mapped:
+            print(f"⚠️ {name}: no source table for partition key, skipped")
+            continue
+        select = ', '.join(f'"{src}"' for _, src in mapped)
+        cursor.execute(f'SELECT {select} FROM "{owner}"')
+        results[name] = emulator.bulk_load(name, cursor, columns=[c for c, _ in mapped])
+    conn.close()
+    return results
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" In-Process Cassandra Emulator - Offline Design Benchmark")
+    print("=" * 70)
+
+    print("\n[1/3] Applying generated schema...")
+    emulator = CassandraEmulator()
+    with open(CQL_FILE_PATH, 'r', encoding='utf-8') as f:
+        emulator.execute_schema(f.read())
+    print(f"✅ Created {len(emulator.tables)} tables")
+    for warning in emulator.warnings:
+        print(f"⚠️ {warning}")
+
+    print("\n[2/3] Bulk loading source data...")
+    loads = load_from_source(emulator, DB_PATH)
+    print(f"\n{'Table':<35} {'Written':>9} {'Stored':>9} {'Partitions':>11} {'Rows/s':>12}")
+    print("-" * 80)
+    for name, r in loads.items():
+        print(f"{name:<35} {r['rows_written']:>9,} {r['rows_stored']:>9,} "
+              f"{r['partitions']:>11,} {r['rows_per_second']:>12,.0f}")
+        if r['rows_rejected']:
+            print(f"   ⚠️ {r['rows_rejected']:,} rows rejected (null primary key column)")
+        if r['rows_stored'] < r['rows_written']:
+            print(f"   ⚠️ {r['rows_written'] - r['rows_stored']:,} rows overwritten "
+                  f"(primary key not unique for the source rows)")
+
+    print(f"\n[3/3] Running {READS_PER_TABLE} partition-key reads per table...")
+    emulator.reset_stats()
+    rng = np.random.default_rng(42)
+    for name, table in emulator.tables.items():
+        keys = list(table.partitions)
+        if not keys:
+            continue
+        where = ' AND '.join(f"{c} = ?" for c in table.partition_key)
+        statement = f"SELECT * FROM {name} WHERE {where}"
+        for i in rng.integers(0, len(keys), size=READS_PER_TABLE):
+            emulator.execute(statement, list(keys[i]))
+
+    print(f"\n{'Query':<60} {'Rows/q':>8} {'p50 us':>8} {'p99 us':>8}")
+    print("-" * 88)
+    for name, s in emulator.stats()['queries'].items():
+        print(f"{name[:60]:<60} {s['rows_touched_per_query']:>8.1f} "
+              f"{s['latency_us_p50']:>8.1f} {s['latency_us_p99']:>8.1f}")
+
+    print("\n✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
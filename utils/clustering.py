@@ -1,11 +1,24 @@
 # Clustering based on embedding similarity
 from db_service import get_table_columns
-from sentence_transformers import SentenceTransformer
+from embedding_service import encode
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.cluster import AgglomerativeClustering
-from sklearn.decomposition import PCA
+from projection import project, fit_key
+from schema_model import SchemaModel
+from value_fingerprints import fingerprint_texts
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.sparse import coo_matrix
+from lexical_blocking import candidate_pairs, pair_similarities, blocking_report
+
+# Compare only lexically plausible column pairs (see lexical_blocking.py);
+# False = dense all-pairs cosine similarity
+USE_LEXICAL_BLOCKING = True
+
+# Embed "table.column: value | value ..." fingerprints (capped distinct-value
+# samples, see value_fingerprints.py) instead of the bare column names
+VALUE_FINGERPRINTS = False
+DB_PATH = "../db/chinook.db"
 
 # print("=" * 60)
 # print(" Embedding-based Column Clustering")
@@ -14,46 +27,76 @@ import numpy as np
 # Step 1: Get columns and generate embeddings
 # print("\n[1] Loading columns from database...")
 table_columns = get_table_columns()
+schema = SchemaModel(table_columns)
 print(f"    Found {len(table_columns)} columns")
 print("table_columns", table_columns)
 # print("\n[2] Generating embeddings...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-embeddings = model.encode(table_columns, show_progress_bar=True)
+embedding_texts = fingerprint_texts(DB_PATH, table_columns) if VALUE_FINGERPRINTS else table_columns
+embeddings = encode(embedding_texts, show_progress_bar=True)
 # print(f"    Generated embeddings with shape: {embeddings.shape}")
 
 # Step 2: Calculate similarity matrix
 # print("\n[3] Calculating similarity matrix...")
-similarity_matrix = cosine_similarity(embeddings)
+if USE_LEXICAL_BLOCKING:
+    # Embedding similarity only for candidate pairs. Pruned pairs are not
+    # "dissimilar": clustering gets the candidates as a sparse connectivity
+    # graph and uses real cosine distances along it
+    candidates, _ = candidate_pairs(table_columns)
+    candidate_sims = pair_similarities(embeddings, candidates)
+    connectivity = coo_matrix((np.ones(2 * len(candidates)),
+                               (np.concatenate([candidates[:, 0], candidates[:, 1]]),
+                                np.concatenate([candidates[:, 1], candidates[:, 0]]))),
+                              shape=(len(table_columns), len(table_columns))).tocsr()
+
+    blocking = blocking_report(table_columns, candidates, embeddings)
+    print(f"    Lexical blocking: {blocking['candidate_pairs']:,} of {blocking['total_pairs']:,} pairs "
+          f"({blocking['pruning_ratio']:.1%} pruned), recall {blocking['recall']:.1%} "
+          f"of {blocking['true_pairs']} high-similarity cross-table pairs")
+    for col1, col2 in blocking['missed_pairs']:
+        print(f"      missed: {col1} <-> {col2}")
+else:
+    similarity_matrix = cosine_similarity(embeddings)
+    candidates = np.column_stack(np.triu_indices(len(table_columns), k=1))
+    candidate_sims = similarity_matrix[candidates[:, 0], candidates[:, 1]]
 # print(f"    Similarity matrix shape: {similarity_matrix.shape}")
 
 # Show sample similarities
 # print("\n[4] Sample Similarities (first 5 pairs):")
 # print("-" * 60)
-for i in range(min(5, len(table_columns))):
-    for j in range(i + 1, min(5, len(table_columns))):
-        sim = similarity_matrix[i][j]
-        print(f"    {table_columns[i]:30} <-> {table_columns[j]:30}")
-        print(f"    Similarity: {sim:.4f}")
-        print()
+sample_pairs = np.array([(i, j) for i in range(min(5, len(table_columns)))
+                         for j in range(i + 1, min(5, len(table_columns)))], dtype=np.int64).reshape(-1, 2)
+for (i, j), sim in zip(sample_pairs, pair_similarities(embeddings, sample_pairs)):
+    print(f"    {table_columns[i]:30} <-> {table_columns[j]:30}")
+    print(f"    Similarity: {sim:.4f}")
+    print()
 
 # Step 3: Clustering using Agglomerative Clustering
 # print("\n[5] Clustering columns...")
-# Convert similarity to distance (1 - similarity)
-distance_matrix = 1 - similarity_matrix
-
 # Determine optimal number of clusters (based on number of tables)
-unique_tables = set([col.split('.')[0] for col in table_columns])
-n_clusters = len(unique_tables)
+n_clusters = schema.n_tables
 # print(f"    Number of unique tables: {n_clusters}")
 # print(f"    Using {n_clusters} clusters")
 
 # Apply Agglomerative Clustering
-clustering = AgglomerativeClustering(
-    n_clusters=n_clusters,
-    metric='precomputed',
-    linkage='average'
-)
-labels = clustering.fit_predict(distance_matrix)
+if USE_LEXICAL_BLOCKING:
+    # Merges only along candidate edges (disconnected components are joined
+    # by sklearn with their nearest cosine pair)
+    clustering = AgglomerativeClustering(
+        n_clusters=n_clusters,
+        metric='cosine',
+        linkage='average',
+        connectivity=connectivity
+    )
+    labels = clustering.fit_predict(embeddings)
+else:
+    # Convert similarity to distance (1 - similarity)
+    distance_matrix = 1 - similarity_matrix
+    clustering = AgglomerativeClustering(
+        n_clusters=n_clusters,
+        metric='precomputed',
+        linkage='average'
+    )
+    labels = clustering.fit_predict(distance_matrix)
 
 # Step 4: Display clustering results
 # print("\n" + "=" * 60)
@@ -80,18 +123,13 @@ print(" HIGH SIMILARITY PAIRS (cross-table)")
 print("=" * 60)
 
 threshold = 0.7  # Similarity threshold
-high_sim_pairs = []
-
-for i in range(len(table_columns)):
-    for j in range(i + 1, len(table_columns)):
-        table_i = table_columns[i].split('.')[0]
-        table_j = table_columns[j].split('.')[0]
-        
-        # Only show cross-table similarities
-        if table_i != table_j:
-            sim = similarity_matrix[i][j]
-            if sim >= threshold:
-                high_sim_pairs.append((table_columns[i], table_columns[j], sim))
+
+# Only show cross-table similarities (table ids compared as arrays)
+pair_sims = candidate_sims
+cross_table = schema.column_table[candidates[:, 0]] != schema.column_table[candidates[:, 1]]
+keep = cross_table & (pair_sims >= threshold)
+high_sim_pairs = [(table_columns[i], table_columns[j], sim)
+                  for (i, j), sim in zip(candidates[keep], pair_sims[keep])]
 
 # Sort by similarity descending
 high_sim_pairs.sort(key=lambda x: x[2], reverse=True)
@@ -120,9 +158,8 @@ fig, ax2 = plt.subplots(figsize=(24, 14))
 
 # Remove all margins to use full width
 fig.subplots_adjust(left=0.05, right=0.95, top=0.92, bottom=0.08)
-# Reduce 384D embeddings to 2D using PCA
-pca = PCA(n_components=2)
-embeddings_2d = pca.fit_transform(embeddings)
+# Reduce 384D embeddings to 2D with the shared cached PCA projection
+embeddings_2d, pca = project(embeddings, key=fit_key(DB_PATH))
 
 # Create color map for clusters
 colors = plt.cm.tab10(np.linspace(0, 1, n_clusters))
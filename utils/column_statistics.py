@@ -0,0 +1,327 @@
+"""
+Column Statistics Collector
+===========================
+Reads every table once with a streaming cursor and computes, for all of
+its columns at the same time:
+
+    - distinct count (HyperLogLog sketch, ~0.8% standard error)
+    - null fraction
+    - min / max (SQLite ordering: numbers < text < blobs)
+    - average and maximum byte width
+    - top-k frequent values (mergeable Misra-Gries summary)
+
+Tables are scanned in parallel worker processes, each with its own
+read-only connection. The result is written next to the extracted schema
+(../output/<db>_json.json) as ../output/<db>_column_stats.json, because
+partition-key choice and row-width estimates depend on exactly these
+numbers.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python column_statistics.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_NAME = "chinook.db"
+DB_PATH = os.path.join("..", "db", DB_NAME)
+OUTPUT_DIR = "../output"
+
+# Rows fetched from the cursor per chunk
+CHUNK_SIZE = 10_000
+
+# HyperLogLog precision: 2^p registers, standard error ~1.04 / sqrt(2^p)
+HLL_PRECISION = 14
+
+# Frequent values kept per column
+TOP_K = 10
+
+# Worker processes (None = one per CPU)
+MAX_WORKERS = None
+
+# ============================================================
+# SKETCHES
+# ============================================================
+
+def hash64(values: list) -> np.ndarray:
+    """
+    Stable 64-bit hashes of values (same value -> same hash in every
+    process, unlike Python's salted hash()). Values are hashed by their
+    text form, so 5 and '5' collide on purpose: distinctness is judged
+    the way the target's text/number conversion would see it.
+
+    Args:
+        values: List of non-null values
+
+    Returns:
+        uint64 array of hashes
+    """
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(v if isinstance(v, bytes) else str(v).encode('utf-8'),
+                                        digest_size=8).digest(), 'little')
+         for v in values),
+        dtype=np.uint64, count=len(values)
+    )
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with vectorized register updates."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        """
+        Add a batch of 64-bit hashes.
+
+        Args:
+            hashes: uint64 array
+        """
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = position of the leftmost 1-bit in the remaining 64-p bits;
+        # the remaining value is < 2^53, so frexp gives its exact bit length
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        """Return the estimated number of distinct values."""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return float(m * np.log(m / zeros))
+        return float(raw)
+
+
+class FrequentValues:
+    """
+    Misra-Gries heavy-hitter summary, updated one chunk at a time.
+
+    Counts are lower bounds that undercount by at most n / capacity.
+    """
+
+    def __init__(self, k: int = TOP_K, capacity: int = None):
+        self.k = k
+        self.capacity = capacity or 10 * k
+        self.counts = Counter()
+
+    def add_counts(self, chunk_counts: Counter):
+        self.counts.update(chunk_counts)
+        if len(self.counts) > self.capacity:
+            # Subtract the (capacity+1)-th largest count and drop non-positives
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = Counter({v: c - cut for v, c in self.counts.items() if c > cut})
+
+    def top(self) -> list:
+        return [[value, count] for value, count in self.counts.most_common(self.k)]
+
+
+# ============================================================
+# PER-TABLE SCAN
+# ============================================================
+
+def _byte_width(value) -> int:
+    """Storage width of a value in the SQLite record format (text/blob: payload)."""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, float):
+        return 8
+    if isinstance(value, bool) or value in (0, 1):
+        return 0
+    magnitude = abs(value)
+    for width, limit in ((1, 1 << 7), (2, 1 << 15), (3, 1 << 23), (4, 1 << 31), (6, 1 << 47)):
+        if magnitude < limit:
+            return width
+    return 8
+
+
+def _sort_key(value):
+    """SQLite cross-type ordering: numbers < text < blobs."""
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, value)
+
+
+def _json_safe(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def collect_table_statistics(db_path: str, table: str, chunk_size: int = CHUNK_SIZE,
+                             precision: int = HLL_PRECISION, top_k: int = TOP_K) -> dict:
+    """
+    Scan one table once and compute statistics for all of its columns.
+
+    Args:
+        db_path: Path to the SQLite database
+        table: Table name
+        chunk_size: Rows per fetchmany() call
+        precision: HyperLogLog precision
+        top_k: Frequent values to keep per column
+
+    Returns:
+        Dictionary with 'rows', 'scan_seconds' and per-column statistics
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT * FROM "{table}"')
+    columns = [d[0] for d in cursor.description]
+
+    n_cols = len(columns)
+    hll = [HyperLogLog(precision) for _ in range(n_cols)]
+    frequent = [FrequentValues(top_k) for _ in range(n_cols)]
+    nulls = [0] * n_cols
+    width_sum = [0] * n_cols
+    width_max = [0] * n_cols
+    minimum = [None] * n_cols
+    maximum = [None] * n_cols
+    rows = 0
+
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        rows += len(chunk)
+        for i, values in enumerate(zip(*chunk)):
+            present = [v for v in values if v is not None]
+            nulls[i] += len(values) - len(present)
+            if not present:
+                continue
+            counts = Counter(present)
+            frequent[i].add_counts(counts)
+            # HLL is insensitive to duplicates, so hash each distinct value once
+            hll[i].add_hashes(hash64(list(counts)))
+
+            # Width and ordering only need each distinct value once
+            widths = [_byte_width(v) for v in counts]
+            width_sum[i] += sum(w * c for w, c in zip(widths, counts.values()))
+            width_max[i] = max(width_max[i], max(widths))
+            lo = min(counts, key=_sort_key)
+            hi = max(counts, key=_sort_key)
+            if minimum[i] is None or _sort_key(lo) < _sort_key(minimum[i]):
+                minimum[i] = lo
+            if maximum[i] is None or _sort_key(hi) > _sort_key(maximum[i]):
+                maximum[i] = hi
+
+    conn.close()
+
+    stats = {}
+    for i, name in enumerate(columns):
+        non_null = rows - nulls[i]
+        stats[name] = {
+            'distinct_estimate': round(hll[i].estimate()),
+            'null_fraction': nulls[i] / rows if rows else 0.0,
+            'min': _json_safe(minimum[i]),
+            'max': _json_safe(maximum[i]),
+            'avg_byte_width': width_sum[i] / non_null if non_null else 0.0,
+            'max_byte_width': width_max[i],
+            'top_values': [[_json_safe(v), c] for v, c in frequent[i].top()]
+        }
+    return {'rows': rows, 'scan_seconds': time.perf_counter() - start, 'columns': stats}
+
+
+def collect_statistics(db_path: str, max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Collect column statistics for every user table, scanning tables in
+    parallel processes.
+
+    Args:
+        db_path: Path to the SQLite database
+        max_workers: Worker processes (None = one per CPU)
+
+    Returns:
+        Dictionary of table -> collect_table_statistics() result
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    tables = [row[0] for row in cursor.fetchall()]
+    conn.close()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {table: pool.submit(collect_table_statistics, db_path, table) for table in tables}
+        return {table: future.result() for table, future in futures.items()}
+
+
+def save_statistics(stats: dict, db_name: str, output_dir: str = OUTPUT_DIR) -> str:
+    """
+    Save statistics next to the extracted schema JSON.
+
+    Args:
+        stats: Output of collect_statistics()
+        db_name: Database file name (e.g. "chinook.db")
+        output_dir: Output directory
+
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{db_name}_column_stats.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, default=str)
+    return path
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Single-Scan Column Statistics")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    stats = collect_statistics(DB_PATH)
+    elapsed = time.perf_counter() - start
+    total_rows = sum(t['rows'] for t in stats.values())
+    print(f"✅ Scanned {len(stats)} tables / {total_rows:,} rows in {elapsed:.2f}s")
+
+    print(f"\n{'Column':<35} {'Distinct':>9} {'Null %':>7} {'Avg B':>6} {'Max B':>6}  Top value")
+    print("-" * 90)
+    for table, t in stats.items():
+        for col, s in t['columns'].items():
+            top = s['top_values'][0] if s['top_values'] else None
+            top_text = f"{str(top[0])[:20]} ({top[1]})" if top else "- (no heavy hitter)"
+            print(f"{table + '.' + col:<35} {s['distinct_estimate']:>9,} {s['null_fraction']:>7.1%} "
+                  f"{s['avg_byte_width']:>6.1f} {s['max_byte_width']:>6}  {top_text}")
+
+    path = save_statistics(stats, DB_NAME)
+    print(f"\n✅ Column statistics saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
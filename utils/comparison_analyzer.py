@@ -10,13 +10,22 @@ Usage:
 Author: Migration Analysis Tool
 """
 
+import os
 import json
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from collections import defaultdict
-from sklearn.decomposition import PCA
-from sentence_transformers import SentenceTransformer
+from embedding_service import encode
+from projection import project, fit_key
+from results_store import ResultsStore
+from schema_model import SchemaModel, normalize_column
+
+# Record comparison metrics in the results database (results_store.py)
+RECORD_RESULTS = True
+
+# Source database of the original columns (keys the shared projection cache)
+DB_PATH = "../db/chinook.db"
 
 
 def compare_migration_approaches(
@@ -57,51 +66,35 @@ def compare_migration_approaches(
     with open(original_columns_path, 'r', encoding='utf-8') as f:
         original_columns = json.load(f)
     print(f"[OK] Loaded original columns: {len(original_columns)} columns")
+    schema = SchemaModel(original_columns)
     
     # =========================================
     # 2. GENERATE EMBEDDINGS FOR ORIGINAL COLUMNS
     # =========================================
     print("\n[EMBED] Generating embeddings for visualization...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(original_columns, show_progress_bar=True)
+    embeddings = encode(original_columns, show_progress_bar=True)
     print(f"[OK] Generated embeddings with shape: {embeddings.shape}")
     
     # Reduce to 2D using PCA
     print("[PCA] Reducing dimensions to 2D...")
-    pca = PCA(n_components=2)
-    embeddings_2d = pca.fit_transform(embeddings)
+    embeddings_2d, pca = project(embeddings, key=fit_key(DB_PATH))
     print(f"[OK] PCA complete - {sum(pca.explained_variance_ratio_)*100:.1f}% variance explained")
     
     # =========================================
     # 3. MAP COLUMNS TO TABLES (EMBEDDING)
     # =========================================
     # For embedding tables, columns are in "table.Column" format
-    embedding_column_to_table = {}
-    for table_name, columns in embedding_tables.items():
-        for col in columns:
-            embedding_column_to_table[col] = table_name
-    
-    # Create labels for embedding clustering
     embedding_table_names = list(embedding_tables.keys())
-    embedding_labels = []
-    for col in original_columns:
-        if col in embedding_column_to_table:
-            table_name = embedding_column_to_table[col]
-            embedding_labels.append(embedding_table_names.index(table_name))
-        else:
-            embedding_labels.append(-1)  # Unknown
-    embedding_labels = np.array(embedding_labels)
+    embedding_labels = np.full(len(schema), -1)  # -1 = unknown
+    for table_idx, columns in enumerate(embedding_tables.values()):
+        for col in columns:
+            if col in schema.column_id:
+                embedding_labels[schema.column_id[col]] = table_idx
     
     # =========================================
     # 4. NORMALIZE COLUMN NAMES FOR COMPARISON
     # =========================================
-    def normalize_column(col):
-        """Normalize column name for comparison (remove table prefix, lowercase)."""
-        if '.' in col:
-            return col.split('.')[-1].lower().replace('_', '')
-        return col.lower().replace('_', '')
-    
-    # Create normalized versions
+    # Create normalized versions (normalize_column caches each distinct name)
     gemini_normalized = {}
     for table, columns in gemini_tables.items():
         gemini_normalized[table] = set([normalize_column(c) for c in columns])
@@ -216,28 +209,15 @@ def compare_migration_approaches(
     # For Gemini, we need to map original columns to Gemini tables
     # Since Gemini uses different column names, we'll color by best-matching embedding cluster
     
-    # Create a mapping from original columns to their normalized form
-    original_normalized = {col: normalize_column(col) for col in original_columns}
-    
-    # Find which Gemini table each original column best matches
+    # First Gemini table containing each normalized column name
     gemini_table_names = list(gemini_tables.keys())
-    gemini_labels = []
+    first_gemini_table = {}
+    for idx, table_cols in enumerate(gemini_tables.values()):
+        for c in table_cols:
+            first_gemini_table.setdefault(normalize_column(c), idx)
     
-    for col in original_columns:
-        col_norm = original_normalized[col]
-        best_table_idx = -1
-        best_match_count = 0
-        
-        for idx, (table_name, table_cols) in enumerate(gemini_tables.items()):
-            table_cols_norm = set([normalize_column(c) for c in table_cols])
-            if col_norm in table_cols_norm:
-                # Direct match
-                best_table_idx = idx
-                break
-        
-        gemini_labels.append(best_table_idx)
-    
-    gemini_labels = np.array(gemini_labels)
+    # Label every original column through its normalized-name id (-1 = no match)
+    gemini_labels = schema.lookup_normalized(first_gemini_table)
     
     # Create colors for Gemini tables
     n_gemini_tables = len(gemini_tables)
@@ -323,6 +303,17 @@ def compare_migration_approaches(
     with open(results_path, 'w', encoding='utf-8') as f:
         json.dump(comparison_results, f, indent=2)
     print(f"[OK] Comparison results saved to: {results_path}")
+
+    if RECORD_RESULTS:
+        database = os.path.basename(original_columns_path).replace("_json.json", "")
+        with ResultsStore() as store:
+            run_id = store.start_run(database, "comparison_analyzer")
+            store.add_columns(run_id, original_columns, embeddings)
+            store.add_design(run_id, 'embedding', embedding_tables)
+            store.add_design(run_id, 'gemini', gemini_tables)
+            store.add_document(run_id, 'comparison_results', comparison_results)
+            store.add_metrics(run_id, comparison_results)
+        print(f"[OK] Comparison run #{run_id} recorded in the results database")
     
     return comparison_results
 
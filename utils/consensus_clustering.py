@@ -0,0 +1,251 @@
+"""
+Consensus Clustering
+====================
+Replaces the single seeded KMeans of cluster_columns() with a consensus
+of many clusterings, so proposed Cassandra tables do not hinge on one
+random seed:
+
+    1. CONSENSUS_RUNS KMeans runs, each with its own seed on a random
+       SUBSAMPLE_FRACTION of the columns, are spread over a process pool
+       (one BLAS/OpenMP thread per worker, so the total cost is close to
+       one clustering per core)
+    2. every worker accumulates a sparse co-association matrix (how often
+       two columns landed in the same cluster) run by run; the partial
+       matrices are summed at the end
+    3. co-association counts are normalized by how often both columns
+       were sampled together, and the final clusters come from average
+       linkage on 1 - consensus (spectral clustering on the sparse matrix
+       for large schemas)
+    4. each final cluster gets a stability score: the mean consensus of
+       its member pairs (1.0 = always grouped together)
+
+Requirements:
+    pip install scikit-learn scipy numpy
+
+Usage:
+    python consensus_clustering.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import time
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+# Clusterings in the ensemble
+CONSENSUS_RUNS = 100
+
+# Fraction of columns sampled per run (1.0 = seed variation only)
+SUBSAMPLE_FRACTION = 0.8
+
+# Worker processes (None = all CPUs)
+MAX_WORKERS = None
+
+# Above this many columns the final step uses sparse spectral clustering
+# instead of dense average linkage
+DENSE_LINKAGE_LIMIT = 5000
+
+# Clusters with a stability score below this are flagged in the report
+STABILITY_WARNING = 0.6
+
+# ============================================================
+# ENSEMBLE
+# ============================================================
+
+def _pairs_of(labels: np.ndarray, index: np.ndarray) -> tuple:
+    """(rows, cols) with rows < cols of the sampled columns sharing a label."""
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    rows, cols = [], []
+    for members in np.split(index[order], bounds):
+        if len(members) < 2:
+            continue
+        a, b = np.triu_indices(len(members), k=1)
+        rows.append(members[a])
+        cols.append(members[b])
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    return np.minimum(rows, cols), np.maximum(rows, cols)
+
+
+def _ensemble_worker(embeddings: np.ndarray, n_clusters: int, seeds: list,
+                     subsample: float) -> tuple:
+    """
+    Run a share of the ensemble.
+
+    Returns:
+        (upper-triangular CSR co-association counts, bool sample matrix
+         with one row per run)
+    """
+    from sklearn.cluster import KMeans
+    from threadpoolctl import threadpool_limits
+
+    n = len(embeddings)
+    size = max(n_clusters, int(round(subsample * n)))
+    together = csr_matrix((n, n), dtype=np.float32)
+    sampled = np.zeros((len(seeds), n), dtype=bool)
+
+    with threadpool_limits(limits=1):
+        for r, seed in enumerate(seeds):
+            rng = np.random.default_rng(seed)
+            index = np.sort(rng.choice(n, size, replace=False)) if size < n else np.arange(n)
+            sampled[r, index] = True
+            labels = KMeans(n_clusters=n_clusters, random_state=int(seed), n_init=1).fit_predict(
+                embeddings[index])
+            rows, cols = _pairs_of(labels, index)
+            together = together + coo_matrix(
+                (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n, n)).tocsr()
+    return together, sampled
+
+
+def co_association(embeddings: np.ndarray, n_clusters: int, n_runs: int = CONSENSUS_RUNS,
+                   subsample: float = SUBSAMPLE_FRACTION, max_workers: int = MAX_WORKERS,
+                   seed: int = 42) -> csr_matrix:
+    """
+    Sparse consensus matrix of a parallel clustering ensemble.
+
+    Args:
+        embeddings: Array (n, dim)
+        n_clusters: Clusters per run
+        n_runs: Runs in the ensemble
+        subsample: Fraction of columns per run
+        max_workers: Worker processes (None = all CPUs)
+        seed: Seed for the per-run seeds
+
+    Returns:
+        Symmetric CSR matrix: share of co-sampled runs in which i and j
+        shared a cluster (diagonal 1)
+    """
+    n = len(embeddings)
+    seeds = np.random.default_rng(seed).integers(0, 2 ** 31 - 1, size=n_runs)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, n_runs))
+    shares = [list(s) for s in np.array_split(seeds, workers) if len(s)]
+
+    together = csr_matrix((n, n), dtype=np.float32)
+    sampled = []
+    if workers == 1:
+        results = [_ensemble_worker(embeddings, n_clusters, shares[0], subsample)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_ensemble_worker, embeddings, n_clusters, share, subsample)
+                       for share in shares]
+            results = [f.result() for f in futures]
+    for partial, runs in results:
+        together = together + partial
+        sampled.append(runs)
+    sampled = np.vstack(sampled).astype(np.float32)
+
+    # Normalize each observed pair by how often both columns were sampled
+    together = together.tocoo()
+    rows, cols = together.row, together.col
+    cosampled = np.empty(len(rows), dtype=np.float32)
+    for s in range(0, len(rows), 1 << 16):
+        r, c = rows[s:s + (1 << 16)], cols[s:s + (1 << 16)]
+        cosampled[s:s + len(r)] = np.einsum('ij,ij->j', sampled[:, r], sampled[:, c])
+    values = together.data / np.maximum(cosampled, 1)
+
+    consensus = coo_matrix((np.concatenate([values, values, np.ones(n, dtype=np.float32)]),
+                            (np.concatenate([rows, cols, np.arange(n)]),
+                             np.concatenate([cols, rows, np.arange(n)]))), shape=(n, n))
+    return consensus.tocsr()
+
+
+# ============================================================
+# FINAL CLUSTERS AND STABILITY
+# ============================================================
+
+def consensus_labels(consensus: csr_matrix, n_clusters: int, seed: int = 42) -> np.ndarray:
+    """Final clusters from a consensus matrix."""
+    n = consensus.shape[0]
+    if n <= DENSE_LINKAGE_LIMIT:
+        from sklearn.cluster import AgglomerativeClustering
+        distance = 1 - consensus.toarray()
+        return AgglomerativeClustering(n_clusters=n_clusters, metric='precomputed',
+                                       linkage='average').fit_predict(distance)
+    from sklearn.cluster import SpectralClustering
+    return SpectralClustering(n_clusters=n_clusters, affinity='precomputed',
+                              assign_labels='cluster_qr', random_state=seed).fit_predict(consensus)
+
+
+def cluster_stability(consensus: csr_matrix, labels: np.ndarray) -> dict:
+    """
+    Stability score per cluster: mean consensus over its member pairs.
+
+    Args:
+        consensus: Consensus matrix from co_association()
+        labels: Final cluster labels
+
+    Returns:
+        Dictionary label -> score in [0, 1] (singletons score 1.0)
+    """
+    coo = consensus.tocoo()
+    same = (labels[coo.row] == labels[coo.col]) & (coo.row < coo.col)
+    sums = np.bincount(labels[coo.row[same]], weights=coo.data[same], minlength=labels.max() + 1)
+    sizes = np.bincount(labels, minlength=labels.max() + 1)
+    pairs = sizes * (sizes - 1) / 2
+    return {int(k): float(sums[k] / pairs[k]) if pairs[k] else 1.0 for k in np.unique(labels)}
+
+
+def consensus_clusters(embeddings: np.ndarray, n_clusters: int, n_runs: int = CONSENSUS_RUNS,
+                       subsample: float = SUBSAMPLE_FRACTION, max_workers: int = MAX_WORKERS,
+                       seed: int = 42) -> tuple:
+    """
+    Consensus clustering of column embeddings.
+
+    Args:
+        embeddings: Array (n, dim)
+        n_clusters: Number of final clusters
+        n_runs: Runs in the ensemble
+        subsample: Fraction of columns per run
+        max_workers: Worker processes (None = all CPUs)
+        seed: Base seed
+
+    Returns:
+        (labels, stability dict label -> score)
+    """
+    consensus = co_association(embeddings, n_clusters, n_runs, subsample, max_workers, seed)
+    labels = consensus_labels(consensus, n_clusters, seed)
+    return labels, cluster_stability(consensus, labels)
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    from collections import defaultdict
+    from db_service import get_table_columns
+    from embedding_service import encode
+    from schema_model import SchemaModel
+
+    print("=" * 70)
+    print(" Consensus Clustering")
+    print("=" * 70)
+
+    table_columns = get_table_columns()
+    embeddings = encode(table_columns)
+    n_clusters = SchemaModel(table_columns).n_tables
+
+    start = time.perf_counter()
+    labels, stability = consensus_clusters(embeddings, n_clusters)
+    print(f"✅ {CONSENSUS_RUNS} runs on {os.cpu_count()} CPUs in {time.perf_counter() - start:.2f}s")
+
+    clusters = defaultdict(list)
+    for column, label in zip(table_columns, labels):
+        clusters[int(label)].append(column)
+    for label, score in sorted(stability.items(), key=lambda kv: kv[1]):
+        flag = "⚠️" if score < STABILITY_WARNING else "✅"
+        print(f"{flag} Cluster {label:>3}  stability {score:.2f}  ({len(clusters[label])} columns): "
+              f"{', '.join(clusters[label][:6])}{' ...' if len(clusters[label]) > 6 else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+CQL Schema Parser
+=================
+Parses the CQL written by generate_cassandra_schema() (CREATE KEYSPACE,
+USE and CREATE TABLE statements) into plain Python structures so that
+proposed designs can be analysed without a running Cassandra cluster.
+
+Usage:
+    from cql_parser import load_cql_schema
+    schema = load_cql_schema("../output/cassandra_schema.cql")
+
+Author: Migration Analysis Tool
+"""
+
+import re
+
+# ============================================================
+# REGULAR EXPRESSIONS
+# ============================================================
+
+_KEYSPACE_RE = re.compile(
+    r"CREATE\s+KEYSPACE\s+(IF\s+NOT\s+EXISTS\s+)?(\w+)\s+WITH\s+replication\s*=\s*\{(.*?)\}",
+    re.IGNORECASE | re.DOTALL
+)
+_USE_RE = re.compile(r"USE\s+(\w+)", re.IGNORECASE)
+_TABLE_RE = re.compile(
+    r"CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?([\w.]+)\s*\(", re.IGNORECASE
+)
+_CLUSTERING_ORDER_RE = re.compile(
+    r"CLUSTERING\s+ORDER\s+BY\s*\((.*?)\)", re.IGNORECASE | re.DOTALL
+)
+_MAP_ENTRY_RE = re.compile(r"'([^']*)'\s*:\s*('([^']*)'|\d+)")
+
+
+# ============================================================
+# HELPER FUNCTIONS
+# ============================================================
+
+def _split_top_level(text: str) -> list:
+    """
+    Split a comma separated list, ignoring commas inside parentheses
+    or angle brackets (e.g. composite keys, map<text, int>).
+
+    Args:
+        text: Text to split
+
+    Returns:
+        List of stripped, non-empty parts
+    """
+    parts = []
+    depth = 0
+    current = []
+    for ch in text:
+        if ch in '(<':
+            depth += 1
+        elif ch in ')>':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return [p for p in parts if p]
+
+
+def _parse_primary_key(definition: str) -> tuple:
+    """
+    Parse the inside of PRIMARY KEY (...).
+
+    Args:
+        definition: e.g. "(a, b), c, d" or "a, c"
+
+    Returns:
+        Tuple of (partition key columns, clustering columns)
+    """
+    parts = _split_top_level(definition)
+    first = parts[0]
+    if first.startswith('('):
+        partition_key = [c.strip() for c in first.strip('()').split(',')]
+    else:
+        partition_key = [first]
+    clustering_key = parts[1:]
+    return partition_key, clustering_key
+
+
+def _matching_paren(text: str, start: int) -> int:
+    """
+    Find the index of the parenthesis closing the one opened at start.
+
+    Args:
+        text: Text to scan
+        start: Index of the opening parenthesis
+
+    Returns:
+        Index of the matching closing parenthesis
+    """
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"❌ Unbalanced parentheses in CQL: {text[:60]}...")
+
+
+def _strip_comments(cql_text: str) -> list:
+    """
+    Split CQL text into statements, keeping the last comment line seen
+    before each statement (generate_cassandra_schema() writes the cluster
+    description there).
+
+    Args:
+        cql_text: Raw CQL text
+
+    Returns:
+        List of (statement, preceding comment) tuples
+    """
+    statements = []
+    comment = None
+    current = []
+    for line in cql_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('--') or stripped.startswith('//'):
+            if not current:
+                comment = stripped.lstrip('-/ ').strip()
+            continue
+        if not stripped:
+            continue
+        current.append(stripped)
+        if stripped.endswith(';'):
+            statements.append((' '.join(current)[:-1].strip(), comment))
+            current = []
+            comment = None
+    if current:
+        statements.append((' '.join(current).strip(), comment))
+    return statements
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def parse_cql_schema(cql_text: str) -> dict:
+    """
+    Parse CREATE KEYSPACE / USE / CREATE TABLE statements.
+
+    Tables are returned as a list in file order rather than a dict,
+    because the generated schema can declare the same table name twice
+    (two clusters drawn from the same source table); callers decide how
+    IF NOT EXISTS should resolve the duplicates.
+
+    Args:
+        cql_text: Raw CQL text
+
+    Returns:
+        Dictionary with 'keyspaces' (name -> replication options) and
+        'tables' (list of table definitions)
+    """
+    keyspaces = {}
+    tables = []
+    current_keyspace = None
+
+    for statement, comment in _strip_comments(cql_text):
+        keyspace_match = _KEYSPACE_RE.match(statement)
+        if keyspace_match:
+            replication = {}
+            for key, raw, quoted in _MAP_ENTRY_RE.findall(keyspace_match.group(3)):
+                replication[key] = quoted if raw.startswith("'") else int(raw)
+            keyspaces[keyspace_match.group(2)] = {
+                'replication': replication,
+                'if_not_exists': bool(keyspace_match.group(1))
+            }
+            continue
+
+        use_match = _USE_RE.match(statement)
+        if use_match:
+            current_keyspace = use_match.group(1)
+            continue
+
+        table_match = _TABLE_RE.match(statement)
+        if not table_match:
+            continue
+
+        body_end = _matching_paren(statement, table_match.end() - 1)
+        body = statement[table_match.end():body_end]
+        options = statement[body_end + 1:]
+
+        full_name = table_match.group(2)
+        if '.' in full_name:
+            keyspace, name = full_name.split('.', 1)
+        else:
+            keyspace, name = current_keyspace, full_name
+
+        columns = []
+        partition_key, clustering_key = [], []
+        for part in _split_top_level(body):
+            if part.upper().startswith('PRIMARY KEY'):
+                inner = part[part.index('(') + 1:part.rindex(')')]
+                partition_key, clustering_key = _parse_primary_key(inner)
+                continue
+            tokens = part.split(None, 1)
+            col_name, col_type = tokens[0], tokens[1] if len(tokens) > 1 else 'text'
+            if col_type.upper().endswith('PRIMARY KEY'):
+                col_type = col_type[:-len('PRIMARY KEY')].strip()
+                partition_key = [col_name]
+            columns.append((col_name, col_type.strip().lower()))
+
+        clustering_order = {col: 'ASC' for col in clustering_key}
+        if options.strip():
+            order_match = _CLUSTERING_ORDER_RE.search(options)
+            if order_match:
+                for entry in _split_top_level(order_match.group(1)):
+                    col, _, direction = entry.partition(' ')
+                    clustering_order[col] = (direction.strip() or 'ASC').upper()
+
+        tables.append({
+            'keyspace': keyspace,
+            'name': name,
+            'columns': columns,
+            'partition_key': partition_key,
+            'clustering_key': clustering_key,
+            'clustering_order': clustering_order,
+            'if_not_exists': bool(table_match.group(1)),
+            'comment': comment
+        })
+
+    return {'keyspaces': keyspaces, 'tables': tables}
+
+
+def load_cql_schema(file_path: str) -> dict:
+    """
+    Load and parse a CQL schema file.
+
+    Args:
+        file_path: Path to the .cql file
+
+    Returns:
+        Parsed schema (see parse_cql_schema)
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            cql_text = f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"❌ CQL file not found: {file_path}")
+    schema = parse_cql_schema(cql_text)
+    print(f"✅ Parsed {len(schema['tables'])} tables from {file_path}")
+    return schema
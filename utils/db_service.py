@@ -52,13 +52,9 @@ import json
 import sqlite3
 import os
 
-def get_table_columns():
-    # Change this path to where your DB is stored
-    db_name = "chinook.db"
-    db_path = os.path.join("..", "db", db_name)
-
-    # Connect to the SQLite DB
-    conn = sqlite3.connect(db_path)
+def extract_table_columns(db_path):
+    """Return the "table.column" list of any SQLite database (read-only, no output file)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
     cursor = conn.cursor()
 
     # Get only user-defined tables
@@ -73,10 +69,21 @@ def get_table_columns():
     # Get the columns for each table
     table_columns = []
     for table in tables:
-        cursor.execute(f"PRAGMA table_info({table})")
+        cursor.execute(f'PRAGMA table_info("{table}")')
         columns = [f"{table}.{row[1]}" for row in cursor.fetchall()]
         table_columns.extend(columns)
 
+    conn.close()
+    return table_columns
+
+
+def get_table_columns():
+    # Change this path to where your DB is stored
+    db_name = "chinook.db"
+    db_path = os.path.join("..", "db", db_name)
+
+    table_columns = extract_table_columns(db_path)
+
     # Save as JSON
     os.makedirs("../output", exist_ok=True)
     with open(f"../output/{db_name}_json.json", "w") as f:
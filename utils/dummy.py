@@ -1,4 +1,7 @@
 #!pip install -q transformers
+import os
+import json
+import time
 from transformers import pipeline
 # Load sentiment-analysis pipeline
 pipe = pipeline("sentiment-analysis")
@@ -13,6 +16,11 @@ filename = "columns.json"
 # Load the file from assets
 json_path = os.path.join(assets_path, filename)
 
+# Strings per forward pass for the column classification
+batch_size = 64
+# Batch sizes compared in the throughput benchmark
+benchmark_batch_sizes = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
 with open(json_path, "r") as f:
     data = json.load(f)
 
@@ -25,6 +33,32 @@ for line in transformed:
     print(line)
 ##############
 print("ss", transformed)
-for line in transformed:
-    result = pipe(line)
-    print("Result:", result)
+
+
+def classify(lines, batch_size=batch_size):
+    """
+    Run all lines through the pipeline as one streamed dataset.
+
+    Lines are fed longest first so each batch pads to a similar length;
+    results are returned in the order of the input lines.
+    """
+    order = sorted(range(len(lines)), key=lambda i: len(lines[i]), reverse=True)
+    stream = (lines[i] for i in order)
+    results = [None] * len(lines)
+    for i, result in zip(order, pipe(stream, batch_size=batch_size)):
+        results[i] = result
+    return results
+
+
+results = classify(transformed)
+for line, result in zip(transformed, results):
+    print("Result:", line, "->", result)
+
+##############
+# Throughput per batch size
+print("\nBatch size | strings/s")
+for size in benchmark_batch_sizes:
+    start = time.perf_counter()
+    classify(transformed, batch_size=size)
+    elapsed = time.perf_counter() - start
+    print(f"{size:>10} | {len(transformed) / elapsed:,.0f}")
@@ -1,6 +1,6 @@
 #Generating embedding section
 from db_service import get_table_columns
-from sentence_transformers import SentenceTransformer
+from embedding_service import encode, service_available
 import torch
 
 # ===== Check GPU availability =====
@@ -21,9 +21,10 @@ print("=" * 50)
 # Get table columns from database
 table_columns = get_table_columns()
 
-# Generate embeddings (automatically uses GPU if available)
-model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
-embeddings = model.encode(table_columns, show_progress_bar=True)
+# Generate embeddings (resident embedding service if running, else in-process on this device)
+if service_available():
+    print("🔄 Using the local embedding service")
+embeddings = encode(table_columns, show_progress_bar=True, device=device)
 
 print(f"\n✅ Generated {len(embeddings)} embeddings for {len(table_columns)} columns")
 print(f"   Embedding dimension: {embeddings.shape[1]}")
@@ -0,0 +1,387 @@
+"""
+Local Embedding Service
+=======================
+Keeps one SentenceTransformer model resident in a long-lived process and
+serves embeddings over a localhost TCP port, so the analysis scripts do
+not pay torch import and model load on every run.
+
+Server side:
+    - concurrent requests are merged into dynamically sized batches: a
+      batch closes when it holds MAX_BATCH_SIZE strings or MAX_WAIT_MS
+      after its first request arrived, whichever comes first
+    - identical strings inside a batch are encoded once, and recently
+      encoded strings are answered from an LRU cache
+    - encoding runs in a worker thread, so the next batch fills up while
+      the current one is being encoded
+
+Client side (encode()):
+    - used by clustering.py, embaddings-generator.py,
+      gemini_migration_analyzer.py and comparison_analyzer.py
+    - talks to the service when it is running, otherwise falls back to an
+      in-process model (loaded once per process), or to the multi-core
+      encoding_pool for large requests on CPU (device='cpu', or no CUDA)
+    - a service that does not reply within READ_TIMEOUT is treated like
+      an error reply: a warning, then in-process encoding
+
+Backends (EMBEDDING_BACKEND):
+    - 'torch': float32 PyTorch (default)
+    - 'int8':  dynamic int8 quantization of the Linear layers, CPU only
+    - 'onnx':  ONNX Runtime graph (needs optimum[onnxruntime])
+    Run backend_benchmark.py before switching: it reports throughput,
+    cosine agreement and cluster agreement against the float model.
+
+Protocol: every message is a 4-byte big-endian length plus payload.
+Request payload is JSON {"model", "texts"}; the response is a JSON header
+{"shape", "dtype"} or {"error"} followed (on success) by the raw
+float32 matrix in a second message.
+
+Requirements:
+    pip install sentence-transformers numpy
+
+Usage:
+    python embedding_service.py          # start the service (Ctrl+C to stop)
+
+Author: Migration Analysis Tool
+"""
+
+import json
+import time
+import socket
+import struct
+import asyncio
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Inference backend: 'torch', 'int8' or 'onnx' (see module docstring)
+EMBEDDING_BACKEND = 'torch'
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+
+# Set to False to always encode in-process
+USE_EMBEDDING_SERVICE = True
+
+# Seconds to wait for the service before falling back to in-process encoding
+CONNECT_TIMEOUT = 0.5
+
+# Seconds to wait for the service's reply before encoding in-process instead
+READ_TIMEOUT = 120
+
+# Dynamic batching: close a batch at this many strings or after this delay
+MAX_BATCH_SIZE = 512
+MAX_WAIT_MS = 10
+
+# Strings kept in the server-side LRU cache
+CACHE_SIZE = 100_000
+
+# In-process CPU requests with at least this many strings use encoding_pool
+POOL_MIN_STRINGS = 20_000
+
+# ============================================================
+# MODEL LOADING
+# ============================================================
+
+def load_model(model_name: str = MODEL_NAME, device: str = None, backend: str = None):
+    """
+    Load a SentenceTransformer with the requested inference backend.
+
+    Args:
+        model_name: SentenceTransformer model name
+        device: Device for the 'torch' backend (None = library default);
+            'int8' and 'onnx' always run on CPU
+        backend: 'torch', 'int8' or 'onnx' (None = EMBEDDING_BACKEND)
+
+    Returns:
+        Model exposing encode()
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or EMBEDDING_BACKEND
+    if backend == 'torch':
+        return SentenceTransformer(model_name, device=device)
+    if backend == 'int8':
+        import torch
+        model = SentenceTransformer(model_name, device='cpu')
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear},
+                                                      dtype=torch.qint8, inplace=True)
+    if backend == 'onnx':
+        return SentenceTransformer(model_name, device='cpu', backend='onnx')
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+# ============================================================
+# WIRE FORMAT
+# ============================================================
+
+def _send(sock_or_writer, payload: bytes):
+    data = struct.pack('>I', len(payload)) + payload
+    if isinstance(sock_or_writer, socket.socket):
+        sock_or_writer.sendall(data)
+    else:
+        sock_or_writer.write(data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding service closed the connection")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock: socket.socket) -> bytes:
+    (length,) = struct.unpack('>I', _recv_exact(sock, 4))
+    return _recv_exact(sock, length)
+
+
+async def _read_message(reader: asyncio.StreamReader) -> bytes:
+    (length,) = struct.unpack('>I', await reader.readexactly(4))
+    return await reader.readexactly(length)
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+class EmbeddingServer:
+    """asyncio server with dynamic request batching around one resident model."""
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = None, backend: str = None,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS,
+                 cache_size: int = CACHE_SIZE):
+        start = time.perf_counter()
+        self.model_name = model_name
+        self.backend = backend or EMBEDDING_BACKEND
+        self.model = load_model(model_name, device, self.backend)
+        self.load_seconds = time.perf_counter() - start
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.queue = None
+        self.encoder = ThreadPoolExecutor(max_workers=1)
+        self.stats = {'requests': 0, 'batches': 0, 'strings': 0, 'encoded': 0, 'cache_hits': 0}
+
+    async def _collect_batch(self) -> list:
+        """Wait for one request, then keep adding requests until size or time cap."""
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _encode_unique(self, texts: list) -> dict:
+        vectors = self.model.encode(texts, batch_size=min(len(texts), 256),
+                                    show_progress_bar=False, convert_to_numpy=True)
+        return dict(zip(texts, vectors.astype(np.float32)))
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # Any failure fails only this batch's requests; the task keeps serving
+            try:
+                unique = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+                hits = {t: self.cache[t] for t in unique if t in self.cache}
+                missing = [t for t in unique if t not in hits]
+                self.stats['batches'] += 1
+                self.stats['strings'] += sum(len(texts) for texts, _ in batch)
+                self.stats['cache_hits'] += len(hits)
+                self.stats['encoded'] += len(missing)
+
+                vectors = await loop.run_in_executor(self.encoder, self._encode_unique, missing) \
+                    if missing else {}
+                vectors.update(hits)
+
+                # Replies come from this batch's vectors, so a batch larger than
+                # the cache cannot evict its own results before they are sent
+                for texts, future in batch:
+                    if not future.done():
+                        future.set_result(np.stack([vectors[t] for t in texts])
+                                          if texts else np.empty((0, 0), dtype=np.float32))
+
+                for text in unique:
+                    self.cache[text] = vectors[text]
+                    self.cache.move_to_end(text)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            except Exception as e:
+                for _, future in batch:
+                    # A client that disconnected may have cancelled its future
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = json.loads(await _read_message(reader))
+                except asyncio.IncompleteReadError:
+                    break
+                if (request.get('model', self.model_name) != self.model_name
+                        or request.get('backend', self.backend) != self.backend):
+                    _send(writer, json.dumps(
+                        {'error': f"service runs {self.model_name} ({self.backend})"}).encode())
+                    await writer.drain()
+                    continue
+                self.stats['requests'] += 1
+                future = asyncio.get_running_loop().create_future()
+                await self.queue.put((request['texts'], future))
+                try:
+                    matrix = await future
+                except Exception as e:
+                    _send(writer, json.dumps({'error': f"encoding failed: {e!r}"}).encode())
+                    await writer.drain()
+                    continue
+                _send(writer, json.dumps({'shape': list(matrix.shape), 'dtype': 'float32'}).encode())
+                _send(writer, matrix.tobytes())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        self.queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+        server = await asyncio.start_server(self._handle, host, port)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                batcher.cancel()
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+_local_models = {}
+_local_lock = threading.Lock()
+_cuda = None
+
+
+def _service_encode(texts: list, model_name: str, backend: str) -> np.ndarray:
+    with socket.create_connection((SERVICE_HOST, SERVICE_PORT), timeout=CONNECT_TIMEOUT) as sock:
+        sock.settimeout(READ_TIMEOUT)
+        _send(sock, json.dumps({'model': model_name, 'backend': backend,
+                                'texts': texts}).encode('utf-8'))
+        try:
+            header = json.loads(_recv(sock))
+            if 'error' in header:
+                raise RuntimeError(header['error'])
+            matrix = np.frombuffer(_recv(sock), dtype=np.float32)
+        except socket.timeout:
+            raise RuntimeError(f"no reply within {READ_TIMEOUT}s")
+        return matrix.reshape(header['shape']) if texts else np.empty((0, 0), dtype=np.float32)
+
+
+def _local_model(model_name: str, device: str, backend: str):
+    with _local_lock:
+        key = (model_name, device, backend)
+        if key not in _local_models:
+            _local_models[key] = load_model(model_name, device, backend)
+        return _local_models[key]
+
+
+def _cuda_available() -> bool:
+    global _cuda
+    if _cuda is None:
+        try:
+            import torch
+            _cuda = torch.cuda.is_available()
+        except ImportError:
+            _cuda = False
+    return _cuda
+
+
+def encode(texts: list, model_name: str = MODEL_NAME, show_progress_bar: bool = False,
+           device: str = None, backend: str = None) -> np.ndarray:
+    """
+    Embed strings through the local service, or in-process when it is not running.
+
+    Args:
+        texts: Strings to embed
+        model_name: SentenceTransformer model name
+        show_progress_bar: Progress bar for in-process encoding
+        device: Device for in-process encoding (None = library default)
+        backend: Inference backend (None = EMBEDDING_BACKEND)
+
+    Returns:
+        float32 array (len(texts), dim)
+    """
+    texts = list(texts)
+    backend = backend or EMBEDDING_BACKEND
+    if USE_EMBEDDING_SERVICE:
+        try:
+            return _service_encode(texts, model_name, backend)
+        except OSError:
+            pass    # service not running
+        except (RuntimeError, ValueError) as e:
+            # The service answered but could not serve this request (e.g. it
+            # runs another model / backend): say so instead of silently
+            # paying for an in-process model load
+            print(f"⚠️ Embedding service error ({e}); encoding in-process")
+    on_cpu = device == 'cpu' or (device is None and not _cuda_available())
+    if len(texts) >= POOL_MIN_STRINGS and on_cpu:
+        from encoding_pool import encode_parallel
+        return encode_parallel(texts, model_name, backend)
+    model = _local_model(model_name, device, backend)
+    return np.asarray(model.encode(texts, show_progress_bar=show_progress_bar), dtype=np.float32)
+
+
+def service_available() -> bool:
+    """True if the embedding service answers on SERVICE_HOST:SERVICE_PORT."""
+    try:
+        with socket.create_connection((SERVICE_HOST, SERVICE_PORT), timeout=CONNECT_TIMEOUT):
+            return True
+    except OSError:
+        return False
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Local Embedding Service")
+    print("=" * 70)
+
+    if service_available():
+        print(f"⚠️ A service is already listening on {SERVICE_HOST}:{SERVICE_PORT}")
+        return
+
+    server = EmbeddingServer()
+    print(f"✅ Loaded {MODEL_NAME} ({server.backend}) in {server.load_seconds:.2f}s")
+    print(f"✅ Listening on {SERVICE_HOST}:{SERVICE_PORT} "
+          f"(batch <= {MAX_BATCH_SIZE} strings / {MAX_WAIT_MS} ms)")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        s = server.stats
+        print(f"\n✅ Served {s['requests']} requests / {s['strings']:,} strings in "
+              f"{s['batches']} batches ({s['encoded']:,} encoded, {s['cache_hits']:,} cache hits)")
+
+
+if __name__ == "__main__":
+    main()
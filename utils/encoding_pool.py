@@ -0,0 +1,253 @@
+"""
+Multi-core Encoding Pool
+========================
+Encodes large column catalogs on all CPU cores:
+
+    1. inputs are deduplicated (each distinct string is encoded once)
+    2. distinct strings are sorted by length and cut into shards, so every
+       forward batch holds strings of similar length and little padding
+    3. shards go to a process pool, one model per worker, with torch
+       threads split between workers so they do not oversubscribe cores;
+       the longest shards are scheduled first
+    4. the pool (and the model in every worker) is kept alive across
+       calls and shut down at exit; workers are forked where the platform
+       allows, so calling scripts without a __main__ guard are not
+       re-executed
+    5. shard results are scattered back and expanded to the original
+       input order (duplicates included)
+
+embedding_service.encode() uses the pool for large in-process CPU
+requests (POOL_MIN_STRINGS).
+
+Requirements:
+    pip install sentence-transformers numpy
+
+Usage:
+    python encoding_pool.py          # scaling report on the schema columns
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import time
+import atexit
+import threading
+import multiprocessing as mp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from embedding_service import MODEL_NAME, load_model
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+# Worker processes (None = all CPUs)
+MAX_WORKERS = None
+
+# Distinct strings per shard sent to a worker
+SHARD_SIZE = 1024
+
+# Strings per forward pass inside a worker
+BATCH_SIZE = 64
+
+# Column strings are repeated up to this many for the scaling report
+MIN_BENCHMARK_STRINGS = 20000
+
+# ============================================================
+# WORKER
+# ============================================================
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int):
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_name, 'cpu', backend)
+
+
+def _encode_shard(shard_id: int, texts: list, batch_size: int) -> tuple:
+    vectors = _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return shard_id, np.asarray(vectors, dtype=np.float32)
+
+
+# ============================================================
+# PERSISTENT POOLS
+# ============================================================
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(model_name: str, backend: str, workers: int) -> ProcessPoolExecutor:
+    """
+    Warm pool for (model, backend, workers), created on first use.
+
+    Args:
+        model_name: SentenceTransformer model name
+        backend: Inference backend
+        workers: Worker processes
+
+    Returns:
+        ProcessPoolExecutor whose workers hold the loaded model
+    """
+    key = (model_name, backend, workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                       initializer=_init_worker,
+                                       initargs=(model_name, backend, threads))
+            _pools[key] = pool
+        return pool
+
+
+def shutdown_pools():
+    """Stop every warm pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pools)
+
+
+# ============================================================
+# ENCODING
+# ============================================================
+
+def length_shards(texts: list, shard_size: int = SHARD_SIZE) -> list:
+    """
+    Sort strings by length and cut them into shards.
+
+    Args:
+        texts: Distinct strings
+        shard_size: Strings per shard
+
+    Returns:
+        List of index arrays into texts, longest shard first
+    """
+    order = np.argsort([len(t) for t in texts], kind='stable')[::-1]
+    return [order[s:s + shard_size] for s in range(0, len(order), shard_size)]
+
+
+def encode_parallel(texts: list, model_name: str = MODEL_NAME, backend: str = None,
+                    max_workers: int = MAX_WORKERS, shard_size: int = SHARD_SIZE,
+                    batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """
+    Encode strings on a process pool, deduplicated and length-bucketed.
+
+    Args:
+        texts: Strings to embed (duplicates allowed)
+        model_name: SentenceTransformer model name
+        backend: Inference backend (None = embedding_service.EMBEDDING_BACKEND)
+        max_workers: Worker processes (None = all CPUs)
+        shard_size: Distinct strings per shard
+        batch_size: Strings per forward pass
+
+    Returns:
+        float32 array (len(texts), dim) in input order
+    """
+    texts = list(texts)
+    index = {}
+    inverse = np.fromiter((index.setdefault(t, len(index)) for t in texts),
+                          dtype=np.int64, count=len(texts))
+    unique = list(index)
+    if not unique:
+        return np.empty((0, 0), dtype=np.float32)
+
+    shards = length_shards(unique, shard_size)
+    key = (model_name, backend, max_workers or os.cpu_count() or 1)
+    pool = get_pool(*key)
+
+    vectors = None
+    try:
+        futures = [pool.submit(_encode_shard, shard_id, [unique[i] for i in shard], batch_size)
+                   for shard_id, shard in enumerate(shards)]
+        for future in futures:
+            shard_id, shard_vectors = future.result()
+            if vectors is None:
+                vectors = np.empty((len(unique), shard_vectors.shape[1]), dtype=np.float32)
+            vectors[shards[shard_id]] = shard_vectors
+    except BrokenProcessPool:
+        # A worker died (e.g. model load failed): do not hand the dead pool out again
+        with _pools_lock:
+            if _pools.get(key) is pool:
+                del _pools[key]
+        raise
+    return vectors[inverse]
+
+
+def scaling_report(texts: list, worker_counts: list = None, **kwargs) -> list:
+    """
+    Measure strings/s of encode_parallel() for several worker counts.
+
+    Args:
+        texts: Strings to embed (should be distinct to measure model work)
+        worker_counts: Worker counts to try (default: 1, 2, 4, ... CPUs)
+        **kwargs: Passed to encode_parallel()
+
+    Returns:
+        List of dicts with workers, seconds, strings_per_second, efficiency
+    """
+    cpus = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = sorted({min(2 ** k, cpus) for k in range(cpus.bit_length() + 1)})
+
+    rows = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        encode_parallel(texts, max_workers=workers, **kwargs)
+        seconds = time.perf_counter() - start
+        shutdown_pools()
+        rows.append({'workers': workers, 'seconds': seconds,
+                     'strings_per_second': len(texts) / seconds})
+    base = rows[0]['strings_per_second'] / rows[0]['workers']
+    for row in rows:
+        row['efficiency'] = row['strings_per_second'] / (base * row['workers'])
+    return rows
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    from db_service import get_table_columns
+
+    print("=" * 70)
+    print(" Multi-core Encoding Pool")
+    print("=" * 70)
+
+    table_columns = get_table_columns()
+    # Distinct synthetic variants so every string costs a forward pass
+    corpus = [f"{c}_{i}" for i in range(MIN_BENCHMARK_STRINGS // max(len(table_columns), 1) + 1)
+              for c in table_columns][:MIN_BENCHMARK_STRINGS]
+    print(f"✅ {len(corpus):,} strings from {len(table_columns)} schema columns, "
+          f"{os.cpu_count()} CPUs")
+
+    print(f"\n {'Workers':>7} {'Seconds':>9} {'Strings/s':>11} {'Efficiency':>11}")
+    for row in scaling_report(corpus):
+        print(f" {row['workers']:>7} {row['seconds']:>9.2f} {row['strings_per_second']:>11.0f} "
+              f"{row['efficiency']:>10.0%}")
+
+    duplicated = table_columns * 50
+    start = time.perf_counter()
+    encode_parallel(duplicated)
+    print(f"\n✅ {len(duplicated):,} strings with duplicates ({len(set(duplicated))} distinct) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
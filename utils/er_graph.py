@@ -0,0 +1,456 @@
+"""
+ER Graph with Join-Path Index (Step C)
+======================================
+Builds the entity-relationship graph of a SQLite database from
+PRAGMA foreign_key_list (nodes = tables, edges = declared foreign keys)
+and indexes it for the query catalog generator:
+
+    - table names are interned to integer ids; adjacency is kept as
+      lists of edge ids
+    - connected components are precomputed, so "no join path" is an O(1)
+      lookup
+    - directed reachability (child -> parent along FKs) is precomputed
+      once for all tables with one Tarjan SCC pass and bitset
+      propagation over the condensed DAG
+    - shortest join paths use a BFS tree per source table (one edge id
+      per table, packed in an array), built on first use and kept in an
+      LRU cache, so repeated lookups are O(path length); a cached tree
+      of either endpoint is reused. Callers that know their sources up
+      front (the query catalog) precompute and pin those trees with
+      precompute_bfs_trees(), so random lookups never rebuild a tree
+    - FK chains (deep hierarchies) are enumerated up to a depth limit
+      with memoization on (table, remaining depth)
+
+This keeps catalog generation fast on schemas with thousands of tables
+and dense FK webs.
+
+Usage:
+    python er_graph.py
+
+Author: Migration Analysis Tool
+"""
+
+import sqlite3
+from array import array
+from collections import deque, OrderedDict
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# Longest FK chain enumerated for deep-hierarchy queries
+MAX_PATH_DEPTH = 4
+
+# BFS trees kept for shortest-join-path lookups (least recently used dropped)
+BFS_CACHE_SIZE = 512
+
+# ============================================================
+# GRAPH
+# ============================================================
+
+class ERGraph:
+    """
+    Entity-relationship graph with precomputed reachability and cached
+    shortest join paths.
+
+    Edges are dictionaries:
+        {'id', 'child', 'parent', 'child_columns', 'parent_columns',
+         'cardinality'}  ('1:1' or '1:N', parent side first)
+    """
+
+    def __init__(self, tables: list, columns: dict, primary_keys: dict, foreign_keys: list,
+                 column_types: dict = None):
+        """
+        Args:
+            tables: Table names
+            columns: table -> list of column names
+            primary_keys: table -> list of PK column names
+            foreign_keys: list of {'child', 'child_columns', 'parent',
+                'parent_columns'}
+            column_types: Optional table -> {column: declared type}
+        """
+        self.tables = list(tables)
+        self.table_id = {name: i for i, name in enumerate(self.tables)}
+        self.columns = columns
+        self.column_types = column_types or {}
+        self.primary_keys = primary_keys
+
+        n = len(self.tables)
+        self.edges = []
+        self.out_edges = [[] for _ in range(n)]    # child -> parent
+        self.in_edges = [[] for _ in range(n)]     # parent <- child
+        for fk in foreign_keys:
+            if fk['parent'] not in self.table_id or fk['child'] not in self.table_id:
+                continue
+            child, parent = self.table_id[fk['child']], self.table_id[fk['parent']]
+            unique_child = sorted(fk['child_columns']) == sorted(primary_keys.get(fk['child'], []))
+            edge = {
+                'id': len(self.edges),
+                'child': child,
+                'parent': parent,
+                'child_columns': list(fk['child_columns']),
+                'parent_columns': list(fk['parent_columns']),
+                'cardinality': '1:1' if unique_child else '1:N'
+            }
+            self.edges.append(edge)
+            self.out_edges[child].append(edge['id'])
+            self.in_edges[parent].append(edge['id'])
+
+        # (edge id, neighbour) pairs per table, both directions, built once
+        self._adjacency = [[(e, self.edges[e]['parent']) for e in self.out_edges[node]] +
+                           [(e, self.edges[e]['child']) for e in self.in_edges[node]]
+                           for node in range(n)]
+        self._bfs_cache = OrderedDict()
+        self._bfs_pinned = {}
+        self._chain_memo = {}
+        self._build_components()
+        self._build_reachability()
+
+    # ------------------------------------------------------------
+    # INDEX CONSTRUCTION
+    # ------------------------------------------------------------
+
+    def neighbours(self, node: int):
+        """Yield (edge id, neighbour) over FK edges in both directions."""
+        yield from self._adjacency[node]
+
+    def _build_components(self):
+        n = len(self.tables)
+        self.component = [-1] * n
+        current = 0
+        for start in range(n):
+            if self.component[start] != -1:
+                continue
+            self.component[start] = current
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                for _, other in self.neighbours(node):
+                    if self.component[other] == -1:
+                        self.component[other] = current
+                        queue.append(other)
+            current += 1
+
+    def _build_reachability(self):
+        """
+        reach[t] is a bitset (Python int) of tables reachable from t by
+        following FKs child -> parent. SCCs (FK cycles, self references)
+        are collapsed with an iterative Tarjan pass; the condensed DAG is
+        then processed in reverse topological order, which Tarjan already
+        produces.
+        """
+        n = len(self.tables)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        scc_of = [-1] * n
+        sccs = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, i = work.pop()
+                if i == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                recurse = False
+                edges = self.out_edges[node]
+                while i < len(edges):
+                    nxt = self.edges[edges[i]]['parent']
+                    i += 1
+                    if index[nxt] == -1:
+                        work.append((node, i))
+                        work.append((nxt, 0))
+                        recurse = True
+                        break
+                    if on_stack[nxt]:
+                        low[node] = min(low[node], index[nxt])
+                if recurse:
+                    continue
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        scc_of[w] = len(sccs)
+                        members.append(w)
+                        if w == node:
+                            break
+                    sccs.append(members)
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+        # Tarjan emits SCCs in reverse topological order: successors first
+        scc_reach = [0] * len(sccs)
+        for s, members in enumerate(sccs):
+            bits = 0
+            for m in members:
+                bits |= 1 << m
+                for e in self.out_edges[m]:
+                    target = scc_of[self.edges[e]['parent']]
+                    if target != s:
+                        bits |= scc_reach[target]
+            scc_reach[s] = bits
+        self.reach = [scc_reach[scc_of[t]] for t in range(n)]
+        self.scc_of = scc_of
+
+    # ------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------
+
+    def _id(self, table) -> int:
+        return table if isinstance(table, int) else self.table_id[table]
+
+    def connected(self, a, b) -> bool:
+        """True if any join path exists between two tables (O(1))."""
+        return self.component[self._id(a)] == self.component[self._id(b)]
+
+    def reaches(self, child, parent) -> bool:
+        """True if parent is reachable from child following FKs upward (O(1))."""
+        return bool(self.reach[self._id(child)] >> self._id(parent) & 1)
+
+    def reachable_from(self, table) -> list:
+        """All tables reachable from table following FKs upward (excluding itself)."""
+        t = self._id(table)
+        bits = self.reach[t] & ~(1 << t)
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(self.tables[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def _bfs_tree(self, source: int) -> array:
+        """BFS tree rooted at source: tree[node] = edge id towards the root (-1 = root/unreached)."""
+        tree = self._bfs_pinned.get(source)
+        if tree is not None:
+            return tree
+        tree = self._bfs_cache.get(source)
+        if tree is not None:
+            self._bfs_cache.move_to_end(source)
+            return tree
+        tree = array('i', [-1]) * len(self.tables)
+        seen = bytearray(len(self.tables))
+        seen[source] = 1
+        queue = deque([source])
+        adjacency = self._adjacency
+        while queue:
+            node = queue.popleft()
+            for e, other in adjacency[node]:
+                if not seen[other]:
+                    seen[other] = 1
+                    tree[other] = e
+                    queue.append(other)
+        self._bfs_cache[source] = tree
+        if len(self._bfs_cache) > BFS_CACHE_SIZE:
+            self._bfs_cache.popitem(last=False)
+        return tree
+
+    def precompute_bfs_trees(self, sources) -> int:
+        """
+        Build and pin the BFS trees of the given source tables (not subject
+        to LRU eviction), so every shortest_join_path() from or to one of
+        them is a walk of O(path length).
+
+        Args:
+            sources: Table names or ids
+
+        Returns:
+            Number of pinned trees
+        """
+        for source in sources:
+            source = self._id(source)
+            if source not in self._bfs_pinned:
+                tree = self._bfs_cache.pop(source, None)
+                self._bfs_pinned[source] = tree if tree is not None else self._bfs_tree(source)
+                self._bfs_cache.pop(source, None)
+        return len(self._bfs_pinned)
+
+    def _has_tree(self, node: int) -> bool:
+        return node in self._bfs_pinned or node in self._bfs_cache
+
+    def _walk_to_root(self, tree: array, node: int) -> list:
+        path = []
+        e = tree[node]
+        while e != -1:
+            edge = self.edges[e]
+            path.append(edge)
+            node = edge['parent'] if edge['child'] == node else edge['child']
+            e = tree[node]
+        return path
+
+    def shortest_join_path(self, a, b) -> list:
+        """
+        Shortest join path between two tables (fewest joins, FK edges in
+        either direction).
+
+        Args:
+            a: Source table (name or id)
+            b: Target table (name or id)
+
+        Returns:
+            List of edge dictionaries from a to b ([] if a == b),
+            or None if the tables are not connected
+        """
+        a, b = self._id(a), self._id(b)
+        if not self.connected(a, b):
+            return None
+        if a == b:
+            return []
+        if self._has_tree(b) and not self._has_tree(a):
+            # Walking b's tree from a already yields the edges in a -> b order
+            return self._walk_to_root(self._bfs_tree(b), a)
+        return self._walk_to_root(self._bfs_tree(a), b)[::-1]
+
+    def hierarchy_paths(self, table, max_depth: int = MAX_PATH_DEPTH) -> list:
+        """
+        All simple FK chains starting at table and following FKs upward
+        (child -> parent -> grandparent ...), up to max_depth edges.
+
+        Args:
+            table: Start table (name or id)
+            max_depth: Maximum number of edges per chain
+
+        Returns:
+            List of chains, each a tuple of edge ids
+        """
+        return [list(p) for p in self._chains(self._id(table), max_depth) if p]
+
+    def _chains(self, node: int, depth: int) -> tuple:
+        """Memoized: chains from node as tuples of edge ids (including the empty chain)."""
+        memo = self._chain_memo.get((node, depth))
+        if memo is not None:
+            return memo
+        chains = [()]
+        if depth == 0:
+            return tuple(chains)
+        for e in self.out_edges[node]:
+            parent = self.edges[e]['parent']
+            if parent == node:
+                continue   # self reference (e.g. employees.ReportsTo)
+            for tail in self._chains(parent, depth - 1):
+                # Keep paths simple: the tail must not come back to node
+                if any(self.edges[t]['parent'] == node for t in tail):
+                    continue
+                chains.append((e,) + tail)
+        chains = tuple(chains)
+        self._chain_memo[(node, depth)] = chains
+        return chains
+
+    def bridge_tables(self) -> list:
+        """
+        M:N bridge tables: at least two FKs to different parents whose
+        columns together cover the table's primary key.
+
+        Returns:
+            List of (bridge table id, [edge ids]) tuples
+        """
+        bridges = []
+        for t, name in enumerate(self.tables):
+            edges = [e for e in self.out_edges[t] if self.edges[e]['parent'] != t]
+            parents = {self.edges[e]['parent'] for e in edges}
+            if len(parents) < 2:
+                continue
+            fk_columns = {c for e in edges for c in self.edges[e]['child_columns']}
+            pk = set(self.primary_keys.get(name, []))
+            if pk and pk <= fk_columns:
+                bridges.append((t, edges))
+        return bridges
+
+    def summary(self) -> dict:
+        return {
+            'tables': len(self.tables),
+            'foreign_keys': len(self.edges),
+            'components': len(set(self.component)),
+            'self_references': sum(1 for e in self.edges if e['child'] == e['parent']),
+            'bridge_tables': [self.tables[t] for t, _ in self.bridge_tables()]
+        }
+
+
+# ============================================================
+# LOADING
+# ============================================================
+
+def load_er_graph(db_path: str = DB_PATH) -> ERGraph:
+    """
+    Build the ER graph of a SQLite database.
+
+    Args:
+        db_path: Path to the SQLite database
+
+    Returns:
+        ERGraph instance
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    tables = [row[0] for row in cursor.fetchall()]
+
+    columns, column_types, primary_keys, foreign_keys = {}, {}, {}, []
+    for table in tables:
+        cursor.execute(f"PRAGMA table_info({table})")
+        info = cursor.fetchall()
+        columns[table] = [row[1] for row in info]
+        column_types[table] = {row[1]: row[2] for row in info}
+        primary_keys[table] = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5] > 0]
+
+        # Rows: (id, seq, parent table, from, to, on_update, on_delete, match)
+        cursor.execute(f"PRAGMA foreign_key_list({table})")
+        grouped = {}
+        for fk_id, seq, parent, from_col, to_col, *_ in cursor.fetchall():
+            grouped.setdefault(fk_id, (parent, []))[1].append((seq, from_col, to_col))
+        for parent, parts in grouped.values():
+            parts.sort()
+            foreign_keys.append({
+                'child': table,
+                'child_columns': [p[1] for p in parts],
+                'parent': parent,
+                'parent_columns': [p[2] for p in parts]
+            })
+    conn.close()
+
+    # FKs that omit the referenced columns point at the parent's primary key
+    for fk in foreign_keys:
+        if any(c is None for c in fk['parent_columns']):
+            fk['parent_columns'] = primary_keys.get(fk['parent'], [])
+
+    return ERGraph(tables, columns, primary_keys, foreign_keys, column_types)
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" ER Graph")
+    print("=" * 70)
+
+    graph = load_er_graph(DB_PATH)
+    summary = graph.summary()
+    print(f"✅ {summary['tables']} tables, {summary['foreign_keys']} foreign keys, "
+          f"{summary['components']} connected component(s)")
+    print(f"   M:N bridge tables: {', '.join(summary['bridge_tables']) or 'none'}")
+
+    print("\n Foreign keys:")
+    for e in graph.edges:
+        print(f"   {graph.tables[e['child']]}.{','.join(e['child_columns'])} -> "
+              f"{graph.tables[e['parent']]}.{','.join(e['parent_columns'])}  ({e['cardinality']})")
+
+    print("\n Reachability (following FKs upward):")
+    for table in graph.tables:
+        print(f"   {table:<16} -> {', '.join(graph.reachable_from(table)) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+External Partition-Order Sort
+=============================
+Sorts denormalized exports into Cassandra bulk-load order - grouped by
+partition key token, ordered by clustering columns - when the export is
+larger than memory:
+
+    1. the input is streamed and cut into runs sized from MEMORY_LIMIT_MB
+    2. runs are sorted in a process pool by (Murmur3 token of the
+       partition key, clustering columns) and spilled to disk; at most one
+       run per worker is in flight, so memory stays bounded
+    3. the runs are combined with a k-way heap merge (intermediate passes
+       when there are more than MERGE_FAN_IN runs) into one CSV
+
+Tokens are computed with the vectorized Murmur3Partitioner hash of
+hot_partition_simulator.py and clustering values are compared by their
+CQL type (cassandra_emulator.coerce_value), so 10 sorts after 9 for int
+columns. Run generation and merge throughput are reported per export.
+sorted_records() streams the same order without writing a file (used by
+the sort-merge join of data_migrator.py).
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python external_sort.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import sys
+import csv
+import glob
+import time
+import heapq
+import pickle
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from hot_partition_simulator import murmur3_tokens, serialize_partition_key
+from cassandra_emulator import coerce_value
+from temporal_partitions import parse_mysql_ddl, csv_chunks
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+DS2_DDL_PATH = "../db/ds2/mysqlds2/build/mysqlds2_create_db.sql"
+
+# Memory available to the sort (input runs in flight across all workers)
+MEMORY_LIMIT_MB = 256
+
+# Worker processes sorting runs (None = all CPUs)
+MAX_WORKERS = None
+
+# Maximum runs merged in one pass
+MERGE_FAN_IN = 64
+
+# Records per pickled block in a run file
+BLOCK_ROWS = 4096
+
+# Directory for spilled runs (None = system temp directory)
+SPILL_DIR = None
+
+OUTPUT_DIR = "../output"
+
+# Exports to sort: source, partition key and clustering columns with CQL types
+EXPORTS = [
+    {
+        'name': "ds2_orderlines",
+        'csv': "../db/ds2/data_files/orders/*_orderlines.csv",
+        'ddl_table': "ORDERLINES",
+        'partition_key': [('ORDERID', 'int')],
+        'clustering': [('ORDERLINEID', 'int', 'ASC')]
+    },
+    {
+        'name': "chinook_invoice_items_by_invoice",
+        'query': """SELECT ii.InvoiceId, ii.InvoiceLineId, ii.TrackId, t.Name AS TrackName,
+                           t.AlbumId, t.GenreId, t.Composer, t.Milliseconds,
+                           ii.UnitPrice, ii.Quantity
+                    FROM invoice_items ii JOIN tracks t ON t.TrackId = ii.TrackId""",
+        'partition_key': [('InvoiceId', 'int')],
+        'clustering': [('InvoiceLineId', 'int', 'ASC')]
+    }
+]
+
+# ============================================================
+# SORT KEYS
+# ============================================================
+
+class _Descending:
+    """Inverts ordering for DESC clustering columns."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def sort_keys(rows: list, columns: list, partition_key: list, clustering: list) -> list:
+    """
+    Sort key per row: (token, clustering values...).
+
+    Nulls (None or '') sort first within their clustering column.
+
+    Args:
+        rows: List of row sequences
+        columns: Column names in row order
+        partition_key: [(column, cql type)]
+        clustering: [(column, cql type, 'ASC' | 'DESC')]
+
+    Returns:
+        List of key tuples aligned with rows
+    """
+    position = {c: i for i, c in enumerate(columns)}
+    key_index = [position[c] for c, _ in partition_key]
+    key_types = [t for _, t in partition_key]
+    tokens = murmur3_tokens([serialize_partition_key(tuple(row[i] for i in key_index), key_types)
+                             for row in rows]).tolist()
+
+    parts = [tokens]
+    for column, cql_type, order in clustering:
+        i = position[column]
+        values = []
+        for row in rows:
+            value = row[i]
+            value = (False, 0) if value is None or value == '' else (True, coerce_value(value, cql_type))
+            values.append(_Descending(value) if order.upper() == 'DESC' else value)
+        parts.append(values)
+    return list(zip(*parts))
+
+
+# ============================================================
+# RUN GENERATION
+# ============================================================
+
+def _write_run(path: str, records):
+    with open(path, 'wb') as f:
+        block = []
+        for record in records:
+            block.append(record)
+            if len(block) >= BLOCK_ROWS:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                block = []
+        if block:
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path: str):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def _sort_run(rows: list, columns: list, partition_key: list, clustering: list, path: str) -> tuple:
+    """Sort one run and spill it to path. Returns (path, rows)."""
+    keys = sort_keys(rows, columns, partition_key, clustering)
+    order = sorted(range(len(rows)), key=keys.__getitem__)
+    _write_run(path, ((keys[i], rows[i]) for i in order))
+    return path, len(rows)
+
+
+def estimate_row_bytes(rows: list) -> float:
+    """Approximate in-memory bytes per row (row, values, sort key and pickling copy)."""
+    sample = rows[:1000]
+    size = sum(sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row) for row in sample)
+    return 2 * size / max(len(sample), 1) + 200
+
+
+def _rechunk(chunks, first: list, run_rows: int):
+    """Re-cut an iterator of row lists into lists of run_rows rows."""
+    run = list(first)
+    for chunk in chunks:
+        run.extend(chunk)
+        while len(run) >= run_rows:
+            yield run[:run_rows]
+            run = run[run_rows:]
+    while len(run) > run_rows:
+        yield run[:run_rows]
+        run = run[run_rows:]
+    if run:
+        yield run
+
+
+# ============================================================
+# MERGE
+# ============================================================
+
+def _merge_runs(paths: list, target: str):
+    """Merge sorted runs into one run file."""
+    _write_run(target, heapq.merge(*(_read_run(p) for p in paths), key=lambda record: record[0]))
+    for path in paths:
+        os.remove(path)
+
+
+def sorted_records(chunks, columns: list, partition_key: list, clustering: list,
+                   memory_limit_mb: float = MEMORY_LIMIT_MB, max_workers: int = MAX_WORKERS,
+                   fan_in: int = MERGE_FAN_IN, spill_dir: str = SPILL_DIR, report: dict = None):
+    """
+    Stream rows in partition-token / clustering order with bounded memory.
+
+    Args:
+        chunks: Iterator of row lists
+        columns: Column names in row order
+        partition_key: [(column, cql type)]
+        clustering: [(column, cql type, 'ASC' | 'DESC')]
+        memory_limit_mb: Memory for runs in flight
+        max_workers: Worker processes (None = all CPUs)
+        fan_in: Maximum runs per merge pass
+        spill_dir: Directory for run files (None = system temp)
+        report: Optional dict filled with rows, runs, run_rows, workers,
+            merge_passes and run_seconds
+
+    Yields:
+        (sort key, row) in order
+    """
+    start = time.perf_counter()
+    report = report if report is not None else {}
+    chunks = iter(chunks)
+    first = next(chunks, [])
+    workers = max(1, max_workers or os.cpu_count() or 1)
+    # One run per worker in flight plus the run being assembled
+    run_rows = max(1000, int(memory_limit_mb * 1024 * 1024 / (workers + 1) / estimate_row_bytes(first)))
+
+    tmp = tempfile.mkdtemp(prefix="external_sort_", dir=spill_dir)
+    runs, rows = [], 0
+    try:
+        if workers == 1:
+            for i, run in enumerate(_rechunk(chunks, first, run_rows)):
+                path, n = _sort_run(run, columns, partition_key, clustering,
+                                    os.path.join(tmp, f"run_{i:06d}.bin"))
+                runs.append(path)
+                rows += n
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = set()
+                for i, run in enumerate(_rechunk(chunks, first, run_rows)):
+                    if len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            path, n = future.result()
+                            runs.append(path)
+                            rows += n
+                    pending.add(pool.submit(_sort_run, run, columns, partition_key, clustering,
+                                            os.path.join(tmp, f"run_{i:06d}.bin")))
+                    del run
+                for future in pending:
+                    path, n = future.result()
+                    runs.append(path)
+                    rows += n
+        runs.sort()
+        report.update(rows=rows, runs=len(runs), run_rows=run_rows, workers=workers,
+                      run_seconds=time.perf_counter() - start)
+
+        # Intermediate passes until one final merge fits the fan-in
+        passes = 0
+        while len(runs) > fan_in:
+            passes += 1
+            merged = []
+            for g in range(0, len(runs), fan_in):
+                target = os.path.join(tmp, f"pass{passes}_{g // fan_in:06d}.bin")
+                _merge_runs(runs[g:g + fan_in], target)
+                merged.append(target)
+            runs = merged
+        report['merge_passes'] = passes + 1
+
+        yield from heapq.merge(*(_read_run(p) for p in runs), key=lambda record: record[0])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def external_sort(chunks, columns: list, partition_key: list, clustering: list,
+                  output_path: str, memory_limit_mb: float = MEMORY_LIMIT_MB,
+                  max_workers: int = MAX_WORKERS, fan_in: int = MERGE_FAN_IN,
+                  spill_dir: str = SPILL_DIR) -> dict:
+    """
+    Sort rows into partition-token / clustering order and write them as CSV.
+
+    Args:
+        chunks: Iterator of row lists
+        columns: Column names in row order (written as the CSV header)
+        partition_key: [(column, cql type)]
+        clustering: [(column, cql type, 'ASC' | 'DESC')]
+        output_path: Sorted CSV output
+        memory_limit_mb: Memory for runs in flight
+        max_workers: Worker processes (None = all CPUs)
+        fan_in: Maximum runs per merge pass
+        spill_dir: Directory for run files (None = system temp)
+
+    Returns:
+        Report dict (rows, runs, run_rows, merge_passes, timings, rows_per_second)
+    """
+    start = time.perf_counter()
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    report = {}
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for _, row in sorted_records(chunks, columns, partition_key, clustering, memory_limit_mb,
+                                     max_workers, fan_in, spill_dir, report):
+            writer.writerow(row)
+
+    seconds = time.perf_counter() - start
+    report.update({
+        'merge_seconds': seconds - report['run_seconds'],
+        'seconds': seconds,
+        'rows_per_second': report['rows'] / seconds if seconds else 0.0,
+        'output_mb': os.path.getsize(output_path) / 1024 / 1024
+    })
+    return report
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def _query_chunks(db_path: str, query: str, chunk_rows: int = 50_000):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(query)
+        yield [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" External Partition-Order Sort")
+    print("=" * 70)
+
+    ddl = parse_mysql_ddl(DS2_DDL_PATH) if os.path.exists(DS2_DDL_PATH) else {}
+    for export in EXPORTS:
+        if 'csv' in export:
+            files = sorted(glob.glob(export['csv']))
+            if not files or export['ddl_table'] not in ddl:
+                print(f"⚠️ Skipping {export['name']}: source files not found")
+                continue
+            columns = [c for c, _ in ddl[export['ddl_table']]['columns']]
+            chunks = csv_chunks(files)
+        else:
+            if not os.path.exists(DB_PATH):
+                print(f"⚠️ Skipping {export['name']}: {DB_PATH} not found")
+                continue
+            chunks = _query_chunks(DB_PATH, export['query'])
+            columns = next(chunks)
+
+        output_path = os.path.join(OUTPUT_DIR, f"{export['name']}_sorted.csv")
+        print(f"\n🔄 Sorting {export['name']} by token({', '.join(c for c, _ in export['partition_key'])})"
+              f", {', '.join(c for c, _, _ in export['clustering'])}")
+        report = external_sort(chunks, columns, export['partition_key'], export['clustering'], output_path)
+        print(f"   {report['rows']:,} rows in {report['runs']} run(s) of ≤{report['run_rows']:,} rows "
+              f"on {report['workers']} worker(s), {report['merge_passes']} merge pass(es)")
+        print(f"   runs {report['run_seconds']:.2f}s, merge {report['merge_seconds']:.2f}s, "
+              f"{report['rows_per_second']:,.0f} rows/s, {report['output_mb']:.1f} MB")
+        print(f"✅ Saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
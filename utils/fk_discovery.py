@@ -0,0 +1,580 @@
+"""
+Implicit Foreign-Key Discovery (MinHash-LSH)
+============================================
+Finds column pairs child -> parent whose values are contained in each
+other although no FOREIGN KEY is declared:
+
+    1. One streamed scan per table (tables in parallel processes) builds,
+       for every key-like column, a MinHash signature of its distinct
+       values (multiply-shift hash family), a HyperLogLog distinct count
+       and a coordinated bottom-k value sample.
+    2. Containment candidates are found with LSH banding, without any
+       pairwise set intersection. Because containment (not Jaccard) is
+       what matters and set sizes differ wildly, columns are partitioned
+       by distinct-count size class and every pair of size classes uses
+       the band width r that still catches the smallest Jaccard a
+       containment above the threshold can produce (LSH Ensemble idea).
+    3. Surviving candidates are verified exactly: the child's sampled
+       values are looked up in the parent column with one IN query each,
+       concurrently over read-only connections.
+
+Candidates are ranked per child column by containment, then by how well
+the child column's name matches the parent table / column (embedding
+similarity, or character n-grams without the model; weak matches count as
+none), then by whether the parent is an entity rather than a small lookup
+table (lookup tables are referenced under their own name, so a role name
+like SupportRepId points elsewhere), then parent PK-ness, and only then
+by coverage (the tightest superset), so small integer lookup tables do
+not win on coverage alone. The best candidates are compared with the
+declared FKs.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python fk_discovery.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from column_statistics import hash64, HyperLogLog
+from type_inference import declared_affinity
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+OUTPUT_JSON_PATH = "../output/discovered_foreign_keys.json"
+
+# MinHash signature length
+NUM_PERM = 128
+
+# Band widths the LSH index is built for (rows per band)
+BAND_WIDTHS = (1, 2, 4, 8, 16)
+
+# Required probability that a pair at the containment threshold becomes a candidate
+LSH_RECALL = 0.95
+
+# Containment |child ∩ parent| / |child| to report a relationship
+CONTAINMENT_THRESHOLD = 0.9
+
+# Values sampled per column for exact verification
+VERIFY_SAMPLE = 256
+
+# A parent must be (nearly) unique: distinct / non-null rows
+PARENT_UNIQUENESS = 0.95
+
+# Key-like columns: affinities, minimum distinct values, maximum byte width
+KEY_AFFINITIES = ('INTEGER', 'TEXT', 'NUMERIC')
+MIN_DISTINCT = 3
+MAX_KEY_WIDTH = 64
+
+# LSH buckets larger than this are skipped (value-less constants, flags)
+MAX_BUCKET_SIZE = 500
+
+# Name similarity used to rank parents: 'embedding' (embedding_service.encode,
+# 'lexical' when the model is not installed) or 'lexical' (character n-grams)
+NAME_SIMILARITY = 'embedding'
+
+# Name similarities below this are treated as no name evidence
+MIN_NAME_SIMILARITY = {'embedding': 0.5, 'lexical': 0.3}
+
+# Parent tables with at most this many columns are lookup tables (id, name)
+LOOKUP_MAX_COLUMNS = 2
+
+# Rows fetched per chunk and worker processes / verification threads
+CHUNK_SIZE = 10_000
+MAX_WORKERS = None
+VERIFY_WORKERS = 8
+
+SEED = 42
+
+# ============================================================
+# HASHING
+# ============================================================
+
+def _hash_params(num_perm: int = NUM_PERM, seed: int = SEED) -> tuple:
+    """Multiply-shift hash family: h_i(x) = (a_i * x + b_i) >> 32, a_i odd."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_update(signature: np.ndarray, hashes: np.ndarray, a: np.ndarray, b: np.ndarray,
+                   batch: int = 4096):
+    """
+    Fold a batch of 64-bit value hashes into a MinHash signature (in place).
+
+    Args:
+        signature: uint32 array (num_perm,)
+        hashes: uint64 array of distinct value hashes
+        a, b: Hash family from _hash_params()
+        batch: Values per vectorized step (bounds memory to batch x num_perm)
+    """
+    for s in range(0, len(hashes), batch):
+        h = hashes[s:s + batch, None] * a[None, :] + b[None, :]     # wraps mod 2^64
+        np.minimum(signature, (h >> np.uint64(32)).astype(np.uint32).min(axis=0), out=signature)
+
+
+def _bottom_k(sample_hashes: np.ndarray, sample_values: list, hashes: np.ndarray,
+              values: list, k: int) -> tuple:
+    """Keep the k values with the smallest hashes (coordinated sample)."""
+    all_hashes = np.concatenate([sample_hashes, hashes])
+    all_values = sample_values + values
+    if len(all_hashes) <= k:
+        return all_hashes, all_values
+    keep = np.argpartition(all_hashes, k - 1)[:k]
+    return all_hashes[keep], [all_values[i] for i in keep]
+
+
+# ============================================================
+# STREAMED SCAN
+# ============================================================
+
+def scan_table(conn, table: str, num_perm: int = NUM_PERM,
+               sample_size: int = VERIFY_SAMPLE, chunk_size: int = CHUNK_SIZE) -> list:
+    """
+    Scan one table once and sketch each key-like column.
+
+    Args:
+        conn: Open SQLite connection
+        table: Table name
+        num_perm: MinHash signature length
+        sample_size: Bottom-k sample size
+        chunk_size: Rows per fetchmany()
+
+    Returns:
+        List of column sketches (dictionaries), key-like columns only
+    """
+    a, b = _hash_params(num_perm)
+    cursor = conn.cursor()
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    info = cursor.fetchall()
+    primary_key = [row[1] for row in info if row[5] > 0]
+    candidates = [i for i, row in enumerate(info) if declared_affinity(row[2]) in KEY_AFFINITIES]
+    if not candidates:
+        return []
+
+    cols = ', '.join(f'"{info[i][1]}"' for i in candidates)
+    cursor.execute(f'SELECT {cols} FROM "{table}"')
+    n = len(candidates)
+    signatures = [np.full(num_perm, np.iinfo(np.uint32).max, dtype=np.uint32) for _ in range(n)]
+    hlls = [HyperLogLog() for _ in range(n)]
+    samples = [(np.empty(0, dtype=np.uint64), []) for _ in range(n)]
+    non_null = [0] * n
+    eligible = [True] * n
+    rows = 0
+
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        rows += len(chunk)
+        for c, values in enumerate(zip(*chunk)):
+            if not eligible[c]:
+                continue
+            distinct = {v for v in values if v is not None}
+            non_null[c] += sum(v is not None for v in values)
+            if not distinct:
+                continue
+            if any(isinstance(v, (float, bytes)) or
+                   (isinstance(v, str) and len(v) > MAX_KEY_WIDTH) for v in distinct):
+                eligible[c] = False       # measures, blobs, free text: not key-like
+                continue
+            distinct = list(distinct)
+            hashes = hash64(distinct)
+            hlls[c].add_hashes(hashes)
+            minhash_update(signatures[c], hashes, a, b)
+            samples[c] = _bottom_k(samples[c][0], samples[c][1], hashes, distinct, sample_size)
+
+    sketches = []
+    for c, i in enumerate(candidates):
+        distinct = round(hlls[c].estimate())
+        if not eligible[c] or distinct < MIN_DISTINCT:
+            continue
+        sketches.append({
+            'table': table,
+            'column': info[i][1],
+            'rows': rows,
+            'non_null': non_null[c],
+            'distinct': distinct,
+            'is_primary_key': primary_key == [info[i][1]],
+            'table_columns': len(info),
+            'signature': signatures[c],
+            'sample': samples[c][1]
+        })
+    return sketches
+
+
+def _scan_tables(db_path: str, tables: list) -> list:
+    """Worker: scan a batch of tables over one read-only connection."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return [sketch for table in tables for sketch in scan_table(conn, table)]
+    finally:
+        conn.close()
+
+
+def scan_database(db_path: str, max_workers: int = MAX_WORKERS) -> list:
+    """
+    Sketch every key-like column of a database (tables scanned in parallel).
+
+    Args:
+        db_path: Path to the SQLite database
+        max_workers: Worker processes (None = one per CPU)
+
+    Returns:
+        List of column sketches
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    tables = [row[0] for row in cursor.fetchall()]
+    conn.close()
+
+    # Batches of tables per task: a connection parses the whole schema on
+    # open, which dominates on databases with thousands of small tables
+    workers = max_workers or os.cpu_count() or 1
+    batches = [tables[i::workers * 4] for i in range(min(len(tables), workers * 4))]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_scan_tables, [db_path] * len(batches), batches)
+        sketches = [sketch for batch in results for sketch in batch]
+    # Deterministic column order regardless of batching
+    position = {table: i for i, table in enumerate(tables)}
+    sketches.sort(key=lambda s: position[s['table']])
+    return sketches
+
+
+# ============================================================
+# LSH CANDIDATE SEARCH
+# ============================================================
+
+def _collision_probability(jaccard: float, r: int, num_perm: int) -> float:
+    return 1 - (1 - jaccard ** r) ** (num_perm // r)
+
+
+def band_width_table(max_class: int, threshold: float, num_perm: int = NUM_PERM,
+                     widths: tuple = BAND_WIDTHS, recall: float = LSH_RECALL) -> np.ndarray:
+    """
+    Band width per (child size class, parent size class).
+
+    A child of size c fully contained to fraction t in a parent of size
+    at most p has Jaccard >= t*c / (c + p - t*c). The widest band that
+    still collides with probability >= recall at that Jaccard is chosen.
+
+    Args:
+        max_class: Largest size class (floor(log2(distinct)))
+        threshold: Containment threshold
+        num_perm: MinHash signature length
+        widths: Candidate band widths
+        recall: Required collision probability
+
+    Returns:
+        Int array (max_class + 1, max_class + 1), 0 = pair not searched
+    """
+    table = np.zeros((max_class + 1, max_class + 1), dtype=np.int64)
+    for child in range(max_class + 1):
+        for parent in range(max_class + 1):
+            c, p = 2.0 ** child, 2.0 ** (parent + 1)
+            if c > p:
+                continue                  # parent smaller than child: no containment
+            j = threshold * c / (c + p - threshold * c)
+            usable = [r for r in widths if _collision_probability(j, r, num_perm) >= recall]
+            table[child, parent] = max(usable) if usable else min(widths)
+    return table
+
+
+def lsh_candidates(sketches: list, threshold: float = CONTAINMENT_THRESHOLD,
+                   num_perm: int = NUM_PERM) -> np.ndarray:
+    """
+    Directed containment candidates (child, parent) via banded MinHash.
+
+    Args:
+        sketches: Output of scan_database()
+        threshold: Containment threshold (a looser value is used for search)
+        num_perm: MinHash signature length
+
+    Returns:
+        Int array (m, 2) of (child index, parent index)
+    """
+    n = len(sketches)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    signatures = np.stack([s['signature'] for s in sketches]).astype(np.uint64)
+    distinct = np.array([s['distinct'] for s in sketches], dtype=np.float64)
+    size_class = np.floor(np.log2(distinct)).astype(np.int64)
+    widths = band_width_table(int(size_class.max()), threshold, num_perm)
+
+    # Only (nearly) unique columns can be referenced
+    unique = np.array([s['is_primary_key'] or s['distinct'] >= PARENT_UNIQUENESS * s['non_null']
+                       for s in sketches])
+    mixer = np.random.default_rng(SEED).integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+
+    found = []
+    for r in sorted({int(w) for w in np.unique(widths) if w}):
+        for band in range(num_perm // r):
+            cols = slice(band * r, (band + 1) * r)
+            keys = (signatures[:, cols] * mixer[None, cols]).sum(axis=1)    # wraps mod 2^64
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            sizes = np.diff(np.r_[starts, n])
+            for start, size in zip(starts[(sizes > 1) & (sizes <= MAX_BUCKET_SIZE)],
+                                   sizes[(sizes > 1) & (sizes <= MAX_BUCKET_SIZE)]):
+                members = order[start:start + size]
+                i, j = np.meshgrid(members, members, indexing='ij')
+                i, j = i.ravel(), j.ravel()
+                keep = (i != j) & unique[j] & (widths[size_class[i], size_class[j]] == r)
+                found.append(i[keep] * n + j[keep])
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    keys = np.unique(np.concatenate(found))
+    return np.column_stack([keys // n, keys % n])
+
+
+def estimate_containment(sketches: list, pairs: np.ndarray) -> np.ndarray:
+    """
+    MinHash containment estimate |A ∩ B| / |A| for (child A, parent B) pairs,
+    from the Jaccard estimate J: C = J (|A| + |B|) / ((1 + J) |A|).
+    """
+    if len(pairs) == 0:
+        return np.empty(0)
+    signatures = np.stack([s['signature'] for s in sketches])
+    distinct = np.array([s['distinct'] for s in sketches], dtype=np.float64)
+    jaccard = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    a, b = distinct[pairs[:, 0]], distinct[pairs[:, 1]]
+    return np.minimum(1.0, jaccard * (a + b) / ((1 + jaccard) * a))
+
+
+# ============================================================
+# VERIFICATION
+# ============================================================
+
+def verify_candidates(db_path: str, sketches: list, pairs: np.ndarray,
+                      max_workers: int = VERIFY_WORKERS) -> list:
+    """
+    Exact containment of each child's value sample in the parent column.
+
+    Args:
+        db_path: Path to the SQLite database
+        sketches: Column sketches
+        pairs: (child, parent) index pairs
+        max_workers: Concurrent read-only connections
+
+    Returns:
+        List of sample containment fractions (aligned with pairs)
+    """
+    local = threading.local()
+    connections = []
+    lock = threading.Lock()
+
+    def check(pair):
+        child, parent = sketches[pair[0]], sketches[pair[1]]
+        sample = child['sample']
+        if not sample:
+            return 0.0
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            # Closed from the main thread once the pool has shut down
+            conn = local.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                                                check_same_thread=False)
+            with lock:
+                connections.append(conn)
+        placeholders = ', '.join('?' * len(sample))
+        found = conn.execute(
+            f'SELECT COUNT(DISTINCT "{parent["column"]}") FROM "{parent["table"]}" '
+            f'WHERE "{parent["column"]}" IN ({placeholders})', sample).fetchone()[0]
+        return found / len(sample)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(check, pairs.tolist()))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def _name_words(name: str) -> list:
+    """Identifier words without the generic 'id' / 'key' suffix words."""
+    from lexical_blocking import split_identifier
+    return [w for w in split_identifier(name).split() if w not in ('id', 'key')]
+
+
+def _trigrams(words: list) -> set:
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def name_similarities(pairs: list, method: str = NAME_SIMILARITY) -> list:
+    """
+    Similarity of child column names to their candidate parents.
+
+    Args:
+        pairs: List of ("table.column" child, "table.column" parent)
+        method: 'embedding' or 'lexical'
+
+    Returns:
+        List of floats aligned with pairs (0.0 below MIN_NAME_SIMILARITY)
+    """
+    children = [child.partition('.')[2] for child, _ in pairs]
+    parents = [' '.join(parent.split('.')) for _, parent in pairs]
+    if method == 'embedding' and pairs:
+        # ImportError (no sentence-transformers): fall through to 'lexical'
+        try:
+            from embedding_service import encode
+            names = list(dict.fromkeys(children + parents))
+            vectors = encode([' '.join(_name_words(n)) or n for n in names])
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            index = {n: i for i, n in enumerate(names)}
+            scores = [float(vectors[index[c]] @ vectors[index[p]]) for c, p in zip(children, parents)]
+            return [x if x >= MIN_NAME_SIMILARITY['embedding'] else 0.0 for x in scores]
+        except ImportError:
+            pass
+    scores = []
+    for child, parent in zip(children, parents):
+        a, b = _trigrams(_name_words(child)), _trigrams(_name_words(parent))
+        score = 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+        scores.append(score if score >= MIN_NAME_SIMILARITY['lexical'] else 0.0)
+    return scores
+
+
+def discover_foreign_keys(db_path: str, threshold: float = CONTAINMENT_THRESHOLD) -> dict:
+    """
+    Run the full discovery pipeline.
+
+    Args:
+        db_path: Path to the SQLite database
+        threshold: Containment threshold
+
+    Returns:
+        Dictionary with 'relationships' (verified, ranked per child),
+        'columns' (sketched), 'candidates', 'timings'
+    """
+    timings = {}
+    start = time.perf_counter()
+    sketches = scan_database(db_path)
+    timings['scan'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = lsh_candidates(sketches, threshold)
+    # Surrogate single-column PKs are not treated as referencing columns
+    # (shared-PK 1:1 tables are out of scope), and a child may not be larger
+    # than its parent
+    if len(pairs):
+        keep = np.array([not sketches[c]['is_primary_key'] and
+                         sketches[c]['distinct'] <= 1.05 * sketches[p]['distinct']
+                         for c, p in pairs], dtype=bool)
+        pairs = pairs[keep]
+    estimates = estimate_containment(sketches, pairs)
+    lsh_pairs = len(pairs)
+    pairs, estimates = pairs[estimates >= threshold - 0.1], estimates[estimates >= threshold - 0.1]
+    timings['lsh'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verified = verify_candidates(db_path, sketches, pairs)
+    timings['verify'] = time.perf_counter() - start
+
+    relationships = []
+    for (c, p), estimate, containment in zip(pairs.tolist(), estimates, verified):
+        if containment < threshold:
+            continue
+        child, parent = sketches[c], sketches[p]
+        relationships.append({
+            'child': f"{child['table']}.{child['column']}",
+            'parent': f"{parent['table']}.{parent['column']}",
+            'containment': containment,
+            'estimated_containment': float(estimate),
+            'parent_is_primary_key': parent['is_primary_key'],
+            'parent_is_lookup': parent['table_columns'] <= LOOKUP_MAX_COLUMNS,
+            # Share of the parent actually referenced (last tie-break)
+            'coverage': min(1.0, child['distinct'] / parent['distinct'])
+        })
+    start = time.perf_counter()
+    scores = name_similarities([(r['child'], r['parent']) for r in relationships])
+    for rel, score in zip(relationships, scores):
+        rel['name_similarity'] = score
+    timings['rank'] = time.perf_counter() - start
+    relationships.sort(key=lambda r: (r['child'], -r['containment'], -round(r['name_similarity'], 3),
+                                      r['parent_is_lookup'], not r['parent_is_primary_key'],
+                                      -r['coverage']))
+    best = set()
+    for rel in relationships:
+        rel['best'] = rel['child'] not in best
+        best.add(rel['child'])
+
+    n = len(sketches)
+    return {
+        'relationships': relationships,
+        'columns': n,
+        'candidates': {'all_pairs': n * (n - 1), 'lsh': lsh_pairs, 'verified': len(pairs)},
+        'timings': timings
+    }
+
+
+def declared_foreign_keys(db_path: str) -> set:
+    """Declared single-column FKs as ("child.col", "parent.col") tuples."""
+    from er_graph import load_er_graph
+    graph = load_er_graph(db_path)
+    return {(f"{graph.tables[e['child']]}.{e['child_columns'][0]}",
+             f"{graph.tables[e['parent']]}.{e['parent_columns'][0]}")
+            for e in graph.edges if len(e['child_columns']) == 1}
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Implicit Foreign-Key Discovery (MinHash-LSH)")
+    print("=" * 70)
+
+    result = discover_foreign_keys(DB_PATH)
+    t = result['timings']
+    c = result['candidates']
+    print(f"✅ Sketched {result['columns']} key-like columns in {t['scan']:.2f}s")
+    print(f"✅ LSH: {c['all_pairs']:,} directed pairs -> {c['lsh']:,} candidates "
+          f"-> {c['verified']:,} above estimate ({t['lsh']:.3f}s)")
+    print(f"✅ Verified on samples in {t['verify']:.3f}s")
+
+    declared = declared_foreign_keys(DB_PATH)
+    best = [r for r in result['relationships'] if r['best']]
+    for rel in result['relationships']:
+        rel['declared'] = (rel['child'], rel['parent']) in declared
+
+    print(f"\n{'Child':<32} {'Parent':<28} {'Contain':>8} {'Name':>6} {'Cover':>6}  Status")
+    print("-" * 97)
+    for rel in best:
+        status = "declared" if rel['declared'] else "⚠️  implicit"
+        print(f"{rel['child']:<32} {rel['parent']:<28} {rel['containment']:>8.2f} "
+              f"{rel['name_similarity']:>6.2f} {rel['coverage']:>6.2f}  {status}")
+
+    hits = sum(r['declared'] for r in best)
+    precision = hits / len(best) if best else 0.0
+    recall = hits / len(declared) if declared else 0.0
+    print(f"\n Best-per-column vs declared FKs: precision {precision:.2f}, recall {recall:.2f} "
+          f"({hits}/{len(declared)} declared found)")
+
+    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n✅ Discovered relationships saved to: {OUTPUT_JSON_PATH}")
+
+
+if __name__ == "__main__":
+    main()
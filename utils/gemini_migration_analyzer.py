@@ -20,11 +20,17 @@ import os
 import json
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
 from sklearn.cluster import KMeans
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 from collections import defaultdict
+from embedding_service import encode
+from projection import project, fit_key, Projection
+from prompt_builder import (compact_schema, summary_schema, detail_prompt, structured_prompt,
+                            suggest_tables_chunked, parse_streamed_tables, parse_streamed_strategy,
+                            merge_suggestions, token_report, PROMPT_CHUNK_TOKENS)
+from results_store import ResultsStore, RESULTS_DB_PATH
+from schema_model import SchemaModel
+from type_inference import infer_column_types, estimate_table_savings, print_savings_report
 
 # ============================================================
 # CONFIGURATION - Modify these variables as needed
@@ -45,6 +51,37 @@ OUTPUT_IMAGE_PATH = "../output/cassandra_migration_visualization.png"
 # Number of clusters (set to None for auto-detection based on tables)
 N_CLUSTERS = None
 
+# Cluster with a parallel ensemble of seeded / subsampled KMeans runs instead
+# of one seed, and report a stability score per cluster (consensus_clustering.py)
+CONSENSUS_CLUSTERING = False
+
+# Source database, used to infer compact CQL column types
+# (set INFER_COLUMN_TYPES = False to declare every column as text)
+DB_PATH = "../db/chinook.db"
+INFER_COLUMN_TYPES = True
+
+# Embed "table.column: value | value ..." fingerprints built from a capped
+# sample of distinct values in DB_PATH instead of the bare column names
+# (see value_fingerprints.py)
+VALUE_FINGERPRINTS = False
+
+# Gemini request mode:
+#   'structured' - one streamed request with a declared response schema for
+#                  tables + strategy (falls back to 'chunked' when the schema
+#                  does not fit one prompt chunk)
+#   'chunked'    - table JSON per schema chunk, then a separate strategy call
+GEMINI_MODE = 'structured'
+
+# Schema chunks (FK-connected, compact encoding) are sent concurrently;
+# see prompt_builder.py
+MAX_CONCURRENT_REQUESTS = 4
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Record every run (columns, embeddings, designs, CQL) in the results
+# database (results_store.py); the files in ../output/ are still written
+RECORD_RESULTS = True
+
 # ============================================================
 # HELPER FUNCTIONS
 # ============================================================
@@ -108,7 +145,7 @@ Provide practical, detailed migration suggestions.
         try:
             # Generate response using new API
             response = client.models.generate_content(
-                model="gemini-2.5-flash",
+                model=GEMINI_MODEL,
                 contents=full_prompt
             )
             return response.text
@@ -132,6 +169,132 @@ Provide practical, detailed migration suggestions.
     return None
 
 
+def call_gemini_structured(prompt: str, api_key: str, on_tables=None, max_retries: int = 5) -> dict:
+    """
+    One streamed Gemini request with a declared JSON response schema.
+
+    The response is {"tables": [{"name", "columns"}], "strategy": str},
+    with "tables" generated first; on_tables(tables) is called as soon as
+    that array is complete in the stream, before the strategy finishes.
+
+    Args:
+        prompt: The prompt to send (see prompt_builder.structured_prompt())
+        api_key: Google Gemini API key
+        on_tables: Optional callback receiving {table_name: [columns]}
+        max_retries: Maximum number of retries on rate limit
+
+    Returns:
+        Parsed response dictionary, or None on failure. A response that
+        breaks off or is not valid JSON is returned as far as it can be
+        recovered: the tables (if complete), the partial strategy (or the
+        raw text), and 'partial': True
+    """
+    import time
+
+    try:
+        from google import genai
+        from google.genai import types
+        from google.genai.errors import ClientError
+    except ImportError:
+        print("⚠️ Google GenAI library not installed.")
+        print("   Install with: pip install google-genai")
+        return None
+
+    client = genai.Client(api_key=api_key)
+    table_schema = types.Schema(
+        type='OBJECT',
+        properties={
+            'name': types.Schema(type='STRING'),
+            'columns': types.Schema(type='ARRAY', items=types.Schema(type='STRING'))
+        },
+        required=['name', 'columns'],
+        property_ordering=['name', 'columns']
+    )
+    config = types.GenerateContentConfig(
+        system_instruction="You are an expert database architect specializing in migrating "
+                           "relational databases to NoSQL column-oriented databases like Cassandra. "
+                           "Provide practical, detailed migration suggestions.",
+        response_mime_type='application/json',
+        response_schema=types.Schema(
+            type='OBJECT',
+            properties={
+                'tables': types.Schema(type='ARRAY', items=table_schema),
+                'strategy': types.Schema(type='STRING')
+            },
+            required=['tables', 'strategy'],
+            property_ordering=['tables', 'strategy']
+        )
+    )
+
+    for attempt in range(max_retries):
+        text, tables_seen = "", False
+        try:
+            for chunk in client.models.generate_content_stream(model=GEMINI_MODEL, contents=prompt,
+                                                               config=config):
+                text += chunk.text or ""
+                if not tables_seen:
+                    tables = parse_streamed_tables(text)
+                    if tables is not None:
+                        tables_seen = True
+                        if on_tables:
+                            on_tables(merge_suggestions([{t['name']: t['columns']} for t in tables]))
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                print("⚠️ Structured response is not valid JSON; keeping what was received")
+                return _partial_structured(text)
+
+        except ClientError as e:
+            error_str = str(e)
+            if "RESOURCE_EXHAUSTED" in error_str or "429" in error_str:
+                wait_time = (attempt + 1) * 10
+                print(f"⚠️ Rate limit hit. Waiting {wait_time} seconds... (attempt {attempt + 1}/{max_retries})")
+                time.sleep(wait_time)
+            else:
+                print(f"⚠️ Gemini API Error: {e}")
+                return None
+        except Exception as e:
+            print(f"⚠️ Unexpected Error: {e}")
+            if text:
+                print("⚠️ Stream interrupted; keeping what was received")
+                return _partial_structured(text)
+            return None
+
+    print("❌ Max retries exceeded. Please wait a minute and try again.")
+    return None
+
+
+def _partial_structured(text: str) -> dict:
+    """Tables and strategy recovered from an incomplete structured response."""
+    return {
+        'tables': parse_streamed_tables(text) or [],
+        'strategy': parse_streamed_strategy(text) or text,
+        'partial': True
+    }
+
+
+def save_suggested_tables(suggested_tables: dict, path: str = "../output/gemini_suggested_tables.json"):
+    """
+    Save and print Gemini's suggested Cassandra tables.
+
+    Args:
+        suggested_tables: Dictionary table name -> list of columns
+        path: Output JSON path
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(suggested_tables, f, indent=2)
+    print(f"✅ Suggested tables saved to: {path}")
+
+    print("\n" + "=" * 50)
+    print(" Gemini Suggested Cassandra Tables:")
+    print("=" * 50)
+    for table_name, table_columns in suggested_tables.items():
+        print(f"\n📦 {table_name}:")
+        for col in table_columns:
+            print(f"   - {col}")
+    print("=" * 50)
+
+
 # [DEPRECATED] ChatGPT API function - Commented out, using Gemini instead
 # def call_chatgpt_api(prompt: str, api_key: str) -> str:
 #     """
@@ -155,19 +318,26 @@ Provide practical, detailed migration suggestions.
 #         return None
 
 
-def generate_embeddings(columns: list) -> np.ndarray:
+def generate_embeddings(columns: list, db_path: str = DB_PATH) -> np.ndarray:
     """
-    Generate semantic embeddings for column names.
+    Generate semantic embeddings for column names (or value-sampled
+    fingerprints when VALUE_FINGERPRINTS is set).
     
     Args:
         columns: List of table.column strings
+        db_path: Database the columns (and fingerprint values) come from
         
     Returns:
         NumPy array of embeddings
     """
+    texts = columns
+    if VALUE_FINGERPRINTS and os.path.exists(db_path):
+        from value_fingerprints import fingerprint_texts
+        texts = fingerprint_texts(db_path, columns)
+        print(f"✅ Sampled values for {sum(t != c for t, c in zip(texts, columns))} of {len(columns)} columns")
+
     print("🔄 Generating embeddings...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(columns, show_progress_bar=True)
+    embeddings = encode(texts, show_progress_bar=True)
     print(f"✅ Generated embeddings with shape: {embeddings.shape}")
     return embeddings
 
@@ -183,6 +353,17 @@ def cluster_columns(embeddings: np.ndarray, n_clusters: int) -> np.ndarray:
     Returns:
         Array of cluster labels
     """
+    if CONSENSUS_CLUSTERING:
+        from consensus_clustering import consensus_clusters, CONSENSUS_RUNS, STABILITY_WARNING
+
+        print(f"🔄 Consensus clustering into {n_clusters} groups ({CONSENSUS_RUNS} runs)...")
+        labels, stability = consensus_clusters(embeddings, n_clusters)
+        unstable = {k: s for k, s in stability.items() if s < STABILITY_WARNING}
+        print(f"✅ Clustering complete (mean stability {np.mean(list(stability.values())):.2f})")
+        for label, score in sorted(unstable.items(), key=lambda kv: kv[1]):
+            print(f"⚠️ Cluster {label} is unstable (stability {score:.2f})")
+        return labels
+
     print(f"🔄 Clustering into {n_clusters} groups...")
     kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
     labels = kmeans.fit_predict(embeddings)
@@ -190,19 +371,19 @@ def cluster_columns(embeddings: np.ndarray, n_clusters: int) -> np.ndarray:
     return labels
 
 
-def reduce_dimensions(embeddings: np.ndarray) -> tuple:
+def reduce_dimensions(embeddings: np.ndarray, key: str = None) -> tuple:
     """
-    Reduce embeddings to 2D using PCA for visualization.
+    Reduce embeddings to 2D with the shared cached PCA projection (projection.py).
     
     Args:
         embeddings: NumPy array of embeddings
+        key: projection.fit_key() of the source database
         
     Returns:
-        Tuple of (2D embeddings, PCA object)
+        Tuple of (2D embeddings, Projection object)
     """
     print("🔄 Reducing dimensions with PCA...")
-    pca = PCA(n_components=2)
-    embeddings_2d = pca.fit_transform(embeddings)
+    embeddings_2d, pca = project(embeddings, key=key)
     variance_explained = sum(pca.explained_variance_ratio_) * 100
     print(f"✅ PCA complete - {variance_explained:.1f}% variance explained")
     return embeddings_2d, pca
@@ -212,7 +393,7 @@ def create_visualization(
     embeddings_2d: np.ndarray,
     labels: np.ndarray,
     columns: list,
-    pca: PCA,
+    pca: Projection,
     output_path: str,
     cassandra_suggestion: str = None
 ):
@@ -223,7 +404,7 @@ def create_visualization(
         embeddings_2d: 2D reduced embeddings
         labels: Cluster labels
         columns: Original column names
-        pca: PCA object for variance info
+        pca: Projection object for variance info
         output_path: Path to save the PNG
         cassandra_suggestion: Optional ChatGPT suggestion text
     """
@@ -289,46 +470,72 @@ def create_visualization(
     plt.show()
 
 
-def generate_cassandra_schema(clusters: dict, chatgpt_suggestion: str = None) -> str:
+def cql_schema_header() -> list:
+    """Keyspace preamble of the generated CQL schema (list of lines)."""
+    return [
+        "-- Cassandra Schema Migration Suggestion",
+        "-- Generated based on semantic clustering analysis",
+        "",
+        "CREATE KEYSPACE IF NOT EXISTS migrated_db",
+        "WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 3};",
+        "",
+        "USE migrated_db;",
+        ""
+    ]
+
+
+def cql_table_block(cluster_id, columns: list, column_types: dict = None) -> list:
+    """
+    CREATE TABLE statement for one cluster (list of lines).
+
+    Args:
+        cluster_id: Cluster label
+        columns: List of table.column strings in the cluster
+        column_types: Optional output of infer_column_types(); columns
+            missing from it (or all columns, when None) are declared text
+
+    Returns:
+        List of CQL lines, ending with a blank line
+    """
+    # Extract table names from columns
+    tables_in_cluster = set([col.split('.')[0] for col in columns])
+    table_name = '_'.join(sorted(tables_in_cluster)) + "_data"
+
+    block = []
+    block.append(f"-- Cluster {cluster_id}: Combines {', '.join(tables_in_cluster)}")
+    block.append(f"CREATE TABLE IF NOT EXISTS {table_name} (")
+
+    # Add columns
+    for col in columns:
+        col_name = col.replace('.', '_')
+        col_type = column_types[col]['cql_type'] if column_types and col in column_types else 'text'
+        block.append(f"    {col_name} {col_type},")
+
+    # Add primary key (first column as partition key)
+    first_col = columns[0].replace('.', '_')
+    block.append(f"    PRIMARY KEY ({first_col})")
+    block.append(");")
+    block.append("")
+    return block
+
+
+def generate_cassandra_schema(clusters: dict, chatgpt_suggestion: str = None,
+                              column_types: dict = None) -> str:
     """
     Generate Cassandra CQL schema based on clusters.
     
     Args:
         clusters: Dictionary of cluster_id -> list of columns
         chatgpt_suggestion: Optional ChatGPT suggestion
+        column_types: Optional output of infer_column_types(); columns
+            missing from it (or all columns, when None) are declared text
         
     Returns:
         CQL schema string
     """
-    cql_schema = []
-    cql_schema.append("-- Cassandra Schema Migration Suggestion")
-    cql_schema.append("-- Generated based on semantic clustering analysis")
-    cql_schema.append("")
-    cql_schema.append("CREATE KEYSPACE IF NOT EXISTS migrated_db")
-    cql_schema.append("WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 3};")
-    cql_schema.append("")
-    cql_schema.append("USE migrated_db;")
-    cql_schema.append("")
-    
+    cql_schema = cql_schema_header()
     for cluster_id, columns in sorted(clusters.items()):
-        # Extract table names from columns
-        tables_in_cluster = set([col.split('.')[0] for col in columns])
-        table_name = '_'.join(sorted(tables_in_cluster)) + "_data"
-        
-        cql_schema.append(f"-- Cluster {cluster_id}: Combines {', '.join(tables_in_cluster)}")
-        cql_schema.append(f"CREATE TABLE IF NOT EXISTS {table_name} (")
-        
-        # Add columns
-        for i, col in enumerate(columns):
-            col_name = col.replace('.', '_')
-            cql_schema.append(f"    {col_name} text,")
-        
-        # Add primary key (first column as partition key)
-        first_col = columns[0].replace('.', '_')
-        cql_schema.append(f"    PRIMARY KEY ({first_col})")
-        cql_schema.append(");")
-        cql_schema.append("")
-    
+        cql_schema.extend(cql_table_block(cluster_id, columns, column_types))
     return '\n'.join(cql_schema)
 
 
@@ -352,86 +559,50 @@ def main():
     print("\n[2/6] Consulting Google Gemini for migration strategy...")
     
     gemini_response = None
+    suggested_tables = None
     if GEMINI_API_KEY and GEMINI_API_KEY != "your-gemini-api-key-here":
-        # First prompt: Get structured JSON suggestion
-        json_prompt = f"""
-        I have a relational database with the following tables and columns:
-        
-        {json.dumps(columns, indent=2)}
-        
-        Analyze this schema and suggest how to migrate to Cassandra (column-oriented database).
-        
-        IMPORTANT: Return ONLY a valid JSON object with suggested Cassandra table names as keys,
-        and arrays of column names as values. Format:
-        
-        {{
-            "cassandra_table_name_1": ["column1", "column2", "column3"],
-            "cassandra_table_name_2": ["column4", "column5"]
-        }}
-        
-        Group columns that are frequently queried together.
-        Consider denormalization for query optimization.
-        Return ONLY the JSON, no other text.
-        """
-        
-        print("   Requesting structured table suggestions...")
-        json_response = call_gemini_api(json_prompt, GEMINI_API_KEY)
-        
-        # Try to parse the JSON response
-        suggested_tables = None
-        if json_response:
-            try:
-                # Clean the response - remove markdown code blocks if present
-                clean_response = json_response.strip()
-                if clean_response.startswith("```"):
-                    clean_response = clean_response.split("```")[1]
-                    if clean_response.startswith("json"):
-                        clean_response = clean_response[4:]
-                clean_response = clean_response.strip()
-                
-                suggested_tables = json.loads(clean_response)
-                
-                # Save the suggested tables as JSON
-                suggested_tables_path = "../output/gemini_suggested_tables.json"
-                with open(suggested_tables_path, 'w', encoding='utf-8') as f:
-                    json.dump(suggested_tables, f, indent=2)
-                print(f"✅ Suggested tables saved to: {suggested_tables_path}")
-                
-                # Print the suggested structure
-                print("\n" + "=" * 50)
-                print(" Gemini Suggested Cassandra Tables:")
-                print("=" * 50)
-                for table_name, table_columns in suggested_tables.items():
-                    print(f"\n📦 {table_name}:")
-                    for col in table_columns:
-                        print(f"   - {col}")
-                print("=" * 50)
-                
-            except json.JSONDecodeError as e:
-                print(f"⚠️ Could not parse JSON response: {e}")
-                print("   Raw response saved to text file")
-        
-        # Wait between API calls to avoid rate limiting
         import time
-        print("\n   ⏳ Waiting 10 seconds to avoid rate limits...")
-        time.sleep(10)
-        
-        # Second prompt: Get detailed explanation
-        detail_prompt = f"""
-        I have a relational database with the following tables and columns:
-        
-        {json.dumps(columns, indent=2)}
-        
-        Please provide detailed migration suggestions:
-        1. How to best migrate this to Cassandra (column-oriented database)
-        2. Suggested partition keys and clustering columns
-        3. Any denormalization strategies needed
-        4. Query patterns this structure would optimize for
-        5. Specific CQL (Cassandra Query Language) examples
-        """
-        
-        print("\n   Requesting detailed migration strategy...")
-        gemini_response = call_gemini_api(detail_prompt, GEMINI_API_KEY)
+        from er_graph import load_er_graph
+
+        request_start = time.perf_counter()
+        graph = load_er_graph(DB_PATH) if os.path.exists(DB_PATH) else None
+        tokens = token_report(columns, graph)
+        print(f"   Prompt size: ~{tokens['compact_tokens']:,} tokens "
+              f"(previously ~{tokens['legacy_tokens']:,}), {tokens['chunks']} schema chunk(s)")
+
+        if GEMINI_MODE == 'structured' and tokens['chunks'] == 1:
+            # One request: tables + strategy, tables saved as soon as they stream in
+            print("   Requesting tables and migration strategy (one structured request)...")
+            result = call_gemini_structured(structured_prompt(compact_schema(columns, graph)),
+                                            GEMINI_API_KEY, on_tables=save_suggested_tables)
+            if result:
+                if result.get('partial'):
+                    print("⚠️ Incomplete response: saving the tables and strategy received so far")
+                gemini_response = result.get('strategy')
+                suggested_tables = merge_suggestions([{t['name']: t['columns']}
+                                                      for t in result.get('tables', [])]) or None
+        else:
+            # First prompt(s): structured JSON suggestion per FK-connected chunk
+            print("   Requesting structured table suggestions...")
+            suggested_tables, chunk_report = suggest_tables_chunked(
+                columns, lambda prompt: call_gemini_api(prompt, GEMINI_API_KEY), graph,
+                PROMPT_CHUNK_TOKENS, MAX_CONCURRENT_REQUESTS)
+            print(f"   {chunk_report['chunks']} chunk(s) answered in {chunk_report['seconds']:.1f}s")
+            if chunk_report['failed_chunks']:
+                print(f"⚠️ Could not parse JSON response for {chunk_report['failed_chunks']} chunk(s)")
+            if suggested_tables:
+                save_suggested_tables(suggested_tables)
+
+            # Wait between API calls to avoid rate limiting
+            print("\n   ⏳ Waiting 10 seconds to avoid rate limits...")
+            time.sleep(10)
+
+            # Second prompt: Get detailed explanation
+            print("\n   Requesting detailed migration strategy...")
+            # Full schema only if it fits one chunk, else a key/FK summary
+            gemini_response = call_gemini_api(
+                detail_prompt(summary_schema(columns, graph, PROMPT_CHUNK_TOKENS)), GEMINI_API_KEY)
+        print(f"   Gemini step finished in {time.perf_counter() - request_start:.1f}s")
         
         if gemini_response:
             print("\n" + "=" * 50)
@@ -452,13 +623,13 @@ def main():
     
     # Step 3: Generate embeddings
     print("\n[3/6] Generating semantic embeddings...")
-    embeddings = generate_embeddings(columns)
+    embeddings = generate_embeddings(columns, DB_PATH)
+    schema = SchemaModel(columns)
     
     # Step 4: Determine number of clusters
     if N_CLUSTERS is None:
         # Auto-detect based on unique tables
-        unique_tables = set([col.split('.')[0] for col in columns])
-        n_clusters = len(unique_tables)
+        n_clusters = schema.n_tables
         print(f"   Auto-detected {n_clusters} tables → using {n_clusters} clusters")
     else:
         n_clusters = N_CLUSTERS
@@ -469,8 +640,10 @@ def main():
     
     # Group columns by cluster
     clusters = defaultdict(list)
+    cluster_ids = defaultdict(list)
     for i, label in enumerate(labels):
         clusters[label].append(columns[i])
+        cluster_ids[label].append(i)
     
     # Print cluster results
     print("\n" + "=" * 50)
@@ -481,8 +654,8 @@ def main():
     embedding_suggested_tables = {}
     
     for cluster_id, cols in sorted(clusters.items()):
-        tables = set([c.split('.')[0] for c in cols])
-        table_name = '_'.join(sorted(tables)) + "_data"
+        tables = schema.table_names(cluster_ids[cluster_id])
+        table_name = '_'.join(tables) + "_data"
         embedding_suggested_tables[table_name] = cols
         
         print(f"\n📦 {table_name} (from: {', '.join(tables)}):")
@@ -497,7 +670,7 @@ def main():
     
     # Step 6: Reduce to 2D and visualize
     print("\n[5/6] Reducing dimensions for visualization...")
-    embeddings_2d, pca = reduce_dimensions(embeddings)
+    embeddings_2d, pca = reduce_dimensions(embeddings, fit_key(DB_PATH))
     
     print("\n[6/6] Creating visualization...")
     create_visualization(
@@ -509,11 +682,18 @@ def main():
         gemini_response
     )
     
+    # Infer compact column types from the source database
+    column_types = None
+    if INFER_COLUMN_TYPES and os.path.exists(DB_PATH):
+        print("\n🔄 Inferring CQL column types from source metadata and sampled data...")
+        column_types = infer_column_types(DB_PATH)
+        print_savings_report(estimate_table_savings(embedding_suggested_tables, column_types))
+
     # Generate and save CQL schema
     print("\n" + "=" * 50)
     print(" Generated Cassandra CQL Schema:")
     print("=" * 50)
-    cql_schema = generate_cassandra_schema(clusters, gemini_response)
+    cql_schema = generate_cassandra_schema(clusters, gemini_response, column_types)
     print(cql_schema)
     
     # Save CQL schema
@@ -521,6 +701,21 @@ def main():
     with open(cql_path, 'w', encoding='utf-8') as f:
         f.write(cql_schema)
     print(f"\n✅ CQL schema saved to: {cql_path}")
+
+    if RECORD_RESULTS:
+        with ResultsStore() as store:
+            run_id = store.start_run(os.path.basename(DB_PATH), "gemini_migration_analyzer",
+                                     model=GEMINI_MODEL,
+                                     parameters={'n_clusters': n_clusters, 'gemini_mode': GEMINI_MODE,
+                                                 'consensus_clustering': CONSENSUS_CLUSTERING})
+            store.add_columns(run_id, columns, embeddings)
+            store.add_design(run_id, 'embedding', embedding_suggested_tables)
+            if suggested_tables:
+                store.add_design(run_id, 'gemini', suggested_tables)
+            if gemini_response:
+                store.add_document(run_id, 'strategy', gemini_response)
+            store.add_document(run_id, 'cql', cql_schema)
+        print(f"✅ Run #{run_id} recorded in: {RESULTS_DB_PATH}")
     
     print("\n" + "=" * 70)
     print(" Migration Analysis Complete!")
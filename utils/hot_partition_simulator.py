@@ -0,0 +1,580 @@
+"""
+Hot Partition Simulator
+=======================
+Partition size alone does not reveal load hot spots: a design partitioned
+by artists_ArtistId can still send most reads to a handful of partitions.
+This script replays a query log against a proposed CQL schema on a
+simulated virtual-node token ring and reports how requests land on
+partitions and nodes.
+
+Partition keys are hashed with a vectorized (NumPy) implementation of the
+Murmur3 variant used by Cassandra's Murmur3Partitioner, so the tokens
+match what a real cluster would compute. Only distinct keys are hashed
+and request counts are aggregated with bincount, which keeps tens of
+millions of simulated requests to a few seconds.
+
+Query log formats:
+    CSV   - header "table,key[,count]"; composite keys joined with '|'
+    JSONL - {"table": ..., "key": value or [values], "count": n}
+When no log is given, a Zipf-distributed log is synthesized from the
+distinct partition key values found in the source database.
+
+Requirements:
+    pip install numpy
+
+Usage:
+    python hot_partition_simulator.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import csv
+import json
+import time
+import sqlite3
+import numpy as np
+from collections import Counter, defaultdict
+
+from cql_parser import load_cql_schema
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+# Proposed Cassandra schema to evaluate
+CQL_FILE_PATH = "../output/cassandra_schema.cql"
+
+# Source database used to synthesize a query log when none is given
+DB_PATH = "../db/chinook.db"
+
+# Optional query log (CSV or JSONL); None = synthesize one
+QUERY_LOG_PATH = None
+
+# Ring layout
+N_NODES = 6
+VNODES_PER_NODE = 16
+
+# Synthetic workload
+N_REQUESTS = 10_000_000
+ZIPF_EXPONENT = 1.1     # 0 = uniform key popularity
+
+# Reporting
+TOP_K = 10
+HOT_NODE_FACTOR = 1.5   # node is "hot" when load > factor * mean
+
+OUTPUT_JSON_PATH = "../output/hot_partition_report.json"
+
+# ============================================================
+# MURMUR3 (Cassandra Murmur3Partitioner, vectorized)
+# ============================================================
+
+_C1 = np.uint64(0x87c37b91114253d5)
+_C2 = np.uint64(0x4cf5ad432745937f)
+
+
+def _rotl64(x: np.ndarray, r: int) -> np.ndarray:
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+def _fmix64(k: np.ndarray) -> np.ndarray:
+    k = k ^ (k >> np.uint64(33))
+    k = k * np.uint64(0xff51afd7ed558ccd)
+    k = k ^ (k >> np.uint64(33))
+    k = k * np.uint64(0xc4ceb9fe1a85ec53)
+    k = k ^ (k >> np.uint64(33))
+    return k
+
+
+def _murmur3_fixed_length(data: np.ndarray) -> np.ndarray:
+    """
+    Hash many keys of the same byte length at once.
+
+    Args:
+        data: uint8 array of shape (n_keys, length)
+
+    Returns:
+        int64 array of Cassandra tokens
+    """
+    n, length = data.shape
+    h1 = np.zeros(n, dtype=np.uint64)
+    h2 = np.zeros(n, dtype=np.uint64)
+
+    with np.errstate(over='ignore'):
+        n_blocks = length // 16
+        if n_blocks:
+            blocks = np.ascontiguousarray(data[:, :n_blocks * 16]).view('<u8')
+            for i in range(n_blocks):
+                k1 = blocks[:, 2 * i].astype(np.uint64)
+                k2 = blocks[:, 2 * i + 1].astype(np.uint64)
+
+                k1 = _rotl64(k1 * _C1, 31) * _C2
+                h1 ^= k1
+                h1 = _rotl64(h1, 27) + h2
+                h1 = h1 * np.uint64(5) + np.uint64(0x52dce729)
+
+                k2 = _rotl64(k2 * _C2, 33) * _C1
+                h2 ^= k2
+                h2 = _rotl64(h2, 31) + h1
+                h2 = h2 * np.uint64(5) + np.uint64(0x38495ab5)
+
+        # Tail bytes. Cassandra reads them as signed Java bytes, so they
+        # are sign-extended before shifting (this differs from the
+        # reference MurmurHash3 for bytes >= 0x80).
+        tail = data[:, n_blocks * 16:].view(np.int8).astype(np.int64).astype(np.uint64)
+        remaining = length - n_blocks * 16
+        k1 = np.zeros(n, dtype=np.uint64)
+        k2 = np.zeros(n, dtype=np.uint64)
+        for i in range(remaining - 1, 7, -1):
+            k2 ^= tail[:, i] << np.uint64((i - 8) * 8)
+        if remaining > 8:
+            k2 = _rotl64(k2 * _C2, 33) * _C1
+            h2 ^= k2
+        for i in range(min(remaining, 8) - 1, -1, -1):
+            k1 ^= tail[:, i] << np.uint64(i * 8)
+        if remaining > 0:
+            k1 = _rotl64(k1 * _C1, 31) * _C2
+            h1 ^= k1
+
+        h1 ^= np.uint64(length)
+        h2 ^= np.uint64(length)
+        h1 = h1 + h2
+        h2 = h2 + h1
+        h1 = _fmix64(h1)
+        h2 = _fmix64(h2)
+        h1 = h1 + h2
+
+    tokens = h1.view(np.int64)
+    # Murmur3Partitioner maps Long.MIN_VALUE to Long.MAX_VALUE
+    tokens[tokens == np.iinfo(np.int64).min] = np.iinfo(np.int64).max
+    return tokens
+
+
+def murmur3_tokens(keys: list) -> np.ndarray:
+    """
+    Compute Cassandra Murmur3Partitioner tokens for serialized keys.
+
+    Keys are grouped by byte length so each group is hashed with a
+    single set of vectorized operations.
+
+    Args:
+        keys: List of bytes objects (serialized partition keys)
+
+    Returns:
+        int64 array of tokens, aligned with keys
+    """
+    tokens = np.empty(len(keys), dtype=np.int64)
+    lengths = np.fromiter((len(k) for k in keys), dtype=np.int64, count=len(keys))
+    for length in np.unique(lengths):
+        idx = np.flatnonzero(lengths == length)
+        if length == 0:
+            data = np.zeros((len(idx), 0), dtype=np.uint8)
+        else:
+            buffer = b''.join(keys[i] for i in idx)
+            data = np.frombuffer(buffer, dtype=np.uint8).reshape(len(idx), int(length))
+        tokens[idx] = _murmur3_fixed_length(data)
+    return tokens
+
+
+def serialize_partition_key(values: tuple, types: list) -> bytes:
+    """
+    Serialize partition key values the way Cassandra does before hashing.
+
+    Single-column keys are the raw serialized value; composite keys are
+    encoded as <2-byte length><bytes><0x00> per component.
+
+    Args:
+        values: Tuple of key component values
+        types: CQL types of the key components
+
+    Returns:
+        Serialized key bytes
+    """
+    parts = []
+    for value, cql_type in zip(values, types):
+        if cql_type == 'int':
+            parts.append(int(value).to_bytes(4, 'big', signed=True))
+        elif cql_type in ('bigint', 'counter', 'timestamp'):
+            parts.append(int(value).to_bytes(8, 'big', signed=True))
+        elif cql_type == 'uuid':
+            parts.append(bytes.fromhex(str(value).replace('-', '')))
+        else:
+            parts.append(str(value).encode('utf-8'))
+    if len(parts) == 1:
+        return parts[0]
+    return b''.join(len(p).to_bytes(2, 'big') + p + b'\x00' for p in parts)
+
+
+# ============================================================
+# TOKEN RING
+# ============================================================
+
+def build_ring(n_nodes: int, vnodes_per_node: int, replication_factor: int = 1,
+               seed: int = 42) -> dict:
+    """
+    Build a virtual-node token ring with random token assignment
+    (the default allocation when num_tokens > 1).
+
+    Args:
+        n_nodes: Number of physical nodes
+        vnodes_per_node: Tokens owned by each node
+        replication_factor: SimpleStrategy replication factor
+        seed: Random seed for token assignment
+
+    Returns:
+        Dictionary with sorted 'tokens', vnode 'owners' and the
+        (n_vnodes, rf) 'replicas' table
+    """
+    rng = np.random.default_rng(seed)
+    n_vnodes = n_nodes * vnodes_per_node
+    tokens = rng.integers(np.iinfo(np.int64).min, np.iinfo(np.int64).max,
+                          size=n_vnodes, dtype=np.int64)
+    owners = np.repeat(np.arange(n_nodes), vnodes_per_node)
+    order = np.argsort(tokens)
+    tokens, owners = tokens[order], owners[order]
+
+    # SimpleStrategy: walk clockwise until rf distinct nodes are found
+    rf = min(replication_factor, n_nodes)
+    replicas = np.empty((n_vnodes, rf), dtype=np.int64)
+    for v in range(n_vnodes):
+        found = []
+        step = 0
+        while len(found) < rf:
+            node = owners[(v + step) % n_vnodes]
+            if node not in found:
+                found.append(node)
+            step += 1
+        replicas[v] = found
+
+    return {'tokens': tokens, 'owners': owners, 'replicas': replicas, 'n_nodes': n_nodes}
+
+
+def locate_tokens(ring: dict, tokens: np.ndarray) -> np.ndarray:
+    """
+    Map tokens to the index of the vnode that owns them (the first ring
+    token >= key token, wrapping around).
+
+    Args:
+        ring: Ring from build_ring()
+        tokens: int64 key tokens
+
+    Returns:
+        Array of vnode indices
+    """
+    return np.searchsorted(ring['tokens'], tokens, side='left') % len(ring['tokens'])
+
+
+# ============================================================
+# QUERY LOG
+# ============================================================
+
+def load_query_log(file_path: str) -> dict:
+    """
+    Load a query log and aggregate request counts per partition key.
+
+    Args:
+        file_path: CSV or JSONL query log
+
+    Returns:
+        Dictionary of table -> Counter(key tuple -> request count)
+    """
+    log = defaultdict(Counter)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if file_path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                key = tuple(row['key'].split('|'))
+                log[row['table']][key] += int(row.get('count') or 1)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = entry['key']
+                key = tuple(key) if isinstance(key, list) else (key,)
+                log[entry['table']][key] += int(entry.get('count', 1))
+    total = sum(sum(c.values()) for c in log.values())
+    print(f"✅ Loaded {total:,} requests for {len(log)} tables from {file_path}")
+    return log
+
+
+def _source_column(cql_column: str, source_columns: list) -> str:
+    """Find the source "table.column" that generate_cassandra_schema() renamed to cql_column."""
+    for col in source_columns:
+        if col.replace('.', '_') == cql_column:
+            return col
+    return None
+
+
+def synthesize_query_log(tables: list, db_path: str, n_requests: int,
+                         zipf_exponent: float = 1.1, seed: int = 42) -> dict:
+    """
+    Synthesize a partition-key read workload from source data.
+
+    Requests are split evenly over tables; within a table, key
+    popularity follows a Zipf law over a random ranking of the distinct
+    partition key values. Counts are drawn with a single multinomial per
+    table, so the cost depends on the number of distinct keys rather
+    than on n_requests.
+
+    Args:
+        tables: Table definitions from parse_cql_schema()
+        db_path: Source SQLite database
+        n_requests: Total number of simulated requests
+        zipf_exponent: Zipf skew (0 = uniform)
+        seed: Random seed
+
+    Returns:
+        Dictionary of table -> (list of key tuples, np.ndarray of counts)
+    """
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    source_columns = []
+    for (table,) in cursor.fetchall():
+        cursor.execute(f"PRAGMA table_info({table})")
+        source_columns.extend(f"{table}.{row[1]}" for row in cursor.fetchall())
+
+    # First definition wins, as with CREATE TABLE IF NOT EXISTS
+    unique_tables = {}
+    for table in tables:
+        unique_tables.setdefault(table['name'], table)
+
+    log = {}
+    per_table = n_requests // max(len(unique_tables), 1)
+    for table in unique_tables.values():
+        sources = [_source_column(c, source_columns) for c in table['partition_key']]
+        if None in sources or len({s.split('.')[0] for s in sources}) != 1:
+            print(f"⚠️ {table['name']}: partition key has no single source table, skipped")
+            continue
+        source_table = sources[0].split('.')[0]
+        select = ', '.join(f'"{s.split(".")[1]}"' for s in sources)
+        cursor.execute(f'SELECT DISTINCT {select} FROM "{source_table}"')
+        keys = [tuple(row) for row in cursor.fetchall()]
+        if not keys:
+            continue
+        ranks = rng.permutation(len(keys)) + 1
+        weights = 1.0 / np.power(ranks, zipf_exponent)
+        counts = rng.multinomial(per_table, weights / weights.sum())
+        log[table['name']] = (keys, counts)
+
+    conn.close()
+    print(f"✅ Synthesized {per_table * len(log):,} requests over {len(log)} tables "
+          f"(Zipf s={zipf_exponent})")
+    return log
+
+
+# ============================================================
+# SIMULATION
+# ============================================================
+
+def _gini(values: np.ndarray) -> float:
+    """Gini coefficient of a non-negative load vector (0 = perfectly even)."""
+    values = np.sort(values.astype(np.float64))
+    if values.sum() == 0:
+        return 0.0
+    n = len(values)
+    cumulative = np.cumsum(values)
+    return float((n + 1 - 2 * np.sum(cumulative) / cumulative[-1]) / n)
+
+
+def _skew_metrics(load: np.ndarray) -> dict:
+    mean = load.mean() if len(load) else 0.0
+    return {
+        'max_over_mean': float(load.max() / mean) if mean else 0.0,
+        'coefficient_of_variation': float(load.std() / mean) if mean else 0.0,
+        'gini': _gini(load)
+    }
+
+
+def simulate(schema: dict, query_log: dict, n_nodes: int = N_NODES,
+             vnodes_per_node: int = VNODES_PER_NODE, top_k: int = TOP_K,
+             hot_node_factor: float = HOT_NODE_FACTOR, seed: int = 42) -> dict:
+    """
+    Replay a query log against a schema on a simulated token ring.
+
+    Args:
+        schema: Parsed schema from parse_cql_schema()
+        query_log: table -> Counter or (keys, counts), as returned by
+            load_query_log() / synthesize_query_log()
+        n_nodes: Number of physical nodes
+        vnodes_per_node: Virtual nodes per physical node
+        top_k: Number of hot partitions to list
+        hot_node_factor: Threshold (x mean) for flagging hot nodes
+        seed: Ring token seed
+
+    Returns:
+        Report dictionary with per-node, per-vnode and per-partition load
+    """
+    replication = {}
+    for keyspace in schema['keyspaces'].values():
+        replication = keyspace['replication']
+    rf = int(replication.get('replication_factor', 1))
+    ring = build_ring(n_nodes, vnodes_per_node, rf, seed)
+    n_vnodes = len(ring['tokens'])
+
+    # First definition wins, as with CREATE TABLE IF NOT EXISTS
+    table_defs = {}
+    for table in schema['tables']:
+        table_defs.setdefault(table['name'], table)
+
+    vnode_load = np.zeros(n_vnodes, dtype=np.int64)
+    table_reports = {}
+    hot_partitions = []
+    hash_seconds = 0.0
+    total_requests = 0
+
+    for table_name, entries in query_log.items():
+        table = table_defs.get(table_name)
+        if table is None:
+            print(f"⚠️ {table_name}: not in schema, skipped")
+            continue
+        if isinstance(entries, Counter):
+            keys = list(entries.keys())
+            counts = np.fromiter(entries.values(), dtype=np.int64, count=len(keys))
+        else:
+            keys, counts = entries
+            counts = np.asarray(counts, dtype=np.int64)
+
+        column_types = dict(table['columns'])
+        key_types = [column_types.get(c, 'text') for c in table['partition_key']]
+
+        start = time.perf_counter()
+        serialized = [serialize_partition_key(k, key_types) for k in keys]
+        tokens = murmur3_tokens(serialized)
+        vnodes = locate_tokens(ring, tokens)
+        hash_seconds += time.perf_counter() - start
+
+        table_vnode_load = np.bincount(vnodes, weights=counts, minlength=n_vnodes).astype(np.int64)
+        vnode_load += table_vnode_load
+        table_total = int(counts.sum())
+        total_requests += table_total
+
+        top = np.argsort(counts)[::-1][:top_k]
+        for i in top:
+            hot_partitions.append({
+                'table': table_name,
+                'key': list(keys[i]),
+                'token': int(tokens[i]),
+                'node': int(ring['owners'][vnodes[i]]),
+                'requests': int(counts[i])
+            })
+
+        sorted_counts = np.sort(counts)[::-1]
+        top_1pct = max(1, len(counts) // 100)
+        table_reports[table_name] = {
+            'requests': table_total,
+            'partitions': len(keys),
+            'max_partition_requests': int(sorted_counts[0]) if len(counts) else 0,
+            'top_1pct_partition_share': float(sorted_counts[:top_1pct].sum() / table_total) if table_total else 0.0,
+            'partition_skew': _skew_metrics(counts),
+            'node_skew': _skew_metrics(
+                np.bincount(ring['owners'], weights=table_vnode_load, minlength=n_nodes)
+            )
+        }
+
+    node_primary = np.bincount(ring['owners'], weights=vnode_load, minlength=n_nodes).astype(np.int64)
+    node_replica = np.zeros(n_nodes, dtype=np.int64)
+    for r in range(ring['replicas'].shape[1]):
+        node_replica += np.bincount(ring['replicas'][:, r], weights=vnode_load,
+                                    minlength=n_nodes).astype(np.int64)
+
+    hot_partitions.sort(key=lambda p: p['requests'], reverse=True)
+    for p in hot_partitions:
+        p['share'] = p['requests'] / total_requests if total_requests else 0.0
+    mean_load = node_primary.mean()
+    hot_nodes = [
+        {'node': int(n), 'requests': int(node_primary[n]), 'x_mean': float(node_primary[n] / mean_load)}
+        for n in np.argsort(node_primary)[::-1]
+        if mean_load and node_primary[n] > hot_node_factor * mean_load
+    ]
+
+    return {
+        'ring': {'nodes': n_nodes, 'vnodes_per_node': vnodes_per_node, 'replication_factor': rf},
+        'total_requests': total_requests,
+        'hash_seconds': hash_seconds,
+        'node_primary_load': node_primary.tolist(),
+        'node_replica_load': node_replica.tolist(),
+        'node_skew': _skew_metrics(node_primary),
+        'vnode_skew': _skew_metrics(vnode_load),
+        'hot_nodes': hot_nodes,
+        'hot_partitions': hot_partitions[:top_k],
+        'tables': table_reports
+    }
+
+
+def print_report(report: dict):
+    """Print a readable summary of a simulation report."""
+    print("\n" + "=" * 70)
+    print(" Per-Node Request Load (primary replica)")
+    print("=" * 70)
+    total = report['total_requests']
+    for node, load in enumerate(report['node_primary_load']):
+        share = load / total if total else 0.0
+        bar = "#" * int(share * 100)
+        print(f"   node {node:<3} {load:>14,}  {share:6.1%}  {bar}")
+    skew = report['node_skew']
+    print(f"\n   max/mean: {skew['max_over_mean']:.2f}   CV: {skew['coefficient_of_variation']:.3f}"
+          f"   Gini: {skew['gini']:.3f}")
+
+    print("\n" + "=" * 70)
+    print(" Per-Table Partition Skew")
+    print("=" * 70)
+    print(f"{'Table':<35} {'Requests':>12} {'Partitions':>11} {'Top 1%':>8} {'Gini':>6}")
+    print("-" * 76)
+    for name, t in sorted(report['tables'].items(), key=lambda x: -x[1]['top_1pct_partition_share']):
+        print(f"{name:<35} {t['requests']:>12,} {t['partitions']:>11,} "
+              f"{t['top_1pct_partition_share']:>8.1%} {t['partition_skew']['gini']:>6.3f}")
+
+    print("\n" + "=" * 70)
+    print(" Hottest Partitions")
+    print("=" * 70)
+    for p in report['hot_partitions']:
+        print(f"   {p['share']:6.2%}  {p['table']:<35} key={p['key']}  node {p['node']}")
+
+    if report['hot_nodes']:
+        print("\n⚠️ Hot nodes:")
+        for n in report['hot_nodes']:
+            print(f"   node {n['node']}: {n['requests']:,} requests ({n['x_mean']:.2f}x mean)")
+    else:
+        print("\n✅ No node above the hot-node threshold")
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Virtual Token-Ring Hot Partition Simulator")
+    print("=" * 70)
+
+    print("\n[1/3] Loading proposed schema...")
+    schema = load_cql_schema(CQL_FILE_PATH)
+
+    print("\n[2/3] Loading query log...")
+    if QUERY_LOG_PATH:
+        query_log = load_query_log(QUERY_LOG_PATH)
+    else:
+        query_log = synthesize_query_log(schema['tables'], DB_PATH, N_REQUESTS, ZIPF_EXPONENT)
+
+    print(f"\n[3/3] Simulating {N_NODES} nodes x {VNODES_PER_NODE} vnodes...")
+    start = time.perf_counter()
+    report = simulate(schema, query_log)
+    elapsed = time.perf_counter() - start
+    report['simulate_seconds'] = elapsed
+    print(f"✅ Simulated {report['total_requests']:,} requests in {elapsed:.2f}s "
+          f"({report['total_requests'] / max(elapsed, 1e-9):,.0f} requests/s)")
+
+    print_report(report)
+
+    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report saved to: {OUTPUT_JSON_PATH}")
+
+
+if __name__ == "__main__":
+    main()
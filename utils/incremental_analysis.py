@@ -0,0 +1,413 @@
+"""
+Incremental Re-Analysis
+=======================
+Delta mode for the embedding / clustering / CQL flow of
+gemini_migration_analyzer.py. The previous run's schema fingerprint,
+embeddings, cluster assignment and generated CQL blocks are kept in a
+state file; on the next run the current schema is diffed against it:
+
+    - unchanged columns keep their cached embeddings
+    - only new and renamed columns are embedded
+    - they join the existing clusters by nearest centroid
+    - a full re-clustering (on the cached embeddings, no re-encode) only
+      happens when the new columns sit too far from their centroids or
+      too many columns were assigned incrementally since the last refit
+    - only CQL tables whose clusters changed are regenerated; type
+      inference only samples the changed source tables
+
+The first run (or a run with FULL_REFRESH = True) does the full analysis
+and writes the initial state. Gemini suggestions are not re-requested.
+
+Cached embeddings are only reused when the embedding model, backend and
+mode (names or VALUE_FINGERPRINTS) match the ones recorded in the state;
+otherwise the run is a full analysis. With VALUE_FINGERPRINTS the
+embeddings also depend on the data, so the state records the row count of
+every table and any count change forces a full analysis. Updates that
+keep the row counts (UPDATE in place) are not detected: use FULL_REFRESH
+after them.
+
+Requirements:
+    pip install sentence-transformers scikit-learn numpy
+
+Usage:
+    python incremental_analysis.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from collections import defaultdict
+
+from er_graph import load_er_graph
+from schema_model import SchemaModel
+from type_inference import infer_column_types
+from embedding_service import MODEL_NAME, EMBEDDING_BACKEND
+from gemini_migration_analyzer import (generate_embeddings, cluster_columns,
+                                       cql_schema_header, cql_table_block, VALUE_FINGERPRINTS)
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# State of the previous run (JSON + embedding matrix)
+STATE_PATH = "../output/analysis_state.json"
+EMBEDDINGS_PATH = "../output/analysis_embeddings.npy"
+
+# Outputs shared with gemini_migration_analyzer.py
+CQL_PATH = "../output/cassandra_schema.cql"
+EMBEDDING_TABLES_PATH = "../output/embedding_suggested_tables.json"
+
+# Refit when new columns are on average this many times farther from their
+# centroid than the columns of the last fit were
+DRIFT_THRESHOLD = 1.5
+
+# Refit when this share of columns was assigned incrementally since the last fit
+MAX_INCREMENTAL_FRACTION = 0.2
+
+# Ignore the previous state and run the full analysis
+FULL_REFRESH = False
+
+# ============================================================
+# SCHEMA FINGERPRINT
+# ============================================================
+
+def schema_snapshot(db_path: str) -> dict:
+    """
+    Current schema as "table.column" -> (declared type, ordinal, PK position).
+
+    Args:
+        db_path: Path to the SQLite database
+
+    Returns:
+        Ordered dictionary of column descriptors
+    """
+    graph = load_er_graph(db_path)
+    snapshot = {}
+    for table in graph.tables:
+        pk = graph.primary_keys.get(table, [])
+        for ordinal, column in enumerate(graph.columns[table]):
+            snapshot[f"{table}.{column}"] = [
+                graph.column_types[table].get(column) or '',
+                ordinal,
+                pk.index(column) + 1 if column in pk else 0
+            ]
+    return snapshot
+
+
+def schema_fingerprint(snapshot: dict) -> str:
+    """Stable hash of a schema snapshot."""
+    digest = hashlib.sha256()
+    for column in sorted(snapshot):
+        digest.update(json.dumps([column] + list(snapshot[column])).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def diff_schema(old: dict, new: dict) -> dict:
+    """
+    Compare two schema snapshots.
+
+    A column that disappeared and a column that appeared in the same table
+    at the same ordinal with the same declared type count as a rename.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+
+    Returns:
+        Dictionary with 'added', 'removed', 'renamed' (old -> new) and
+        'retyped' (columns whose declared type or key position changed)
+    """
+    added = [c for c in new if c not in old]
+    removed = [c for c in old if c not in new]
+
+    renamed = {}
+    slots = {(c.split('.')[0], old[c][1], old[c][0]): c for c in removed}
+    for column in added:
+        key = (column.split('.')[0], new[column][1], new[column][0])
+        if key in slots:
+            renamed[slots.pop(key)] = column
+    added = [c for c in added if c not in renamed.values()]
+    removed = [c for c in removed if c not in renamed]
+
+    retyped = [c for c in new if c in old and (old[c][0], old[c][2]) != (new[c][0], new[c][2])]
+    return {'added': added, 'removed': removed, 'renamed': renamed, 'retyped': retyped}
+
+
+# ============================================================
+# STATE
+# ============================================================
+
+def data_version(db_path: str) -> dict:
+    """Row count per table (value fingerprints change with the data)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    counts = {}
+    for (table,) in cursor.fetchall():
+        cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+        counts[table] = cursor.fetchone()[0]
+    conn.close()
+    return counts
+
+
+def embedding_config(db_path: str = DB_PATH) -> dict:
+    """Settings (and, for value fingerprints, data) the cached embeddings depend on."""
+    config = {'model': MODEL_NAME, 'backend': EMBEDDING_BACKEND,
+              'mode': 'fingerprints' if VALUE_FINGERPRINTS else 'names'}
+    if VALUE_FINGERPRINTS:
+        config['rows'] = data_version(db_path)
+    return config
+
+
+def load_state() -> tuple:
+    """Return (state dict, embeddings) of the previous run, or (None, None)."""
+    if not (os.path.exists(STATE_PATH) and os.path.exists(EMBEDDINGS_PATH)):
+        return None, None
+    with open(STATE_PATH, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    embeddings = np.load(EMBEDDINGS_PATH)
+    if len(embeddings) != len(state['columns']):
+        return None, None
+    return state, embeddings
+
+
+def save_state(state: dict, embeddings: np.ndarray):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    with open(STATE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    np.save(EMBEDDINGS_PATH, embeddings)
+
+
+# ============================================================
+# CLUSTER MAINTENANCE
+# ============================================================
+
+def centroids_of(embeddings: np.ndarray, labels: np.ndarray) -> dict:
+    """Mean embedding per cluster label."""
+    return {int(label): embeddings[labels == label].mean(axis=0) for label in np.unique(labels)}
+
+
+def mean_spread(embeddings: np.ndarray, labels: np.ndarray, centroids: dict) -> float:
+    """Average distance of columns to their cluster centroid."""
+    if len(labels) == 0:
+        return 0.0
+    centres = np.stack([centroids[int(label)] for label in labels])
+    return float(np.linalg.norm(embeddings - centres, axis=1).mean())
+
+
+def assign_nearest(embeddings: np.ndarray, centroids: dict) -> tuple:
+    """
+    Nearest-centroid assignment (Euclidean, as in KMeans).
+
+    Returns:
+        (labels, distances)
+    """
+    ids = np.array(sorted(centroids))
+    centres = np.stack([centroids[i] for i in ids])
+    distances = np.linalg.norm(embeddings[:, None, :] - centres[None, :, :], axis=2)
+    nearest = distances.argmin(axis=1)
+    return ids[nearest], distances[np.arange(len(embeddings)), nearest]
+
+
+def write_outputs(columns: list, labels: np.ndarray, blocks: dict):
+    """Write the CQL schema and the embedding-based table groupings."""
+    clusters = defaultdict(list)
+    for column, label in zip(columns, labels):
+        clusters[int(label)].append(column)
+
+    lines = cql_schema_header()
+    for cluster_id in sorted(clusters):
+        lines.extend(blocks[str(cluster_id)])
+    with open(CQL_PATH, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+    tables = SchemaModel(columns).cluster_tables(labels)
+    with open(EMBEDDING_TABLES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(tables, f, indent=2)
+
+
+def full_analysis(db_path: str, snapshot: dict) -> tuple:
+    """Embed, cluster and generate CQL for the whole schema; return (state, embeddings)."""
+    columns = list(snapshot)
+    embeddings = generate_embeddings(columns, db_path)
+    n_clusters = SchemaModel(columns).n_tables
+    labels = np.asarray(cluster_columns(embeddings, n_clusters))
+    centroids = centroids_of(embeddings, labels)
+    column_types = infer_column_types(db_path)
+
+    clusters = defaultdict(list)
+    for column, label in zip(columns, labels):
+        clusters[int(label)].append(column)
+    blocks = {str(c): cql_table_block(c, cols, column_types) for c, cols in clusters.items()}
+
+    state = {
+        'fingerprint': schema_fingerprint(snapshot),
+        'embedding': embedding_config(db_path),
+        'schema': snapshot,
+        'columns': columns,
+        'labels': labels.tolist(),
+        'spread': mean_spread(embeddings, labels, centroids),
+        'assigned_since_fit': 0,
+        'column_types': column_types,
+        'cql_blocks': blocks
+    }
+    write_outputs(columns, labels, blocks)
+    return state, embeddings
+
+
+def incremental_analysis(db_path: str, state: dict, embeddings: np.ndarray, snapshot: dict) -> tuple:
+    """
+    Update the previous analysis for a changed schema.
+
+    Args:
+        db_path: Path to the SQLite database
+        state: Previous state (load_state())
+        embeddings: Previous embedding matrix
+        snapshot: Current schema_snapshot()
+
+    Returns:
+        (new state, new embeddings, report dictionary)
+    """
+    diff = diff_schema(state['schema'], snapshot)
+    report = {'diff': diff, 'timings': {}}
+
+    # Reuse cached embeddings; embed only new and renamed columns
+    start = time.perf_counter()
+    cached = {column: i for i, column in enumerate(state['columns'])}
+    columns = list(snapshot)
+    fresh = [c for c in columns if c not in cached]
+    new_embeddings = generate_embeddings(fresh, db_path) if fresh else np.empty((0, embeddings.shape[1]))
+    fresh_index = {c: i for i, c in enumerate(fresh)}
+    matrix = np.stack([embeddings[cached[c]] if c in cached else new_embeddings[fresh_index[c]]
+                       for c in columns]).astype(embeddings.dtype)
+    report['timings']['embed'] = time.perf_counter() - start
+    report['embedded'] = len(fresh)
+
+    # Previous labels for the columns that survived; nearest centroid for the rest
+    start = time.perf_counter()
+    old_labels = dict(zip(state['columns'], state['labels']))
+    kept = np.array([c in old_labels for c in columns], dtype=bool)
+    labels = np.array([old_labels.get(c, -1) for c in columns])
+    centroids = centroids_of(matrix[kept], labels[kept]) if kept.any() else {}
+
+    drift = 0.0
+    if fresh and centroids:
+        assigned, distances = assign_nearest(new_embeddings, centroids)
+        position = {c: i for i, c in enumerate(columns)}
+        for c, label in zip(fresh, assigned):
+            labels[position[c]] = label
+        drift = float(distances.mean()) / max(state['spread'], 1e-12)
+    assigned_since_fit = state['assigned_since_fit'] + len(fresh)
+
+    refit = (not centroids or drift > DRIFT_THRESHOLD or
+             assigned_since_fit > MAX_INCREMENTAL_FRACTION * len(columns))
+    if refit:
+        n_clusters = SchemaModel(columns).n_tables
+        labels = np.asarray(cluster_columns(matrix, n_clusters))
+        assigned_since_fit = 0
+    centroids = centroids_of(matrix, labels)
+    report['timings']['cluster'] = time.perf_counter() - start
+    report['drift'] = drift
+    report['refit'] = refit
+
+    # Affected clusters: membership changed or a member's type changed
+    old_members = defaultdict(set)
+    for column, label in old_labels.items():
+        old_members[int(label)].add(column)
+    new_members = defaultdict(list)
+    for column, label in zip(columns, labels):
+        new_members[int(label)].append(column)
+    touched = set(diff['retyped'])
+    affected = sorted(label for label, cols in new_members.items()
+                      if refit or set(cols) != old_members.get(label, set()) or touched & set(cols))
+
+    # Re-infer types only for source tables with changes, then rebuild affected blocks
+    start = time.perf_counter()
+    column_types = {c: t for c, t in state['column_types'].items() if c in snapshot}
+    changed_tables = sorted({c.split('.')[0] for c in fresh + diff['retyped']})
+    if changed_tables:
+        column_types.update(infer_column_types(db_path, tables=changed_tables))
+    blocks = {label: block for label, block in state['cql_blocks'].items()
+              if int(label) in new_members and int(label) not in affected}
+    for label in affected:
+        blocks[str(label)] = cql_table_block(label, new_members[label], column_types)
+    write_outputs(columns, labels, blocks)
+    report['timings']['cql'] = time.perf_counter() - start
+    report['affected_tables'] = affected
+
+    new_state = {
+        'fingerprint': schema_fingerprint(snapshot),
+        'embedding': embedding_config(db_path),
+        'schema': snapshot,
+        'columns': columns,
+        'labels': [int(label) for label in labels],
+        'spread': mean_spread(matrix, labels, centroids) if refit else state['spread'],
+        'assigned_since_fit': assigned_since_fit,
+        'column_types': column_types,
+        'cql_blocks': blocks
+    }
+    return new_state, matrix, report
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Incremental Schema Re-Analysis")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    snapshot = schema_snapshot(DB_PATH)
+    fingerprint = schema_fingerprint(snapshot)
+    state, embeddings = (None, None) if FULL_REFRESH else load_state()
+    config = embedding_config(DB_PATH)
+    if state is not None and state.get('embedding') != config:
+        previous = state.get('embedding') or {}
+        changed = sorted(k for k in config.keys() | previous.keys() if previous.get(k) != config.get(k))
+        print(f"⚠️ Embedding {', '.join(changed)} changed since the last run: "
+              f"cached embeddings discarded")
+        state, embeddings = None, None
+
+    if state is None:
+        print("🔄 No previous state: running the full analysis...")
+        state, embeddings = full_analysis(DB_PATH, snapshot)
+        save_state(state, embeddings)
+        print(f"✅ Full analysis of {len(snapshot)} columns in {time.perf_counter() - start:.2f}s")
+        return
+
+    if state['fingerprint'] == fingerprint:
+        print(f"✅ Schema unchanged (fingerprint {fingerprint[:12]}), nothing to do")
+        return
+
+    state, embeddings, report = incremental_analysis(DB_PATH, state, embeddings, snapshot)
+    save_state(state, embeddings)
+
+    diff = report['diff']
+    print(f"✅ Schema delta: +{len(diff['added'])} added, -{len(diff['removed'])} removed, "
+          f"{len(diff['renamed'])} renamed, {len(diff['retyped'])} retyped")
+    for old, new in diff['renamed'].items():
+        print(f"   renamed: {old} -> {new}")
+    print(f"✅ Embedded {report['embedded']} columns ({report['timings']['embed']:.2f}s)")
+    if report['refit']:
+        print(f"⚠️ Drift {report['drift']:.2f} or incremental share over limit: clusters refit "
+              f"({report['timings']['cluster']:.2f}s)")
+    else:
+        print(f"✅ Nearest-centroid assignment, drift {report['drift']:.2f} "
+              f"<= {DRIFT_THRESHOLD} ({report['timings']['cluster']:.3f}s)")
+    print(f"✅ Regenerated {len(report['affected_tables'])} of {len(state['cql_blocks'])} CQL tables "
+          f"({report['timings']['cql']:.2f}s)")
+    print(f"\n Total: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Shared 2D Projection
+====================
+One 2D PCA projection for every plot (clustering.py, the migration
+analyzer and the comparison analyzer), so all plots share coordinates and
+the projection is not refit on every run:
+
+    - the projection is fit once with randomized PCA on at most
+      FIT_SAMPLE_SIZE sampled rows, or with IncrementalPCA in mini-batches
+      (FIT_METHOD = 'incremental'), instead of an exact SVD of the full
+      embedding matrix
+    - the fitted mean / components are cached in PROJECTION_CACHE_PATH,
+      keyed by embedding model, dimension and source database
+      (fit_key()); every plotting script passes the same key, so they
+      reuse one fit
+    - new embeddings (e.g. added columns) are projected with the cached
+      components, without refitting, unless the components explain much
+      less of their variance than of the fitted data
+      (REFIT_VARIANCE_RATIO); project(..., refit=True) forces a new fit
+
+The returned Projection exposes explained_variance_ratio_ like sklearn's
+PCA, so plot axis labels work unchanged.
+
+Requirements:
+    pip install scikit-learn numpy
+
+Usage:
+    from projection import project
+    embeddings_2d, projection = project(embeddings)
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import hashlib
+import numpy as np
+
+from embedding_service import MODEL_NAME
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+PROJECTION_CACHE_PATH = "../output/projection_cache.npz"
+
+# 'randomized' (randomized PCA on a sample) or 'incremental' (IncrementalPCA)
+FIT_METHOD = 'randomized'
+
+# Rows used to fit the randomized projection
+FIT_SAMPLE_SIZE = 20000
+
+# Rows per IncrementalPCA mini-batch
+FIT_BATCH_SIZE = 4096
+
+# Refit when the cached components explain less than this fraction of the
+# variance they explained on the data they were fit on
+REFIT_VARIANCE_RATIO = 0.5
+
+# ============================================================
+# PROJECTION
+# ============================================================
+
+class Projection:
+    """Fitted linear 2D projection (mean + components)."""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray,
+                 explained_variance_ratio: np.ndarray, n_fit: int, model_name: str = MODEL_NAME,
+                 key: str = ''):
+        self.mean_ = mean
+        self.components_ = components
+        self.explained_variance_ratio_ = explained_variance_ratio
+        self.n_fit = n_fit
+        self.model_name = model_name
+        self.key = key
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project embeddings (n, dim) to (n, 2)."""
+        return (np.asarray(embeddings, dtype=np.float32) - self.mean_) @ self.components_.T
+
+    def explained_variance(self, embeddings: np.ndarray) -> float:
+        """Fraction of the variance of embeddings captured by the components."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        centered = embeddings - embeddings.mean(axis=0)
+        total = float((centered ** 2).sum())
+        if total == 0.0:
+            return 0.0
+        return float(((centered @ self.components_.T) ** 2).sum()) / total
+
+    def save(self, path: str = PROJECTION_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, mean=self.mean_, components=self.components_,
+                 explained_variance_ratio=self.explained_variance_ratio_,
+                 n_fit=self.n_fit, model_name=self.model_name, key=self.key)
+
+    @classmethod
+    def load(cls, path: str = PROJECTION_CACHE_PATH):
+        """Cached projection, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        key = str(data['key']) if 'key' in data.files else ''
+        return cls(data['mean'], data['components'], data['explained_variance_ratio'],
+                   int(data['n_fit']), str(data['model_name']), key)
+
+
+def fit_key(db_path: str) -> str:
+    """
+    Cache key of the database a projection belongs to.
+
+    Only the source database is hashed (model and dimension are checked
+    separately), so scripts embedding different column sets of the same
+    database share the projection; drift is caught by REFIT_VARIANCE_RATIO.
+
+    Args:
+        db_path: Source database of the embedded columns
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.sha1(os.path.abspath(db_path).encode('utf-8')).hexdigest()
+
+
+def fit_projection(embeddings: np.ndarray, method: str = FIT_METHOD,
+                   sample_size: int = FIT_SAMPLE_SIZE, batch_size: int = FIT_BATCH_SIZE,
+                   model_name: str = MODEL_NAME, key: str = '', seed: int = 42) -> Projection:
+    """
+    Fit a 2D projection without an exact SVD of the full matrix.
+
+    Args:
+        embeddings: Array (n, dim)
+        method: 'randomized' or 'incremental'
+        sample_size: Rows sampled for the randomized fit
+        batch_size: Rows per IncrementalPCA mini-batch
+        model_name: Embedding model the projection belongs to
+        key: fit_key() of the source database
+        seed: Sampling / solver seed
+
+    Returns:
+        Projection
+    """
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = len(embeddings)
+    if method == 'incremental':
+        pca = IncrementalPCA(n_components=2, batch_size=max(batch_size, 2))
+        for start in range(0, n, batch_size):
+            batch = embeddings[start:start + batch_size]
+            if len(batch) >= 2:
+                pca.partial_fit(batch)
+        n_fit = n
+    else:
+        sample = embeddings
+        if n > sample_size:
+            index = np.random.default_rng(seed).choice(n, sample_size, replace=False)
+            sample = embeddings[index]
+        pca = PCA(n_components=2, svd_solver='randomized', random_state=seed).fit(sample)
+        n_fit = len(sample)
+    return Projection(pca.mean_.astype(np.float32), pca.components_.astype(np.float32),
+                      pca.explained_variance_ratio_, n_fit, model_name, key)
+
+
+def project(embeddings: np.ndarray, refit: bool = False, model_name: str = MODEL_NAME,
+            cache_path: str = PROJECTION_CACHE_PATH, key: str = None) -> tuple:
+    """
+    Project embeddings with the shared cached projection.
+
+    The cache is (re)fit on these embeddings when it is missing, belongs
+    to a different model, dimension or key, explains less than
+    REFIT_VARIANCE_RATIO of its fitted variance on these embeddings, or
+    refit is True.
+
+    Args:
+        embeddings: Array (n, dim)
+        refit: Force a new fit
+        model_name: Embedding model of the embeddings
+        cache_path: Projection cache file
+        key: fit_key() of the source database (None = do not compare keys)
+
+    Returns:
+        (2D coordinates (n, 2), Projection)
+    """
+    projection = None if refit else Projection.load(cache_path)
+    if (projection is None or projection.model_name != model_name
+            or projection.components_.shape[1] != np.shape(embeddings)[1]
+            or (key is not None and projection.key != key)
+            or projection.explained_variance(embeddings)
+            < REFIT_VARIANCE_RATIO * float(np.sum(projection.explained_variance_ratio_))):
+        projection = fit_projection(embeddings, model_name=model_name, key=key or '')
+        projection.save(cache_path)
+    return projection.transform(embeddings), projection
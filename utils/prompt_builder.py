@@ -0,0 +1,472 @@
+"""
+Compact Chunked Prompt Builder
+==============================
+Builds the Gemini prompts of gemini_migration_analyzer.py from a compact
+schema encoding instead of a pretty-printed JSON list of "table.column"
+strings:
+
+    Invoice: InvoiceId, CustomerId->Customer, InvoiceDate, Total
+
+(one table per line, FK columns marked with their parent table). Large
+schemas are split into chunks along FK-connected components of the ER
+graph, so tables that join stay in the same prompt; components are
+packed into chunks up to PROMPT_CHUNK_TOKENS, and an oversized component
+is cut in BFS order. Chunks are sent concurrently and the per-chunk table
+suggestions are merged into one result.
+
+The narrative strategy prompt (detail_prompt()) gets the full compact
+schema only when it fits one chunk; larger schemas are sent as
+summary_schema(): key and FK columns per table, the most connected
+tables first, cut at PROMPT_CHUNK_TOKENS.
+
+Schemas that fit one chunk can instead use structured_prompt(): one
+request returning {"tables": [...], "strategy": "..."}, whose "tables"
+array is parsed from the stream as soon as it is complete
+(parse_streamed_tables()); if the stream breaks off, the "strategy"
+received so far is recovered with parse_streamed_strategy().
+
+Token counts are estimated (CHARS_PER_TOKEN) so the report works without
+an API key.
+
+Usage:
+    python prompt_builder.py        # token report for the current schema
+
+Author: Migration Analysis Tool
+"""
+
+import json
+import time
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+JSON_FILE_PATH = "../output/chinook.db_json.json"
+DB_PATH = "../db/chinook.db"
+
+# Token budget for the schema part of one chunk prompt
+PROMPT_CHUNK_TOKENS = 6000
+
+# Concurrent chunk requests
+MAX_CONCURRENT_REQUESTS = 4
+
+# Rough characters per token for estimates
+CHARS_PER_TOKEN = 4
+
+# ============================================================
+# SCHEMA ENCODING
+# ============================================================
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def group_columns(columns: list) -> dict:
+    """Group "table.column" strings into table -> [columns], keeping order."""
+    tables = defaultdict(list)
+    for entry in columns:
+        table, _, column = entry.partition('.')
+        tables[table].append(column)
+    return dict(tables)
+
+
+def encode_table(table: str, table_columns: list, graph=None) -> str:
+    """
+    One-line encoding of a table.
+
+    Args:
+        table: Table name
+        table_columns: Its column names
+        graph: Optional ERGraph; FK columns get "->Parent"
+
+    Returns:
+        "Table: col1, col2->Parent, ..."
+    """
+    references = {}
+    if graph is not None and table in graph.table_id:
+        for e in graph.out_edges[graph.table_id[table]]:
+            edge = graph.edges[e]
+            for column in edge['child_columns']:
+                references[column] = graph.tables[edge['parent']]
+    parts = [f"{c}->{references[c]}" if c in references else c for c in table_columns]
+    return f"{table}: {', '.join(parts)}"
+
+
+def compact_schema(columns: list, graph=None) -> str:
+    """Compact schema text for a list of "table.column" strings."""
+    return '\n'.join(encode_table(t, cols, graph) for t, cols in group_columns(columns).items())
+
+
+def summary_schema(columns: list, graph=None, max_tokens: int = PROMPT_CHUNK_TOKENS) -> str:
+    """
+    Schema text for one prompt: the compact schema when it fits max_tokens,
+    otherwise only key / FK columns per table ("+N more" for the rest),
+    most connected tables first, cut when the budget is used up.
+
+    Args:
+        columns: List of "table.column" strings
+        graph: Optional ERGraph (primary keys, FK columns, connectivity)
+        max_tokens: Token budget for the schema text
+
+    Returns:
+        Schema text
+    """
+    full = compact_schema(columns, graph)
+    if estimate_tokens(full) <= max_tokens:
+        return full
+
+    tables = group_columns(columns)
+
+    def degree(table):
+        if graph is None or table not in graph.table_id:
+            return 0
+        t = graph.table_id[table]
+        return len(graph.out_edges[t]) + len(graph.in_edges[t])
+
+    lines, budget = [], max_tokens
+    order = sorted(tables, key=lambda t: -degree(t))
+    for i, table in enumerate(order):
+        table_columns = tables[table]
+        keys = set()
+        if graph is not None and table in graph.table_id:
+            keys.update(graph.primary_keys.get(table, []))
+            for e in graph.out_edges[graph.table_id[table]]:
+                keys.update(graph.edges[e]['child_columns'])
+        else:
+            keys.update(c for c in table_columns if c.lower().endswith('id'))
+        kept = [c for c in table_columns if c in keys]
+        if not kept:
+            line = f"{table}: {len(table_columns)} columns"
+        else:
+            line = encode_table(table, kept, graph)
+            if len(kept) < len(table_columns):
+                line += f" (+{len(table_columns) - len(kept)} more)"
+        cost = estimate_tokens(line + '\n')
+        if cost > budget:
+            lines.append(f"... and {len(order) - i} more tables")
+            break
+        lines.append(line)
+        budget -= cost
+    return '\n'.join(lines)
+
+
+def chunk_schema(columns: list, graph=None, max_tokens: int = PROMPT_CHUNK_TOKENS) -> list:
+    """
+    Split a schema into compact chunks along FK-connected components.
+
+    Args:
+        columns: List of "table.column" strings
+        graph: Optional ERGraph (without it every table is its own component)
+        max_tokens: Token budget per chunk
+
+    Returns:
+        List of chunks, each a list of encoded table lines
+    """
+    tables = group_columns(columns)
+    lines = {t: encode_table(t, cols, graph) for t, cols in tables.items()}
+    cost = {t: estimate_tokens(line) + 1 for t, line in lines.items()}
+
+    # Tables of one component, in BFS order so a cut keeps neighbours together
+    components = defaultdict(list)
+    seen = set()
+    for table in tables:
+        if table in seen:
+            continue
+        if graph is None or table not in graph.table_id:
+            components[('table', table)].append(table)
+            seen.add(table)
+            continue
+        start = graph.table_id[table]
+        queue = deque([start])
+        visited = {start}
+        while queue:
+            node = queue.popleft()
+            name = graph.tables[node]
+            if name in tables and name not in seen:
+                components[('component', graph.component[start])].append(name)
+                seen.add(name)
+            for _, other in graph.neighbours(node):
+                if other not in visited:
+                    visited.add(other)
+                    queue.append(other)
+
+    # Oversized components are cut into budget-sized pieces
+    pieces = []
+    for members in components.values():
+        piece, size = [], 0
+        for table in members:
+            if piece and size + cost[table] > max_tokens:
+                pieces.append((size, piece))
+                piece, size = [], 0
+            piece.append(table)
+            size += cost[table]
+        pieces.append((size, piece))
+
+    # First-fit decreasing packing of the pieces into chunks
+    chunks = []
+    for size, piece in sorted(pieces, key=lambda p: -p[0]):
+        for chunk in chunks:
+            if chunk[0] + size <= max_tokens:
+                chunk[0] += size
+                chunk[1].extend(piece)
+                break
+        else:
+            chunks.append([size, list(piece)])
+    return [[lines[t] for t in chunk[1]] for chunk in chunks]
+
+
+# ============================================================
+# PROMPTS
+# ============================================================
+
+def json_prompt(schema_text: str, partial: bool = False) -> str:
+    """Prompt asking for Cassandra tables as a JSON object."""
+    scope = ("This is one FK-connected part of a larger schema; only use the tables listed.\n"
+             if partial else "")
+    return f"""Relational schema (one table per line, "col->Parent" marks a foreign key):
+{schema_text}
+{scope}
+Suggest how to migrate this schema to Cassandra (column-oriented database).
+Group columns that are frequently queried together and denormalize for query optimization.
+Return ONLY a JSON object mapping Cassandra table names to arrays of "table.column" names:
+{{"cassandra_table_name": ["Table.column", ...]}}"""
+
+
+def detail_prompt(schema_text: str) -> str:
+    """Prompt asking for the narrative migration strategy."""
+    return f"""Relational schema (one table per line, "col->Parent" marks a foreign key):
+{schema_text}
+
+Please provide detailed migration suggestions:
+1. How to best migrate this to Cassandra (column-oriented database)
+2. Suggested partition keys and clustering columns
+3. Any denormalization strategies needed
+4. Query patterns this structure would optimize for
+5. Specific CQL (Cassandra Query Language) examples"""
+
+
+def structured_prompt(schema_text: str) -> str:
+    """Single-request prompt for tables plus strategy (structured-output mode)."""
+    return f"""Relational schema (one table per line, "col->Parent" marks a foreign key):
+{schema_text}
+
+Plan the migration of this schema to Cassandra (column-oriented database).
+In "tables", group "Table.column" names that are frequently queried together into Cassandra
+tables, denormalizing for query optimization. In "strategy", explain:
+1. How to best migrate this to Cassandra
+2. Suggested partition keys and clustering columns
+3. Any denormalization strategies needed
+4. Query patterns this structure would optimize for
+5. Specific CQL (Cassandra Query Language) examples"""
+
+
+def legacy_prompts(columns: list) -> list:
+    """The previous two prompts (pretty-printed JSON schema), for comparison."""
+    schema = json.dumps(columns, indent=2)
+    return [f"""
+        I have a relational database with the following tables and columns:
+
+        {schema}
+
+        Analyze this schema and suggest how to migrate to Cassandra (column-oriented database).
+
+        IMPORTANT: Return ONLY a valid JSON object with suggested Cassandra table names as keys,
+        and arrays of column names as values. Format:
+
+        {{
+            "cassandra_table_name_1": ["column1", "column2", "column3"],
+            "cassandra_table_name_2": ["column4", "column5"]
+        }}
+
+        Group columns that are frequently queried together.
+        Consider denormalization for query optimization.
+        Return ONLY the JSON, no other text.
+        """, f"""
+        I have a relational database with the following tables and columns:
+
+        {schema}
+
+        Please provide detailed migration suggestions:
+        1. How to best migrate this to Cassandra (column-oriented database)
+        2. Suggested partition keys and clustering columns
+        3. Any denormalization strategies needed
+        4. Query patterns this structure would optimize for
+        5. Specific CQL (Cassandra Query Language) examples
+        """]
+
+
+# ============================================================
+# MAP-REDUCE REQUESTS
+# ============================================================
+
+def parse_table_json(text: str) -> dict:
+    """
+    Parse a table-suggestion JSON object, tolerating markdown code fences.
+
+    Raises:
+        json.JSONDecodeError: If no JSON object can be parsed
+    """
+    clean = text.strip()
+    if clean.startswith("```"):
+        clean = clean.split("```")[1]
+        if clean.startswith("json"):
+            clean = clean[4:]
+    return json.loads(clean.strip())
+
+
+def parse_streamed_tables(text: str):
+    """
+    Parse the "tables" array from a partially streamed structured response.
+
+    Args:
+        text: Response text received so far ({"tables": [...], "strategy": ...})
+
+    Returns:
+        List of {"name", "columns"} once the array is complete, else None
+    """
+    key = text.find('"tables"')
+    if key < 0:
+        return None
+    start = text.find('[', key)
+    if start < 0:
+        return None
+    try:
+        tables, _ = json.JSONDecoder().raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return tables
+
+
+def parse_streamed_strategy(text: str):
+    """
+    Recover the "strategy" string from a structured response, also when
+    it was cut off mid-string.
+
+    Args:
+        text: Response text received so far
+
+    Returns:
+        The (possibly partial) strategy text, or None if it never started
+    """
+    key = text.find('"strategy"')
+    if key < 0:
+        return None
+    colon = text.find(':', key + len('"strategy"'))
+    start = text.find('"', colon + 1) if colon >= 0 else -1
+    if start < 0:
+        return None
+    try:
+        strategy, _ = json.JSONDecoder().raw_decode(text, start)
+        return strategy
+    except json.JSONDecodeError:
+        pass
+    # Unterminated: close the string, dropping a trailing partial escape
+    fragment = text[start:]
+    for end in range(len(fragment), max(len(fragment) - 6, 0), -1):
+        try:
+            return json.loads(fragment[:end] + '"')
+        except json.JSONDecodeError:
+            continue
+    return fragment[1:]
+
+
+def merge_suggestions(parts: list) -> dict:
+    """
+    Merge per-chunk table suggestions into one result.
+
+    Tables with the same name from different chunks are kept apart with a
+    numeric suffix; columns are deduplicated within a table.
+    """
+    merged = {}
+    for suggestion in parts:
+        for name, table_columns in suggestion.items():
+            key, n = name, 2
+            while key in merged:
+                key, n = f"{name}_{n}", n + 1
+            merged[key] = list(dict.fromkeys(table_columns))
+    return merged
+
+
+def suggest_tables_chunked(columns: list, send, graph=None,
+                           max_tokens: int = PROMPT_CHUNK_TOKENS,
+                           max_workers: int = MAX_CONCURRENT_REQUESTS) -> tuple:
+    """
+    Request table suggestions per schema chunk concurrently and merge them.
+
+    Args:
+        columns: List of "table.column" strings
+        send: Function prompt -> response text (None on failure)
+        graph: Optional ERGraph for FK-aware chunking
+        max_tokens: Token budget per chunk
+        max_workers: Concurrent requests
+
+    Returns:
+        (merged suggestions or None, report dict with chunks, prompt_tokens,
+         failed_chunks, seconds)
+    """
+    start = time.perf_counter()
+    chunks = chunk_schema(columns, graph, max_tokens)
+    prompts = [json_prompt('\n'.join(lines), partial=len(chunks) > 1) for lines in chunks]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        responses = list(pool.map(send, prompts))
+
+    parts, failed = [], 0
+    for response in responses:
+        try:
+            parts.append(parse_table_json(response))
+        except (TypeError, AttributeError, json.JSONDecodeError):
+            failed += 1
+    report = {
+        'chunks': len(chunks),
+        'prompt_tokens': sum(estimate_tokens(p) for p in prompts),
+        'failed_chunks': failed,
+        'seconds': time.perf_counter() - start
+    }
+    return (merge_suggestions(parts) if parts else None), report
+
+
+def token_report(columns: list, graph=None, max_tokens: int = PROMPT_CHUNK_TOKENS) -> dict:
+    """Estimated prompt tokens of the previous prompts vs the compact ones."""
+    legacy = [estimate_tokens(p) for p in legacy_prompts(columns)]
+    chunks = chunk_schema(columns, graph, max_tokens)
+    compact_json = [estimate_tokens(json_prompt('\n'.join(c), len(chunks) > 1)) for c in chunks]
+    compact_detail = estimate_tokens(detail_prompt(summary_schema(columns, graph, max_tokens)))
+    return {
+        'legacy_tokens': sum(legacy),
+        'compact_tokens': sum(compact_json) + compact_detail,
+        'chunks': len(chunks),
+        'largest_chunk_tokens': max(compact_json, default=0)
+    }
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    import os
+    from er_graph import load_er_graph
+
+    print("=" * 70)
+    print(" Compact Chunked Prompt Builder")
+    print("=" * 70)
+
+    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
+        columns = json.load(f)
+    graph = load_er_graph(DB_PATH) if os.path.exists(DB_PATH) else None
+
+    print(compact_schema(columns, graph))
+    report = token_report(columns, graph)
+    print(f"\n✅ Previous prompts: ~{report['legacy_tokens']:,} tokens")
+    print(f"✅ Compact prompts:  ~{report['compact_tokens']:,} tokens "
+          f"({1 - report['compact_tokens'] / max(report['legacy_tokens'], 1):.0%} fewer), "
+          f"{report['chunks']} chunk(s), largest ~{report['largest_chunk_tokens']:,} tokens")
+
+
+if __name__ == "__main__":
+    main()
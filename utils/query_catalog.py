@@ -0,0 +1,476 @@
+"""
+Query Catalog Generator (Module 4 / Step G)
+===========================================
+Generates the catalog of query patterns the Cassandra design has to
+serve, from the ER graph built by er_graph.py:
+
+    Type 1: PK lookup          "Get album by AlbumId"
+    Type 2: FK traversal (1:N) "Get tracks by album"
+    Type 3: M:N traversal      "Get tracks by playlist" (via playlist_track)
+    Type 4: Deep hierarchy     "Get tracks by artist" (tracks -> albums -> artists);
+                               maximal chains only, capped per table
+    Type 5: Cluster join       tables grouped by the embedding clusters,
+                               joined along their shortest join path
+    Type 6: Range query        "Get invoices by InvoiceDate range"
+    Type 7: Aggregation        "Aggregate invoice_items per invoices"
+
+Every entry describes the rows returned ('target'), the restricted
+columns ('filter') and the join path from the target to the filter
+table, and carries the executable SQLite statement ('sql').
+
+The cost of each pattern is then measured on the source database:
+EXPLAIN QUERY PLAN plus a few timed executions with parameter values
+sampled from the data, run concurrently over read-only connections.
+The measured cost is attached to every entry ('cost'), so query
+prioritization can weight patterns by what they actually cost instead
+of by query type alone.
+
+Usage:
+    python query_catalog.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import json
+import time
+import sqlite3
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from er_graph import load_er_graph, MAX_PATH_DEPTH
+from type_inference import declared_affinity
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# Embedding-based table groupings (optional, adds Type 5 entries)
+EMBEDDING_TABLES_PATH = "../output/embedding_suggested_tables.json"
+
+# Deep-hierarchy patterns kept per start table and in total (the number of
+# FK chains grows exponentially with depth on dense schemas)
+MAX_HIERARCHIES_PER_TABLE = 20
+MAX_HIERARCHIES = 5000
+
+OUTPUT_JSON_PATH = "../output/query_catalog.json"
+
+# Measure EXPLAIN QUERY PLAN + timed executions for every pattern
+MEASURE_COST = True
+
+# Timed executions per pattern (each with its own sampled parameters)
+COST_SAMPLES = 5
+
+# Concurrent read-only connections
+COST_WORKERS = 8
+
+# Executions running longer than this are interrupted
+QUERY_TIMEOUT_SECONDS = 2.0
+
+# Width of sampled ranges, as a fraction of a column's sampled values
+RANGE_FRACTION = 0.05
+
+# Affinities eligible for range patterns / SUM measures
+RANGE_AFFINITIES = ('DATETIME', 'INTEGER', 'REAL', 'NUMERIC')
+MEASURE_AFFINITIES = ('INTEGER', 'REAL', 'NUMERIC')
+
+# ============================================================
+# CATALOG GENERATION
+# ============================================================
+
+def _step(graph, edge_id: int, upward: bool) -> dict:
+    """Describe walking one FK edge, child -> parent (upward) or back down."""
+    e = graph.edges[edge_id]
+    child, parent = graph.tables[e['child']], graph.tables[e['parent']]
+    if upward:
+        return {'from_table': child, 'from_columns': e['child_columns'],
+                'to_table': parent, 'to_columns': e['parent_columns']}
+    return {'from_table': parent, 'from_columns': e['parent_columns'],
+            'to_table': child, 'to_columns': e['child_columns']}
+
+
+def _path_steps(graph, start: int, edges: list) -> list:
+    """Orient a list of edges as a walk starting at table id `start`."""
+    steps = []
+    node = start
+    for e in edges:
+        edge = e if isinstance(e, dict) else graph.edges[e]
+        upward = edge['child'] == node
+        steps.append(_step(graph, edge['id'], upward))
+        node = edge['parent'] if upward else edge['child']
+    return steps
+
+
+def generate_query_catalog(graph, max_depth: int = MAX_PATH_DEPTH, clusters: dict = None) -> list:
+    """
+    Generate all query patterns for an ER graph.
+
+    Args:
+        graph: ERGraph from load_er_graph()
+        max_depth: Longest FK chain for deep-hierarchy patterns
+        clusters: Optional generated table -> list of "table.column"
+            (adds cluster-join patterns)
+
+    Returns:
+        List of catalog entries
+    """
+    catalog = []
+
+    def add(query_type, description, target, filter_table, filter_columns, steps,
+            operator='eq', aggregate=None):
+        entry = {
+            'id': f"Q{len(catalog) + 1:04d}",
+            'type': query_type,
+            'description': description,
+            'target': target,
+            'filter': {'table': filter_table, 'columns': list(filter_columns), 'operator': operator},
+            'join_path': steps,
+            'tables': sorted({target, filter_table} | {s['to_table'] for s in steps})
+        }
+        if aggregate:
+            entry['aggregate'] = aggregate
+        entry['sql'] = build_sql(entry)
+        catalog.append(entry)
+
+    # Key columns (PK or FK) are not range / measure candidates
+    key_columns = {table: set(graph.primary_keys.get(table, [])) for table in graph.tables}
+    for e in graph.edges:
+        key_columns[graph.tables[e['child']]].update(e['child_columns'])
+
+    def non_key_columns(table, affinities):
+        types = graph.column_types.get(table, {})
+        return [c for c in graph.columns[table]
+                if c not in key_columns[table] and declared_affinity(types.get(c)) in affinities]
+
+    # Type 1: PK lookups
+    for table in graph.tables:
+        pk = graph.primary_keys.get(table)
+        if pk:
+            add('pk_lookup', f"Get {table} by {', '.join(pk)}", table, table, pk, [])
+
+    # Type 2: FK traversals (children of one parent row)
+    for e in graph.edges:
+        child, parent = graph.tables[e['child']], graph.tables[e['parent']]
+        if child == parent:
+            add('fk_traversal', f"Get {child} reporting to {child} ({', '.join(e['child_columns'])})",
+                child, child, e['child_columns'], [])
+        else:
+            add('fk_traversal', f"Get {child} by {parent}", child, child, e['child_columns'], [])
+
+    # Type 3: M:N traversals through bridge tables, in both directions
+    for bridge, edges in graph.bridge_tables():
+        bridge_name = graph.tables[bridge]
+        for a in edges:
+            for b in edges:
+                if a == b:
+                    continue
+                ea, eb = graph.edges[a], graph.edges[b]
+                target = graph.tables[eb['parent']]
+                source = graph.tables[ea['parent']]
+                add('mn_traversal', f"Get {target} by {source} via {bridge_name}",
+                    target, bridge_name, ea['child_columns'],
+                    [_step(graph, b, upward=False)])
+
+    # Type 4: deep hierarchies (chains of 2+ FKs, filter on the top ancestor).
+    # Only maximal chains (not a prefix of a longer one, as in
+    # data_migrator.plan_strategies), capped per table and in total
+    hierarchies = 0
+    for t, table in enumerate(graph.tables):
+        if hierarchies >= MAX_HIERARCHIES:
+            break
+        chains = [tuple(c) for c in graph.hierarchy_paths(t, max_depth) if len(c) >= 2]
+        prefixes = {c[:k] for c in chains for k in range(2, len(c))}
+        maximal = [c for c in chains if c not in prefixes]
+        for chain in maximal[:min(MAX_HIERARCHIES_PER_TABLE, MAX_HIERARCHIES - hierarchies)]:
+            hierarchies += 1
+            last = graph.edges[chain[-1]]
+            filter_table = graph.tables[last['child']]
+            ancestor = graph.tables[last['parent']]
+            add('deep_hierarchy', f"Get {table} by {ancestor}",
+                table, filter_table, last['child_columns'],
+                _path_steps(graph, t, chain[:-1]))
+
+    # Type 5: cluster joins along shortest join paths (the BFS trees of all
+    # source tables are built once up front)
+    cluster_sources = {name: sorted({c.split('.')[0] for c in columns if c.split('.')[0] in graph.table_id})
+                       for name, columns in (clusters or {}).items()}
+    graph.precompute_bfs_trees({a for sources in cluster_sources.values() for a in sources[:-1]})
+    for cluster_table, sources in cluster_sources.items():
+        for i, a in enumerate(sources):
+            for b in sources[i + 1:]:
+                path = graph.shortest_join_path(a, b)
+                if not path:
+                    continue
+                pk = graph.primary_keys.get(b) or graph.columns[b][:1]
+                add('cluster_join', f"Get {a} by {b} (cluster {cluster_table})",
+                    a, b, pk, _path_steps(graph, graph.table_id[a], path))
+
+    # Type 6: range queries on temporal / numeric non-key columns
+    for table in graph.tables:
+        for column in non_key_columns(table, RANGE_AFFINITIES):
+            add('range', f"Get {table} by {column} range", table, table, [column], [],
+                operator='range')
+
+    # Type 7: aggregations of children per parent
+    for e in graph.edges:
+        child, parent = graph.tables[e['child']], graph.tables[e['parent']]
+        if child == parent:
+            continue
+        measures = ['COUNT(*)'] + [f'SUM(t0."{c}")' for c in non_key_columns(child, MEASURE_AFFINITIES)]
+        add('aggregation', f"Aggregate {child} per {parent}", child, child, [], [],
+            operator=None, aggregate={'group_by': e['child_columns'], 'measures': measures})
+
+    return catalog
+
+
+def build_sql(entry: dict) -> str:
+    """
+    Build the SQLite statement of a catalog entry (parameters as '?').
+
+    The target is aliased t0 and each join step adds t1, t2, ...; the
+    filter applies to the last table of the join path.
+
+    Args:
+        entry: Catalog entry
+
+    Returns:
+        SQL string
+    """
+    steps = entry['join_path']
+    sql = f'FROM "{entry["target"]}" t0'
+    for i, step in enumerate(steps, start=1):
+        on = ' AND '.join(f't{i - 1}."{a}" = t{i}."{b}"'
+                          for a, b in zip(step['from_columns'], step['to_columns']))
+        sql += f' JOIN "{step["to_table"]}" t{i} ON {on}'
+
+    alias = f"t{len(steps)}"
+    conditions = []
+    for column in entry['filter']['columns']:
+        if entry['filter']['operator'] == 'range':
+            conditions.append(f'{alias}."{column}" BETWEEN ? AND ?')
+        else:
+            conditions.append(f'{alias}."{column}" = ?')
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+
+    aggregate = entry.get('aggregate')
+    if aggregate:
+        group_by = ', '.join(f't0."{c}"' for c in aggregate['group_by'])
+        return f"SELECT {group_by}, {', '.join(aggregate['measures'])} {sql} GROUP BY {group_by}"
+    return f"SELECT t0.* {sql}"
+
+
+# ============================================================
+# COST MEASUREMENT
+# ============================================================
+
+def _sample_values(conn, table: str, columns: list, k: int) -> list:
+    """
+    Sample up to k non-null value tuples of columns, spread over the
+    table by rowid so no full scan or ORDER BY RANDOM() is needed.
+    """
+    cols = ', '.join(f'"{c}"' for c in columns)
+    not_null = ' AND '.join(f'"{c}" IS NOT NULL' for c in columns)
+    cursor = conn.cursor()
+    try:
+        lo, hi = cursor.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{table}"').fetchone()
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID table
+        return cursor.execute(f'SELECT {cols} FROM "{table}" WHERE {not_null} LIMIT {k}').fetchall()
+    if lo is None:
+        return []
+    values = []
+    for i in range(k):
+        rowid = lo + (hi - lo) * i // max(1, k - 1)
+        row = cursor.execute(f'SELECT {cols} FROM "{table}" WHERE rowid >= ? AND {not_null} LIMIT 1',
+                             (rowid,)).fetchone()
+        if row is not None:
+            values.append(row)
+    return values
+
+
+def _parameter_sets(conn, entry: dict, samples: int) -> list:
+    """Sampled parameter tuples for one catalog entry."""
+    columns = entry['filter']['columns']
+    if not columns:
+        return [()] * samples
+    table = entry['filter']['table']
+    if entry['filter']['operator'] != 'range':
+        return _sample_values(conn, table, columns, samples)
+
+    # Ranges: sort a larger sample and pair values RANGE_FRACTION apart
+    values = sorted({row[0] for row in _sample_values(conn, table, columns, 20 * samples)},
+                    key=lambda v: (isinstance(v, str), v))
+    if not values:
+        return []
+    width = max(1, int(len(values) * RANGE_FRACTION))
+    last = max(0, len(values) - 1 - width)
+    return [(values[last * i // max(1, samples - 1)],
+             values[min(len(values) - 1, last * i // max(1, samples - 1) + width)])
+            for i in range(samples)]
+
+
+def measure_query_costs(catalog: list, db_path: str, samples: int = COST_SAMPLES,
+                        max_workers: int = COST_WORKERS,
+                        timeout: float = QUERY_TIMEOUT_SECONDS) -> list:
+    """
+    Measure every catalog entry on the source database and attach the
+    result as entry['cost']:
+
+        plan          EXPLAIN QUERY PLAN detail lines
+        scans         plan lines that scan a whole table or index
+        temp_btree    True if SQLite sorts / groups with a temp B-tree
+        samples       timed executions
+        median_ms, mean_ms, max_ms, avg_rows
+        timed_out     executions interrupted after `timeout` seconds
+        relative_cost median_ms / cheapest median in the catalog
+
+    Entries are measured concurrently, one read-only connection per
+    worker thread (sqlite3 releases the GIL while a statement runs).
+
+    Args:
+        catalog: Output of generate_query_catalog()
+        db_path: Path to the SQLite database
+        samples: Timed executions per entry
+        max_workers: Concurrent connections
+        timeout: Per-execution time limit in seconds
+
+    Returns:
+        The same catalog, with 'cost' set on every entry
+    """
+    local = threading.local()
+    connections = []
+    lock = threading.Lock()
+
+    def connection():
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            # Closed from the main thread once the pool has shut down
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            local.deadline = float('inf')
+            conn.set_progress_handler(lambda: time.perf_counter() > local.deadline, 1000)
+            local.conn = conn
+            with lock:
+                connections.append(conn)
+        return conn
+
+    def measure(entry):
+        conn = connection()
+        cursor = conn.cursor()
+        params = _parameter_sets(conn, entry, samples)
+        explain_params = params[0] if params else (None,) * entry['sql'].count('?')
+        plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {entry['sql']}", explain_params)]
+
+        timings, rows, timed_out = [], [], 0
+        for p in params:
+            local.deadline = time.perf_counter() + timeout
+            start = time.perf_counter()
+            try:
+                cursor.execute(entry['sql'], p)
+                n = 0
+                while True:
+                    batch = cursor.fetchmany(1000)
+                    if not batch:
+                        break
+                    n += len(batch)
+            except sqlite3.OperationalError:
+                timed_out += 1
+                n = None
+            finally:
+                local.deadline = float('inf')
+            timings.append((time.perf_counter() - start) * 1000)
+            if n is not None:
+                rows.append(n)
+
+        return {
+            'plan': plan,
+            'scans': [line for line in plan if line.startswith('SCAN')],
+            'temp_btree': any('TEMP B-TREE' in line for line in plan),
+            'samples': len(timings),
+            'median_ms': statistics.median(timings) if timings else None,
+            'mean_ms': statistics.fmean(timings) if timings else None,
+            'max_ms': max(timings) if timings else None,
+            'avg_rows': statistics.fmean(rows) if rows else 0.0,
+            'timed_out': timed_out
+        }
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            costs = list(pool.map(measure, catalog))
+    finally:
+        for conn in connections:
+            conn.close()
+
+    measured = [c['median_ms'] for c in costs if c['median_ms']]
+    cheapest = min(measured) if measured else None
+    for entry, cost in zip(catalog, costs):
+        cost['relative_cost'] = cost['median_ms'] / cheapest if cost['median_ms'] and cheapest else None
+        entry['cost'] = cost
+    return catalog
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Query Catalog Generator")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    graph = load_er_graph(DB_PATH)
+    print(f"✅ ER graph: {len(graph.tables)} tables, {len(graph.edges)} FKs "
+          f"({time.perf_counter() - start:.3f}s)")
+
+    clusters = None
+    if os.path.exists(EMBEDDING_TABLES_PATH):
+        with open(EMBEDDING_TABLES_PATH, 'r', encoding='utf-8') as f:
+            clusters = json.load(f)
+
+    start = time.perf_counter()
+    catalog = generate_query_catalog(graph, MAX_PATH_DEPTH, clusters)
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for entry in catalog:
+        counts[entry['type']] = counts.get(entry['type'], 0) + 1
+    print(f"✅ Generated {len(catalog)} query patterns in {elapsed:.3f}s")
+    for query_type, n in counts.items():
+        print(f"   {query_type:<16} {n}")
+
+    if MEASURE_COST:
+        start = time.perf_counter()
+        measure_query_costs(catalog, DB_PATH)
+        wall = time.perf_counter() - start
+        busy = sum((e['cost']['mean_ms'] or 0) * e['cost']['samples'] for e in catalog) / 1000
+        print(f"✅ Measured costs in {wall:.2f}s wall ({busy:.2f}s of query time, "
+              f"{COST_WORKERS} read-only connections)")
+
+    print("\n Sample patterns:")
+    for entry in catalog[::max(1, len(catalog) // 12)]:
+        path = ' -> '.join([entry['target']] + [s['to_table'] for s in entry['join_path']])
+        print(f"   [{entry['id']}] {entry['description']:<45} {path}")
+
+    if MEASURE_COST:
+        print("\n Most expensive patterns:")
+        ranked = sorted(catalog, key=lambda e: e['cost']['median_ms'] or 0, reverse=True)
+        for entry in ranked[:10]:
+            cost = entry['cost']
+            flags = ', '.join(filter(None, ['scan' if cost['scans'] else '',
+                                            'temp b-tree' if cost['temp_btree'] else '',
+                                            'timeout' if cost['timed_out'] else '']))
+            print(f"   [{entry['id']}] {entry['description']:<45} "
+                  f"{cost['median_ms']:>8.3f} ms  {cost['avg_rows']:>8.1f} rows  {flags}")
+
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=2)
+    print(f"\n✅ Query catalog saved to: {OUTPUT_JSON_PATH}")
+
+
+if __name__ == "__main__":
+    main()
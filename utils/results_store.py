@@ -0,0 +1,327 @@
+"""
+Results Store
+=============
+Local SQLite database that keeps every analysis run instead of letting
+each run overwrite the loose files in ../output/:
+
+    runs             one row per run (database, script, model, parameters)
+    columns          the run's schema columns, with the embedding as a
+                     compact float32 BLOB
+    designs          proposed Cassandra tables (source 'embedding' or
+                     'gemini'): one row per (table, column)
+    documents        CQL schema, Gemini strategy text, comparison details
+    metrics          numeric metrics (comparison scores, timings, ...)
+
+All lookup paths are indexed (database, column name, design source,
+metric name), so consumers can query across thousands of runs and
+databases without re-parsing JSON. The previous files remain available
+through export_run().
+
+Usage:
+    python results_store.py              # list recorded runs
+    python results_store.py <run id>     # export a run to ../output/
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import numpy as np
+from datetime import datetime, timezone
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+RESULTS_DB_PATH = "../output/results.db"
+
+EXPORT_DIR = "../output"
+
+# File names written by export_run() (same names the scripts write)
+EXPORT_FILES = {
+    'embedding': "embedding_suggested_tables.json",
+    'gemini': "gemini_suggested_tables.json",
+    'cql': "cassandra_schema.cql",
+    'strategy': "gemini_migration_suggestions.txt",
+    'comparison_results': "comparison_results.json"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    created_at  TEXT NOT NULL,
+    database    TEXT NOT NULL,
+    script      TEXT NOT NULL,
+    model       TEXT,
+    parameters  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_database ON runs(database, created_at);
+
+CREATE TABLE IF NOT EXISTS columns (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    table_name  TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    embedding   BLOB,
+    PRIMARY KEY (run_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_columns_name ON columns(table_name, column_name);
+
+CREATE TABLE IF NOT EXISTS designs (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    source      TEXT NOT NULL,
+    table_index INTEGER NOT NULL,
+    table_name  TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    column_name TEXT NOT NULL,
+    PRIMARY KEY (run_id, source, table_index, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_designs_column ON designs(column_name, source);
+
+CREATE TABLE IF NOT EXISTS documents (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    kind        TEXT NOT NULL,
+    content     TEXT NOT NULL,
+    PRIMARY KEY (run_id, kind)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    value       REAL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name, value);
+"""
+
+# ============================================================
+# STORE
+# ============================================================
+
+def _flatten(values: dict, prefix: str = "") -> dict:
+    """Numeric leaves of a nested dict as {"a.b.c": value}."""
+    flat = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (bool, int, float, np.integer, np.floating)):
+            flat[name] = float(value)
+        elif isinstance(value, (list, tuple)) and value and \
+                all(isinstance(v, (int, float, np.integer, np.floating)) for v in value):
+            flat.update({f"{name}.{i}": float(v) for i, v in enumerate(value)})
+    return flat
+
+
+class ResultsStore:
+    """Indexed SQLite store of analysis runs."""
+
+    def __init__(self, path: str = RESULTS_DB_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------
+    # WRITING
+    # ------------------------------------------------------------
+
+    def start_run(self, database: str, script: str, model: str = None,
+                  parameters: dict = None) -> int:
+        """
+        Record a new run.
+
+        Args:
+            database: Source database path or name
+            script: Script that produced the run
+            model: Embedding / LLM model names, if any
+            parameters: JSON-serializable run parameters
+
+        Returns:
+            Run id
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (created_at, database, script, model, parameters) VALUES (?, ?, ?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(timespec='seconds'), database, script, model,
+                 json.dumps(parameters, default=str) if parameters else None))
+        return cursor.lastrowid
+
+    def add_columns(self, run_id: int, columns: list, embeddings: np.ndarray = None):
+        """Store a run's "table.column" list, optionally with embeddings."""
+        vectors = (np.ascontiguousarray(embeddings, dtype=np.float32)
+                   if embeddings is not None else [None] * len(columns))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO columns VALUES (?, ?, ?, ?, ?)",
+                ((run_id, i, c.partition('.')[0], c.partition('.')[2],
+                  v.tobytes() if v is not None else None)
+                 for i, (c, v) in enumerate(zip(columns, vectors))))
+
+    def add_design(self, run_id: int, source: str, tables: dict):
+        """Store proposed Cassandra tables ({table: [columns]}) of one source."""
+        with self.conn:
+            self.conn.execute("DELETE FROM designs WHERE run_id = ? AND source = ?", (run_id, source))
+            self.conn.executemany(
+                "INSERT INTO designs VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, source, t, table, i, column)
+                 for t, (table, columns) in enumerate(tables.items())
+                 for i, column in enumerate(columns)))
+
+    def add_document(self, run_id: int, kind: str, content):
+        """Store a text document (dicts / lists are stored as JSON)."""
+        if not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (run_id, kind, content))
+
+    def add_metrics(self, run_id: int, metrics: dict, prefix: str = ""):
+        """Store the numeric leaves of a (nested) metrics dict."""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)",
+                                  ((run_id, name, value)
+                                   for name, value in _flatten(metrics, prefix).items()))
+
+    # ------------------------------------------------------------
+    # READING
+    # ------------------------------------------------------------
+
+    def runs(self, database: str = None, script: str = None, limit: int = None) -> list:
+        """Recorded runs, newest first."""
+        query, args = "SELECT id, created_at, database, script, model FROM runs", []
+        filters = []
+        if database:
+            filters.append("database = ?")
+            args.append(database)
+        if script:
+            filters.append("script = ?")
+            args.append(script)
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        query += " ORDER BY id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        keys = ('id', 'created_at', 'database', 'script', 'model')
+        return [dict(zip(keys, row)) for row in self.conn.execute(query, args)]
+
+    def columns(self, run_id: int) -> tuple:
+        """
+        A run's columns and embeddings.
+
+        Returns:
+            (list of "table.column", float32 array or None)
+        """
+        rows = self.conn.execute(
+            "SELECT table_name, column_name, embedding FROM columns WHERE run_id = ? ORDER BY position",
+            (run_id,)).fetchall()
+        columns = [f"{t}.{c}" for t, c, _ in rows]
+        if not rows or rows[0][2] is None:
+            return columns, None
+        return columns, np.frombuffer(b''.join(r[2] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+
+    def design(self, run_id: int, source: str) -> dict:
+        """Proposed tables of one source as {table: [columns]}."""
+        tables = {}
+        for table, column in self.conn.execute(
+                "SELECT table_name, column_name FROM designs WHERE run_id = ? AND source = ? "
+                "ORDER BY table_index, position", (run_id, source)):
+            tables.setdefault(table, []).append(column)
+        return tables
+
+    def document(self, run_id: int, kind: str):
+        """Stored document text, or None."""
+        row = self.conn.execute("SELECT content FROM documents WHERE run_id = ? AND kind = ?",
+                                (run_id, kind)).fetchone()
+        return row[0] if row else None
+
+    def metric_history(self, name: str, database: str = None) -> list:
+        """(run id, created_at, database, value) of one metric across runs."""
+        query = ("SELECT r.id, r.created_at, r.database, m.value FROM metrics m "
+                 "JOIN runs r ON r.id = m.run_id WHERE m.name = ?")
+        args = [name]
+        if database:
+            query += " AND r.database = ?"
+            args.append(database)
+        return self.conn.execute(query + " ORDER BY r.id", args).fetchall()
+
+    # ------------------------------------------------------------
+    # EXPORT
+    # ------------------------------------------------------------
+
+    def export_run(self, run_id: int, output_dir: str = EXPORT_DIR) -> list:
+        """
+        Write a run back out as the files the scripts produce.
+
+        Args:
+            run_id: Run to export
+            output_dir: Target directory
+
+        Returns:
+            List of written paths
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        database = self.conn.execute("SELECT database FROM runs WHERE id = ?", (run_id,)).fetchone()[0]
+        written = []
+
+        def write(name, content):
+            path = os.path.join(output_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written.append(path)
+
+        columns, _ = self.columns(run_id)
+        if columns:
+            write(f"{os.path.basename(database)}_json.json", json.dumps(columns, indent=2))
+        for source in ('embedding', 'gemini'):
+            tables = self.design(run_id, source)
+            if tables:
+                write(EXPORT_FILES[source], json.dumps(tables, indent=2))
+        for kind in ('cql', 'strategy'):
+            content = self.document(run_id, kind)
+            if content is not None:
+                write(EXPORT_FILES[kind], content)
+        content = self.document(run_id, 'comparison_results')
+        if content is not None:
+            write(EXPORT_FILES['comparison_results'], json.dumps(json.loads(content), indent=2))
+        return written
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Results Store")
+    print("=" * 70)
+
+    if not os.path.exists(RESULTS_DB_PATH):
+        print(f"⚠️ No results database at {RESULTS_DB_PATH} yet")
+        return
+
+    with ResultsStore() as store:
+        if len(sys.argv) > 1:
+            for path in store.export_run(int(sys.argv[1])):
+                print(f"✅ Exported {path}")
+            return
+        for run in store.runs(limit=50):
+            print(f" #{run['id']:<5} {run['created_at']}  {run['script']:<28} {run['database']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Schema Model
+============
+Compact model of a schema given as a list of "table.column" strings, shared
+by the clustering, analyzer and comparison stages so they stop re-deriving
+structure from the strings:
+
+    - table and column names are interned and numbered; Table / Column
+      records use __slots__
+    - column -> table id and column -> normalized-name id are int32 numpy
+      arrays, so hot loops (cross-table pair filters, label lookups)
+      compare integers instead of splitting strings
+    - the normalized name used for matching (column part, lowercase,
+      without underscores) is computed once per distinct name
+    - cluster_tables() groups clustered columns into the "<tables>_data"
+      Cassandra tables with one argsort
+
+Usage:
+    from schema_model import SchemaModel
+    schema = SchemaModel(table_columns)
+    cross_table = schema.column_table[i] != schema.column_table[j]
+
+Author: Migration Analysis Tool
+"""
+
+import sys
+import numpy as np
+
+# ============================================================
+# NORMALIZATION
+# ============================================================
+
+_NORMALIZED = {}
+
+
+def normalize_column(name: str) -> str:
+    """Normalize a column name for comparison (no table prefix, lowercase, no underscores)."""
+    normalized = _NORMALIZED.get(name)
+    if normalized is None:
+        normalized = sys.intern(name.rpartition('.')[2].lower().replace('_', ''))
+        _NORMALIZED[name] = normalized
+    return normalized
+
+
+# ============================================================
+# MODEL
+# ============================================================
+
+class Table:
+    """Source table: id, name and its column ids."""
+    __slots__ = ('id', 'name', 'columns')
+
+    def __init__(self, table_id: int, name: str):
+        self.id = table_id
+        self.name = name
+        self.columns = []
+
+
+class Column:
+    """Source column: id, table id, names and normalized-name id."""
+    __slots__ = ('id', 'table', 'name', 'qualified', 'normalized')
+
+    def __init__(self, column_id: int, table: int, name: str, qualified: str, normalized: int):
+        self.id = column_id
+        self.table = table
+        self.name = name
+        self.qualified = qualified
+        self.normalized = normalized
+
+
+class SchemaModel:
+    """Interned tables / columns with array-backed lookups."""
+
+    def __init__(self, columns: list):
+        """
+        Args:
+            columns: List of "table.column" strings (order defines column ids)
+        """
+        self.tables = []
+        self.columns = []
+        self.table_id = {}
+        self.column_id = {}
+        self.normalized_names = []
+        self.normalized_id = {}
+
+        column_table = np.empty(len(columns), dtype=np.int32)
+        column_normalized = np.empty(len(columns), dtype=np.int32)
+        for i, qualified in enumerate(columns):
+            table_name, _, column_name = qualified.partition('.')
+            t = self.table_id.get(table_name)
+            if t is None:
+                t = len(self.tables)
+                self.table_id[sys.intern(table_name)] = t
+                self.tables.append(Table(t, sys.intern(table_name)))
+            normalized = normalize_column(qualified)
+            k = self.normalized_id.get(normalized)
+            if k is None:
+                k = len(self.normalized_names)
+                self.normalized_id[normalized] = k
+                self.normalized_names.append(normalized)
+
+            qualified = sys.intern(qualified)
+            self.columns.append(Column(i, t, sys.intern(column_name), qualified, k))
+            self.tables[t].columns.append(i)
+            self.column_id.setdefault(qualified, i)
+            column_table[i] = t
+            column_normalized[i] = k
+
+        self.column_table = column_table
+        self.column_normalized = column_normalized
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def n_tables(self) -> int:
+        return len(self.tables)
+
+    def table_of(self, column) -> str:
+        """Table name of a column id or "table.column" string."""
+        if isinstance(column, str):
+            column = self.column_id[column]
+        return self.tables[self.column_table[column]].name
+
+    def table_names(self, column_ids) -> list:
+        """Sorted distinct table names of a set of column ids."""
+        return sorted(self.tables[t].name for t in np.unique(self.column_table[np.asarray(column_ids)]))
+
+    def lookup_normalized(self, values: dict, default=-1) -> np.ndarray:
+        """
+        Per-column values looked up by normalized name.
+
+        Args:
+            values: normalized name -> int value
+            default: Value for names not in values
+
+        Returns:
+            int array aligned with the columns
+        """
+        by_name = np.fromiter((values.get(name, default) for name in self.normalized_names),
+                              dtype=np.int64, count=len(self.normalized_names))
+        return by_name[self.column_normalized]
+
+    def cluster_tables(self, labels) -> dict:
+        """
+        Group clustered columns into named Cassandra tables.
+
+        Args:
+            labels: Cluster label per column
+
+        Returns:
+            Dictionary "<sorted source tables>_data" -> list of "table.column",
+            in label order
+        """
+        labels = np.asarray(labels)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        tables = {}
+        for ids in np.split(order, bounds):
+            if len(ids):
+                tables['_'.join(self.table_names(ids)) + "_data"] = [self.columns[i].qualified for i in ids]
+        return tables
@@ -0,0 +1,430 @@
+"""
+Temporal Partition Analyzer
+===========================
+Proposes time-bucketed Cassandra partition keys for temporal tables such
+as the DS2 orders (split into jan_orders.csv ... dec_orders.csv) or
+chinook's invoices:
+
+    1. temporal columns are found from declared types (DATE / DATETIME /
+       TIMESTAMP) and from sampled values that parse as dates; entity
+       columns (customer / foreign-key ids) are candidate partition-key
+       prefixes
+    2. all rows are streamed once in chunks; per chunk, dates are parsed
+       into numpy datetime64 and row counts per (entity, bucket) are
+       computed with np.unique for every granularity at once
+       (none / month / week / day)
+    3. partition sizes (rows x average row bytes x ROW_SCALE) are compared
+       with TARGET_PARTITION_MB / MAX_PARTITION_ROWS, and the coarsest key
+       that fits is recommended, entity-prefixed keys first (a bucket-only
+       key sends all current writes to one partition)
+
+Sources are SQLite tables (DB_PATH) and headerless CSV files whose column
+names and types come from the MySQL build script (DS2_DDL_PATH).
+
+Usage:
+    python temporal_partitions.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import re
+import csv
+import glob
+import json
+import sqlite3
+import numpy as np
+
+from type_inference import declared_affinity
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# DS2 build script (column names / types) and monthly CSV files per table
+DS2_DDL_PATH = "../db/ds2/mysqlds2/build/mysqlds2_create_db.sql"
+DS2_CSV_SOURCES = {
+    'ORDERS': "../db/ds2/data_files/orders/*_orders.csv",
+    'ORDERLINES': "../db/ds2/data_files/orders/*_orderlines.csv",
+}
+
+# Partition size guidance
+TARGET_PARTITION_MB = 100
+MAX_PARTITION_ROWS = 100_000
+
+# Projected growth of the data set (e.g. 1000 for DS2 "large" vs "small")
+ROW_SCALE = 1.0
+
+# Bucket granularities, coarsest first ('none' = no time bucket)
+GRANULARITIES = ['none', 'month', 'week', 'day']
+
+# Rows per streamed chunk
+CHUNK_ROWS = 50_000
+
+# Share of sampled values that must parse as dates for an undeclared column
+DATE_SAMPLE_SHARE = 0.9
+
+OUTPUT_JSON_PATH = "../output/temporal_partitions.json"
+
+_DATE_PREFIX_RE = re.compile(r'^\d{4}[-/]\d{2}[-/]\d{2}')
+_ID_RE = re.compile(r'id$', re.IGNORECASE)
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def parse_mysql_ddl(path: str) -> dict:
+    """
+    Column names, declared types and primary keys from a MySQL build script.
+
+    Returns:
+        table -> {'columns': [(name, type)], 'primary_key': [names]}
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        script = f.read()
+    tables = {}
+    for name, body in re.findall(r'CREATE TABLE\s+`?(\w+)`?\s*\((.*?)\)\s*ENGINE', script, re.S | re.I):
+        columns, primary_key = [], []
+        for line in body.split(',\n'):
+            match = re.match(r'\s*`?(\w+)`?\s+(\w+(?:\(\d+(?:,\d+)?\))?)', line)
+            if not match or match.group(1).upper() in ('PRIMARY', 'KEY', 'INDEX', 'UNIQUE', 'CONSTRAINT'):
+                continue
+            columns.append((match.group(1), match.group(2)))
+            if 'PRIMARY KEY' in line.upper():
+                primary_key.append(match.group(1))
+        tables[name] = {'columns': columns, 'primary_key': primary_key}
+    return tables
+
+
+def csv_chunks(paths: list, chunk_rows: int = CHUNK_ROWS):
+    """Yield lists of rows from headerless CSV files, chunk_rows at a time."""
+    chunk = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def sqlite_chunks(db_path: str, table: str, chunk_rows: int = CHUNK_ROWS):
+    """Yield lists of rows of a SQLite table, chunk_rows at a time."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(f'SELECT * FROM "{table}"')
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+# ============================================================
+# DETECTION
+# ============================================================
+
+def parse_dates(values) -> np.ndarray:
+    """
+    Parse date-like values ("2009/01/27", "2009-01-01 00:00:00") to datetime64[D].
+
+    Unparseable values become NaT.
+    """
+    text = [str(v)[:10].replace('/', '-') if v is not None else 'NaT' for v in values]
+    try:
+        return np.array(text, dtype='datetime64[D]')
+    except ValueError:
+        out = np.full(len(text), np.datetime64('NaT'), dtype='datetime64[D]')
+        for i, value in enumerate(text):
+            try:
+                out[i] = np.datetime64(value, 'D')
+            except ValueError:
+                pass
+        return out
+
+
+def temporal_columns(columns: list, declared_types: dict, sample: list) -> list:
+    """
+    Temporal columns by declared type or by sampled values.
+
+    Args:
+        columns: Column names in row order
+        declared_types: column -> declared type
+        sample: Sample rows
+
+    Returns:
+        List of column names
+    """
+    found = []
+    for i, column in enumerate(columns):
+        if declared_affinity(declared_types.get(column, '')) == 'DATETIME':
+            found.append(column)
+            continue
+        values = [row[i] for row in sample if row[i] not in (None, '')]
+        if values and sum(bool(_DATE_PREFIX_RE.match(str(v))) for v in values) >= DATE_SAMPLE_SHARE * len(values):
+            found.append(column)
+    return found
+
+
+def row_key_columns(table: str, columns: list) -> list:
+    """Id columns named after the table itself (ORDERLINES.ORDERLINEID), used when no PK is declared."""
+    stem = table.split('.')[-1].lower().rstrip('s')
+    return [c for c in columns if _ID_RE.search(c) and c.lower().startswith(stem)]
+
+
+def entity_columns(columns: list, primary_key: list, temporal: list, foreign_keys: list = None) -> list:
+    """
+    Candidate entity (partition-key prefix) columns.
+
+    Foreign-key columns when known, otherwise id-like columns that are not
+    part of the row key.
+    """
+    if foreign_keys:
+        return [c for c in foreign_keys if c in columns and c not in temporal]
+    return [c for c in columns if _ID_RE.search(c) and c not in primary_key and c not in temporal]
+
+
+# ============================================================
+# STREAMED HISTOGRAMS
+# ============================================================
+
+def bucket_ids(dates: np.ndarray, granularity: str) -> np.ndarray:
+    """Integer bucket id per date (weeks start on Monday)."""
+    days = dates.astype('int64')
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return (days + 3) // 7
+    if granularity == 'month':
+        return dates.astype('datetime64[M]').astype('int64')
+    return np.zeros(len(dates), dtype=np.int64)
+
+
+class PartitionHistogram:
+    """Row counts per (entity, time bucket) for several keys, built chunk by chunk."""
+
+    def __init__(self, keys: list):
+        """
+        Args:
+            keys: (entity column or None, temporal column, granularity) tuples
+        """
+        self.keys = keys
+        self.codes = {}             # entity column -> {value: code}
+        self.partials = {key: [] for key in keys}
+
+    def _encode(self, column: str, values: list) -> np.ndarray:
+        mapping = self.codes.setdefault(column, {})
+        uniques, inverse = np.unique(np.asarray([str(v) for v in values]), return_inverse=True)
+        codes = np.fromiter((mapping.setdefault(u, len(mapping)) for u in uniques),
+                            dtype=np.int64, count=len(uniques))
+        return codes[inverse.ravel()]
+
+    def add(self, columns: list, rows: list):
+        """Count one chunk of rows."""
+        position = {c: i for i, c in enumerate(columns)}
+        dates, entities = {}, {}
+        for entity, temporal, _ in self.keys:
+            if temporal not in dates:
+                dates[temporal] = parse_dates([row[position[temporal]] for row in rows])
+            if entity is not None and entity not in entities:
+                entities[entity] = self._encode(entity, [row[position[entity]] for row in rows])
+
+        for key in self.keys:
+            entity, temporal, granularity = key
+            valid = ~np.isnat(dates[temporal])
+            buckets = bucket_ids(dates[temporal][valid], granularity)
+            prefix = entities[entity][valid] if entity is not None else 0
+            combined = (prefix << 32) + (buckets + (1 << 31))
+            uniques, counts = np.unique(combined, return_counts=True)
+            self.partials[key].append((uniques, counts))
+            if len(self.partials[key]) > 16:
+                self.partials[key] = [self._reduce(key)]
+
+    def _reduce(self, key) -> tuple:
+        uniques = np.concatenate([u for u, _ in self.partials[key]])
+        counts = np.concatenate([c for _, c in self.partials[key]])
+        merged, inverse = np.unique(uniques, return_inverse=True)
+        return merged, np.bincount(inverse.ravel(), weights=counts).astype(np.int64)
+
+    def partition_sizes(self, key) -> np.ndarray:
+        """Rows per partition for one key."""
+        if not self.partials[key]:
+            return np.zeros(0, dtype=np.int64)
+        return self._reduce(key)[1]
+
+
+# ============================================================
+# RECOMMENDATION
+# ============================================================
+
+def analyze_table(name: str, columns: list, declared_types: dict, primary_key: list, chunks,
+                  foreign_keys: list = None, row_scale: float = ROW_SCALE) -> dict:
+    """
+    Stream a table once and recommend a bucketed partition key.
+
+    Args:
+        name: Table name
+        columns: Column names in row order
+        declared_types: column -> declared type
+        primary_key: Primary key columns
+        chunks: Iterator of row lists
+        foreign_keys: FK column names, if known
+        row_scale: Projected growth multiplier
+
+    Returns:
+        Report dictionary (None if the table has no temporal column;
+        'recommendation' is None if no temporal value could be bucketed)
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if not first:
+        return None
+    temporal = temporal_columns(columns, declared_types, first[:1000])
+    if not temporal:
+        return None
+    primary_key = primary_key or row_key_columns(name, columns)
+    entities = entity_columns(columns, primary_key, temporal, foreign_keys)
+    keys = [(e, t, g) for t in temporal for e in entities + [None] for g in GRANULARITIES
+            if not (e is None and g == 'none')]
+
+    sample = first[:1000]
+    row_bytes = sum(sum(len(str(v)) for v in row if v is not None) + len(row) for row in sample) / len(sample)
+
+    histogram = PartitionHistogram(keys)
+    histogram.add(columns, first)
+    rows = len(first)
+    for chunk in chunks:
+        histogram.add(columns, chunk)
+        rows += len(chunk)
+
+    limit_bytes = TARGET_PARTITION_MB * 1024 * 1024
+    candidates = []
+    for entity, column, granularity in keys:
+        sizes = histogram.partition_sizes((entity, column, granularity)) * row_scale
+        if not len(sizes):
+            continue
+        max_rows = float(sizes.max())
+        candidates.append({
+            'entity': entity,
+            'temporal_column': column,
+            'granularity': granularity,
+            'partitions': int(len(sizes)),
+            'max_rows': max_rows,
+            'p99_rows': float(np.percentile(sizes, 99)),
+            'mean_rows': float(sizes.mean()),
+            'max_mb': max_rows * row_bytes / 1024 / 1024,
+            'fits': max_rows <= MAX_PARTITION_ROWS and max_rows * row_bytes <= limit_bytes
+        })
+
+    # Entity-prefixed keys first, then the coarsest granularity that fits;
+    # if nothing fits, the key with the smallest largest partition
+    order = {g: i for i, g in enumerate(GRANULARITIES)}
+    ranked = sorted(candidates, key=lambda c: (not c['fits'], c['entity'] is None,
+                                               order[c['granularity']] if c['fits'] else 0,
+                                               c['max_rows']))
+    best = ranked[0] if ranked else None
+    if best:
+        best = dict(best, cql_primary_key=cql_primary_key(best, primary_key))
+
+    return {
+        'table': name,
+        'rows': rows,
+        'avg_row_bytes': row_bytes,
+        'row_scale': row_scale,
+        'temporal_columns': temporal,
+        'entity_columns': entities,
+        'candidates': candidates,
+        'recommendation': best
+    }
+
+
+def cql_primary_key(candidate: dict, primary_key: list) -> str:
+    """CQL PRIMARY KEY clause for a recommended candidate."""
+    partition = []
+    if candidate['entity']:
+        partition.append(candidate['entity'].lower())
+    if candidate['granularity'] != 'none':
+        partition.append(f"{candidate['temporal_column'].lower()}_{candidate['granularity']}")
+    clustering = [candidate['temporal_column'].lower()] + [
+        c.lower() for c in primary_key if c not in (candidate['entity'], candidate['temporal_column'])]
+    return f"PRIMARY KEY (({', '.join(partition)}), {', '.join(clustering)})"
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def _sqlite_tables(db_path: str):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+    for table in tables:
+        info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+        fks = [r[3] for r in conn.execute(f'PRAGMA foreign_key_list("{table}")')]
+        yield (table, [r[1] for r in info], {r[1]: r[2] for r in info},
+               [r[1] for r in sorted(info, key=lambda r: r[5]) if r[5] > 0], fks)
+    conn.close()
+
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Temporal Partition Analyzer")
+    print("=" * 70)
+
+    reports = []
+    if os.path.exists(DS2_DDL_PATH):
+        ddl = parse_mysql_ddl(DS2_DDL_PATH)
+        for table, pattern in DS2_CSV_SOURCES.items():
+            files = sorted(glob.glob(pattern))
+            if table not in ddl or not files:
+                continue
+            columns = [c for c, _ in ddl[table]['columns']]
+            report = analyze_table(f"ds2.{table}", columns, dict(ddl[table]['columns']),
+                                   ddl[table]['primary_key'], csv_chunks(files))
+            if report:
+                reports.append(report)
+
+    if os.path.exists(DB_PATH):
+        for table, columns, declared, primary_key, fks in _sqlite_tables(DB_PATH):
+            report = analyze_table(table, columns, declared, primary_key,
+                                   sqlite_chunks(DB_PATH, table), fks)
+            if report:
+                reports.append(report)
+
+    for report in reports:
+        best = report['recommendation']
+        if best is None:
+            # Declared temporal columns whose values are all null / unparseable
+            print(f"\n⚠️ {report['table']}: no parseable values in "
+                  f"{', '.join(report['temporal_columns'])}, no partition key recommended")
+            continue
+        print(f"\n📦 {report['table']}: {report['rows']:,} rows x {report['row_scale']:g}, "
+              f"~{report['avg_row_bytes']:.0f} B/row, temporal: {', '.join(report['temporal_columns'])}")
+        print(f"   {'Entity':<14} {'Column':<14} {'Bucket':<6} {'Partitions':>10} {'Max rows':>10} "
+              f"{'p99 rows':>9} {'Max MB':>8}")
+        for c in report['candidates']:
+            if c['temporal_column'] != best['temporal_column']:
+                continue
+            print(f"   {c['entity'] or '-':<14} {c['temporal_column']:<14} {c['granularity']:<6} "
+                  f"{c['partitions']:>10,} {c['max_rows']:>10,.0f} {c['p99_rows']:>9,.0f} "
+                  f"{c['max_mb']:>8.2f}{'' if c['fits'] else '  too large'}")
+        status = "✅" if best['fits'] else "⚠️"
+        print(f"{status} Recommended: {best['cql_primary_key']}")
+        if best['entity'] is None:
+            print("⚠️ Bucket-only partition key: all writes of the current bucket hit one partition")
+
+    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=2)
+    print(f"\n✅ Report saved to: {OUTPUT_JSON_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+CQL Column Type Inference
+=========================
+Infers compact CQL column types for the generated Cassandra schema instead
+of declaring every column as text. Two sources of evidence are combined:
+
+    1. The declared SQLite type from PRAGMA table_info (type affinity)
+    2. One sampled scan of each table, which checks the actual values
+       (SQLite does not enforce declared types) and their ranges
+
+Each column is mapped to the narrowest CQL type that fits every sampled
+value (int, bigint, double, decimal, timestamp, date, uuid, boolean,
+blob, text), and the estimated storage saving versus text is reported
+per column and per generated table.
+
+Integer widths are never chosen from the sample alone: tinyint/smallint
+come from the declared type (TINYINT, SMALLINT) or from the full-table
+MIN/MAX of the column (one aggregate query per table, FULL_RANGE_CHECK);
+otherwise integers default to int (bigint when the range needs it).
+
+Usage:
+    python type_inference.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import re
+import json
+import sqlite3
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# Rows sampled per table (evenly spaced over the rowid range)
+SAMPLE_SIZE = 2000
+
+# Read the full-table MIN/MAX of integer columns (one aggregate query per
+# table) to size them; False = size integers from the declared type only
+FULL_RANGE_CHECK = True
+
+# Tables produced by the embedding analysis, used for the savings report
+EMBEDDING_TABLES_PATH = "../output/embedding_suggested_tables.json"
+
+OUTPUT_JSON_PATH = "../output/column_types.json"
+
+# ============================================================
+# TYPE RULES
+# ============================================================
+
+# Approximate serialized size of one value of each CQL type, in bytes.
+# text/blob/decimal/varint are variable: their size is computed from the
+# value plus the vint length prefix the SSTable format stores for them.
+FIXED_TYPE_BYTES = {
+    'boolean': 1, 'tinyint': 1, 'smallint': 2, 'int': 4, 'date': 4,
+    'float': 4, 'bigint': 8, 'double': 8, 'timestamp': 8, 'uuid': 16,
+}
+
+_INT8 = (-2 ** 7, 2 ** 7 - 1)
+_INT16 = (-2 ** 15, 2 ** 15 - 1)
+_INT32 = (-2 ** 31, 2 ** 31 - 1)
+_INT64 = (-2 ** 63, 2 ** 63 - 1)
+_UUID_RE = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+_INTEGER_RE = re.compile(r'^-?[1-9][0-9]*$|^0$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def declared_affinity(declared_type: str) -> str:
+    """
+    Resolve a declared SQLite type to its affinity, using SQLite's own
+    rules (section 3.1 of the datatype documentation), plus a 'DATETIME'
+    hint for date-like declarations.
+
+    Args:
+        declared_type: Type string from PRAGMA table_info (may be empty)
+
+    Returns:
+        One of INTEGER, TEXT, BLOB, REAL, NUMERIC, DATETIME
+    """
+    t = (declared_type or '').upper()
+    if 'INT' in t:
+        return 'INTEGER'
+    if 'CHAR' in t or 'CLOB' in t or 'TEXT' in t:
+        return 'TEXT'
+    if 'BLOB' in t or not t:
+        return 'BLOB'
+    if 'REAL' in t or 'FLOA' in t or 'DOUB' in t:
+        return 'REAL'
+    if 'DATE' in t or 'TIME' in t:
+        return 'DATETIME'
+    return 'NUMERIC'
+
+
+def _declared_scale(declared_type: str) -> int:
+    """Scale s of a NUMERIC(p,s) / DECIMAL(p,s) declaration (0 if absent)."""
+    match = re.search(r'\(\s*\d+\s*,\s*(\d+)\s*\)', declared_type or '')
+    return int(match.group(1)) if match else 0
+
+
+def _vint_size(n: int) -> int:
+    """Bytes used by Cassandra's unsigned vint encoding of n."""
+    return min(9, max(1, (n.bit_length() + 6) // 7))
+
+
+def _decimal_bytes(value: Decimal) -> int:
+    """Serialized size of a CQL decimal: 4-byte scale + unscaled varint."""
+    sign, digits, exponent = value.as_tuple()
+    unscaled = int(''.join(map(str, digits)) or '0')
+    size = 4 + max(1, (unscaled.bit_length() + 8) // 8)
+    return size + _vint_size(size)
+
+
+def _parse_timestamp(value: str):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class _ColumnEvidence:
+    """Accumulates what the sample says about one column."""
+
+    def __init__(self, declared_type: str, is_key: bool = False):
+        self.declared_type = declared_type
+        # Key columns (PK/FK) grow with the data, so they are never
+        # narrowed below int from a snapshot of today's values
+        self.is_key = is_key
+        self.affinity = declared_affinity(declared_type)
+        self.non_null = 0
+        self.nulls = 0
+        self.text_bytes = 0
+        self.int_min = None
+        self.int_max = None
+        self.all_int = True
+        self.all_real = True
+        self.all_bool = True
+        self.all_uuid = True
+        self.all_date = True
+        self.all_timestamp = True
+        self.any_blob = False
+        self.max_scale = 0
+        self.decimal_bytes = 0
+        # (min, max) over the whole table, set by infer_column_types()
+        self.full_range = None
+
+    def add(self, value):
+        if value is None:
+            self.nulls += 1
+            return
+        self.non_null += 1
+        if isinstance(value, bytes):
+            self.any_blob = True
+            self.text_bytes += len(value) + _vint_size(len(value))
+            self.all_int = self.all_real = self.all_bool = False
+            self.all_uuid = self.all_date = self.all_timestamp = False
+            return
+
+        text = str(value)
+        size = len(text.encode('utf-8'))
+        self.text_bytes += size + _vint_size(size)
+
+        integer = None
+        if isinstance(value, int):
+            integer = value
+        elif isinstance(value, str) and _INTEGER_RE.match(value):
+            # Leading zeros (postal codes, phone numbers) must stay text
+            integer = int(value)
+        if integer is not None:
+            self.int_min = integer if self.int_min is None else min(self.int_min, integer)
+            self.int_max = integer if self.int_max is None else max(self.int_max, integer)
+            self.all_bool &= integer in (0, 1)
+        else:
+            self.all_int = False
+            self.all_bool = False
+
+        try:
+            number = Decimal(text) if not isinstance(value, float) else Decimal(repr(value))
+            if not number.is_finite():
+                raise InvalidOperation
+            self.max_scale = max(self.max_scale, -number.as_tuple().exponent)
+            self.decimal_bytes += _decimal_bytes(number)
+        except (InvalidOperation, ValueError):
+            self.all_real = False
+
+        if isinstance(value, str):
+            self.all_uuid &= bool(_UUID_RE.match(value))
+            self.all_date &= bool(_DATE_RE.match(value))
+            self.all_timestamp &= _parse_timestamp(value) is not None
+        else:
+            self.all_uuid = self.all_date = self.all_timestamp = False
+
+    def cql_type(self) -> str:
+        """Narrowest CQL type that fits every sampled value."""
+        if self.non_null == 0:
+            # Nothing observed: trust the declaration
+            return {'INTEGER': 'bigint', 'REAL': 'double', 'NUMERIC': 'decimal',
+                    'DATETIME': 'timestamp', 'BLOB': 'blob'}.get(self.affinity, 'text')
+        if self.any_blob:
+            return 'blob'
+        if self.all_int:
+            if self.affinity == 'INTEGER' and 'BOOL' in self.declared_type.upper() and self.all_bool:
+                return 'boolean'
+            if self.affinity == 'NUMERIC' and _declared_scale(self.declared_type) > 0:
+                # NUMERIC affinity stores 2.0 as 2; the declaration keeps the scale
+                return 'decimal'
+            if self.affinity == 'TEXT':
+                # Numeric-looking strings in a text column (codes, ids) keep
+                # their declared type; only the declaration can narrow text
+                return 'text'
+            return self._integer_type()
+        if self.all_real and self.affinity in ('REAL', 'NUMERIC', 'INTEGER'):
+            # NUMERIC(p,s) holds exact money-like values; REAL is binary float
+            return 'double' if self.affinity == 'REAL' else 'decimal'
+        if self.all_uuid:
+            return 'uuid'
+        if self.all_date and self.affinity in ('DATETIME', 'NUMERIC', 'TEXT'):
+            return 'date'
+        if self.all_timestamp and self.affinity in ('DATETIME', 'NUMERIC', 'TEXT'):
+            return 'timestamp'
+        return 'text'
+
+    def _integer_type(self) -> str:
+        """
+        Integer width: below int only from the declaration or the full-table
+        range, since a sample says nothing about the rows it skipped.
+        """
+        low, high = self.full_range or (self.int_min, self.int_max)
+        declared = self.declared_type.upper()
+        if not self.is_key:
+            if 'TINYINT' in declared and _INT8[0] <= low and high <= _INT8[1]:
+                return 'tinyint'
+            if ('SMALLINT' in declared or 'INT2' in declared) and _INT16[0] <= low and high <= _INT16[1]:
+                return 'smallint'
+            if self.full_range is not None:
+                if _INT8[0] <= low and high <= _INT8[1]:
+                    return 'tinyint'
+                if _INT16[0] <= low and high <= _INT16[1]:
+                    return 'smallint'
+        if _INT32[0] <= low and high <= _INT32[1]:
+            return 'int'
+        if _INT64[0] <= low and high <= _INT64[1]:
+            return 'bigint'
+        return 'varint'
+
+    def typed_bytes(self, cql_type: str) -> int:
+        """Estimated bytes for the sampled non-null values under cql_type."""
+        if cql_type in FIXED_TYPE_BYTES:
+            return FIXED_TYPE_BYTES[cql_type] * self.non_null
+        if cql_type == 'decimal':
+            return self.decimal_bytes
+        if cql_type == 'varint':
+            low, high = self.full_range or (self.int_min, self.int_max)
+            bits = max(abs(low), abs(high)).bit_length()
+            size = (bits + 8) // 8
+            return (size + _vint_size(size)) * self.non_null
+        return self.text_bytes
+
+
+# ============================================================
+# INFERENCE
+# ============================================================
+
+def _sample_rows(cursor, table: str, sample_size: int):
+    """
+    Yield up to ~sample_size rows spread evenly over the table, reading
+    it in a single pass (rowid stride); WITHOUT ROWID tables fall back to
+    the first sample_size rows.
+    """
+    try:
+        cursor.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{table}"')
+        lo, hi = cursor.fetchone()
+        if lo is None:
+            return
+        step = max(1, (hi - lo + 1) // sample_size)
+        cursor.execute(f'SELECT * FROM "{table}" WHERE (rowid - ?) % ? = 0', (lo, step))
+    except sqlite3.OperationalError:
+        cursor.execute(f'SELECT * FROM "{table}" LIMIT ?', (sample_size,))
+    yield from cursor
+
+
+def _read_full_ranges(cursor, table: str, columns: list, evidence: list):
+    """
+    Set full_range on integer-looking columns from one MIN/MAX query.
+
+    A column whose MIN or MAX is not an integer (SQLite sorts text above
+    numbers) holds values the sample missed and keeps the sample range.
+    """
+    targets = [(name, ev) for name, ev in zip(columns, evidence)
+               if ev.non_null and ev.all_int and ev.affinity in ('INTEGER', 'NUMERIC')]
+    if not targets:
+        return
+    selects = ', '.join(f'MIN("{name}"), MAX("{name}")' for name, _ in targets)
+    cursor.execute(f'SELECT {selects} FROM "{table}"')
+    row = cursor.fetchone()
+    for k, (_, ev) in enumerate(targets):
+        low, high = row[2 * k], row[2 * k + 1]
+        if isinstance(low, int) and isinstance(high, int):
+            ev.full_range = (low, high)
+
+
+def infer_column_types(db_path: str, sample_size: int = SAMPLE_SIZE, tables: list = None,
+                       full_range_check: bool = FULL_RANGE_CHECK) -> dict:
+    """
+    Infer a CQL type for every column of a SQLite database.
+
+    Args:
+        db_path: Path to the SQLite database
+        sample_size: Rows sampled per table
+        tables: Only these tables (default: all user tables)
+        full_range_check: Size integer columns from their full-table MIN/MAX
+
+    Returns:
+        Dictionary of "table.column" -> {
+            'declared_type', 'cql_type', 'sampled', 'nulls',
+            'avg_text_bytes', 'avg_typed_bytes'
+        }
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.cursor()
+    if tables is None:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+        tables = [row[0] for row in cursor.fetchall()]
+
+    result = {}
+    for table in tables:
+        cursor.execute(f"PRAGMA table_info({table})")
+        info = cursor.fetchall()
+        cursor.execute(f"PRAGMA foreign_key_list({table})")
+        fk_columns = {row[3] for row in cursor.fetchall()}
+        evidence = [_ColumnEvidence(row[2], is_key=row[5] > 0 or row[1] in fk_columns)
+                    for row in info]
+        for row in _sample_rows(cursor, table, sample_size):
+            for ev, value in zip(evidence, row):
+                ev.add(value)
+        if full_range_check:
+            _read_full_ranges(cursor, table, [row[1] for row in info], evidence)
+
+        for row, ev in zip(info, evidence):
+            cql_type = ev.cql_type()
+            n = max(ev.non_null, 1)
+            result[f"{table}.{row[1]}"] = {
+                'declared_type': row[2],
+                'cql_type': cql_type,
+                'sampled': ev.non_null + ev.nulls,
+                'nulls': ev.nulls,
+                'avg_text_bytes': ev.text_bytes / n,
+                'avg_typed_bytes': ev.typed_bytes(cql_type) / n
+            }
+
+    conn.close()
+    return result
+
+
+def estimate_table_savings(tables: dict, column_types: dict) -> dict:
+    """
+    Estimate per-row storage of generated tables with text vs. inferred types.
+
+    Args:
+        tables: Dictionary of generated table name -> list of "table.column"
+        column_types: Output of infer_column_types()
+
+    Returns:
+        Dictionary of table name -> {'text_bytes', 'typed_bytes', 'saving'}
+    """
+    report = {}
+    for table_name, columns in tables.items():
+        text_bytes = typed_bytes = 0.0
+        for col in columns:
+            info = column_types.get(col)
+            if info is None:
+                continue
+            text_bytes += info['avg_text_bytes']
+            typed_bytes += info['avg_typed_bytes']
+        report[table_name] = {
+            'text_bytes': text_bytes,
+            'typed_bytes': typed_bytes,
+            'saving': 1 - typed_bytes / text_bytes if text_bytes else 0.0
+        }
+    return report
+
+
+def print_savings_report(savings: dict):
+    """Print the per-table storage saving estimate."""
+    print(f"\n{'Cassandra Table':<40} {'text B/row':>11} {'typed B/row':>12} {'Saving':>8}")
+    print("-" * 75)
+    total_text = total_typed = 0.0
+    for name, s in savings.items():
+        total_text += s['text_bytes']
+        total_typed += s['typed_bytes']
+        print(f"{name:<40} {s['text_bytes']:>11.1f} {s['typed_bytes']:>12.1f} {s['saving']:>8.1%}")
+    if total_text:
+        print("-" * 75)
+        print(f"{'TOTAL':<40} {total_text:>11.1f} {total_typed:>12.1f} "
+              f"{1 - total_typed / total_text:>8.1%}")
+    if any(s['saving'] < 0 for s in savings.values()):
+        print("\n⚠️ Negative saving = the typed row is larger: fixed-width types cost more "
+              "than short text values (e.g. a 2-digit id stored as a 4-byte int)")
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" CQL Column Type Inference")
+    print("=" * 70)
+
+    print(f"\n[1/2] Sampling up to {SAMPLE_SIZE} rows per table...")
+    column_types = infer_column_types(DB_PATH)
+    print(f"\n{'Column':<35} {'Declared':<16} {'CQL':<10} {'text B':>7} {'typed B':>8}")
+    print("-" * 80)
+    for col, info in column_types.items():
+        print(f"{col:<35} {info['declared_type']:<16} {info['cql_type']:<10} "
+              f"{info['avg_text_bytes']:>7.1f} {info['avg_typed_bytes']:>8.1f}")
+
+    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(column_types, f, indent=2)
+    print(f"\n✅ Column types saved to: {OUTPUT_JSON_PATH}")
+
+    print("\n[2/2] Estimating storage saving per generated table...")
+    if os.path.exists(EMBEDDING_TABLES_PATH):
+        with open(EMBEDDING_TABLES_PATH, 'r', encoding='utf-8') as f:
+            tables = json.load(f)
+        print_savings_report(estimate_table_savings(tables, column_types))
+    else:
+        print(f"⚠️ {EMBEDDING_TABLES_PATH} not found; run gemini_migration_analyzer.py first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+"""
+Migration Validator (Module 10)
+===============================
+Confirms that exported target data matches the source database without
+diffing full tables.
+
+For every target table:
+    1. Source rows (a SQL query over chinook.db) and exported target rows
+       (a CSV file, one per Cassandra table) are streamed in chunks and
+       hashed in worker processes.
+    2. Each row hash is added (mod 2^64) into a leaf bucket chosen by the
+       hash of the row's key, so the per-table digest is independent of
+       row order and both sides can be hashed in parallel.
+    3. Row counts and root digests are compared.
+    4. When digests differ, a Merkle tree over the leaf buckets (token
+       ranges of the key hash, as in Cassandra's anti-entropy repair) is
+       descended from the root, following only differing subtrees, to
+       find the differing key ranges. Only those ranges are re-read to
+       list the keys that are missing, extra or changed.
+
+Target mapping (optional JSON at MAPPING_PATH):
+    {
+      "tracks_by_album": {
+        "query": "SELECT AlbumId, TrackId, Name FROM tracks",
+        "key": "TrackId",
+        "target_columns": ["albums_AlbumId", "tracks_TrackId", "tracks_Name"]
+      }
+    }
+target_columns are matched to the query columns by position. Without
+them, CSV fields are matched to the query columns by header name (so the
+CSV column order does not matter); the key column is always resolved on
+each side separately. Without a mapping, every source table is expected
+as <table>.csv in EXPORT_DIR with the same columns.
+
+Numbers are normalized (0.99 == '0.99', 2.0 == '2') only in columns the
+source stores as numbers, so text codes like '0012' keep their zeros.
+
+Usage:
+    python validator.py
+
+Author: Migration Analysis Tool
+"""
+
+import os
+import csv
+import json
+import time
+import hashlib
+import sqlite3
+import numpy as np
+from decimal import Decimal, InvalidOperation
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# Directory with one exported CSV per target table
+EXPORT_DIR = "../output/export"
+
+# Optional target -> source mapping (see module docstring)
+MAPPING_PATH = "../output/validation_mapping.json"
+
+# Rows per hashing task
+CHUNK_SIZE = 20_000
+
+# Merkle tree depth: 2^depth leaf key ranges per table
+MERKLE_DEPTH = 12
+
+# Worker processes (None = one per CPU)
+MAX_WORKERS = None
+
+# Differing keys listed per table in the report
+MAX_REPORTED_KEYS = 20
+
+# Source rows inspected to decide which columns are numeric
+NUMERIC_SAMPLE_ROWS = 1000
+
+OUTPUT_JSON_PATH = "../output/validation_report.json"
+
+# ============================================================
+# ROW HASHING
+# ============================================================
+
+def canonical_value(value, numeric: bool = True) -> str:
+    """
+    Canonical text form of a value, so SQLite values and CSV strings
+    compare equal: NULL and '' both map to '', numbers in numeric columns
+    are normalized (0.99 == '0.99', 2.0 == '2'), everything else is its
+    text form.
+
+    Args:
+        value: SQLite value or CSV field
+        numeric: The column holds numbers (False keeps '0012' as is)
+
+    Returns:
+        Canonical string
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return value.hex()
+    text = value if isinstance(value, str) else repr(value) if isinstance(value, float) else str(value)
+    if numeric and text and (text[0].isdigit() or text[0] in '-+.'):
+        try:
+            number = Decimal(text)
+            if number.is_finite():
+                number = number.normalize()
+                return format(number, 'f') if number == number.to_integral() else str(number)
+        except InvalidOperation:
+            pass
+    return text
+
+
+def _hash_text(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def key_leaf(key_text: str, depth: int) -> int:
+    """Leaf bucket (top `depth` bits of the key hash) for a canonical key."""
+    return _hash_text(key_text) >> (64 - depth)
+
+
+def canonical_row(row, numeric: list) -> list:
+    """Canonical values of a row (numeric: per-column flags)."""
+    return [canonical_value(v, n) for v, n in zip(row, numeric)]
+
+
+def _hash_chunk(rows: list, key_index: int, depth: int, numeric: list) -> tuple:
+    """
+    Worker task: hash a chunk of rows into leaf counts and digests.
+
+    Args:
+        rows: List of row tuples
+        key_index: Position of the key column
+        depth: Merkle depth
+        numeric: Per-column flags, True for numeric columns
+
+    Returns:
+        Tuple of (leaf counts, leaf digest sums) as uint64 arrays
+    """
+    n_leaves = 1 << depth
+    leaves = np.empty(len(rows), dtype=np.int64)
+    hashes = np.empty(len(rows), dtype=np.uint64)
+    for i, row in enumerate(rows):
+        canonical = canonical_row(row, numeric)
+        leaves[i] = key_leaf(canonical[key_index], depth)
+        hashes[i] = _hash_text('\x1f'.join(canonical))
+    counts = np.bincount(leaves, minlength=n_leaves).astype(np.uint64)
+    sums = np.zeros(n_leaves, dtype=np.uint64)
+    np.add.at(sums, leaves, hashes)   # wraps mod 2^64: order-independent multiset digest
+    return counts, sums
+
+
+def parallel_leaf_digests(row_batches, key_index: int, depth: int, pool: ProcessPoolExecutor,
+                          max_in_flight: int, numeric: list) -> tuple:
+    """
+    Hash a stream of row batches in the pool, keeping at most
+    max_in_flight batches in memory.
+
+    Args:
+        row_batches: Iterable of lists of row tuples
+        key_index: Position of the key column
+        depth: Merkle depth
+        pool: Process pool
+        max_in_flight: Bound on queued batches
+        numeric: Per-column flags, True for numeric columns
+
+    Returns:
+        Tuple of (leaf counts, leaf digest sums)
+    """
+    n_leaves = 1 << depth
+    counts = np.zeros(n_leaves, dtype=np.uint64)
+    sums = np.zeros(n_leaves, dtype=np.uint64)
+    pending = deque()
+
+    def drain(limit):
+        nonlocal counts, sums
+        while len(pending) > limit:
+            c, s = pending.popleft().result()
+            counts += c
+            sums += s
+
+    for batch in row_batches:
+        pending.append(pool.submit(_hash_chunk, batch, key_index, depth, numeric))
+        drain(max_in_flight)
+    drain(0)
+    return counts, sums
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def source_batches(db_path: str, query: str, chunk_size: int):
+    """Stream a source query in fetchmany() batches over a read-only connection."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(query)
+        while True:
+            batch = cursor.fetchmany(chunk_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        conn.close()
+
+
+def source_columns(db_path: str, query: str) -> list:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return [d[0] for d in conn.execute(f"SELECT * FROM ({query}) LIMIT 0").description]
+    finally:
+        conn.close()
+
+
+def numeric_columns(db_path: str, query: str, sample_rows: int = NUMERIC_SAMPLE_ROWS) -> list:
+    """
+    Per-column flags: True where the sampled source values are all
+    numbers (integer / real storage class).
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(f"SELECT * FROM ({query}) LIMIT ?", (sample_rows,))
+        n = len(cursor.description)
+        seen = [False] * n
+        numeric = [True] * n
+        for row in cursor:
+            for i, value in enumerate(row):
+                if value is None:
+                    continue
+                seen[i] = True
+                if isinstance(value, (str, bytes)):
+                    numeric[i] = False
+        return [s and x for s, x in zip(seen, numeric)]
+    finally:
+        conn.close()
+
+
+def csv_header(csv_path: str) -> list:
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def target_layout(header: list, spec: dict, columns: list, key_index: int) -> tuple:
+    """
+    Field order to read from a target CSV and the key position in it.
+
+    Args:
+        header: CSV header
+        spec: Mapping entry ('key', optional 'target_columns', 'target_key')
+        columns: Source query columns
+        key_index: Key position in the source rows
+
+    Returns:
+        (columns for target_batches() or None for header order, key index)
+    """
+    if spec.get('target_columns'):
+        # Positional mapping: target_columns[i] holds source column i
+        return spec['target_columns'], key_index
+    if set(columns) <= set(header):
+        # Same names: read the CSV in source column order
+        return columns, key_index
+    key = spec.get('target_key') or spec.get('key')
+    return None, header.index(key) if key in header else key_index
+
+
+def target_batches(csv_path: str, columns: list, chunk_size: int):
+    """
+    Stream an exported CSV in batches, reordering fields to `columns`
+    (the header names) when given.
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        order = [header.index(c) for c in columns] if columns else list(range(len(header)))
+        batch = []
+        for row in reader:
+            batch.append(tuple(row[i] for i in order))
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# ============================================================
+# MERKLE TREE
+# ============================================================
+
+def build_merkle_tree(counts: np.ndarray, sums: np.ndarray) -> list:
+    """
+    Build a Merkle tree over leaf buckets.
+
+    Args:
+        counts: Rows per leaf
+        sums: Digest sum per leaf
+
+    Returns:
+        List of levels, levels[0] = leaf hashes, levels[-1] = [root];
+        each hash is 8 bytes
+    """
+    level = [hashlib.blake2b(int(c).to_bytes(8, 'little') + int(s).to_bytes(8, 'little'),
+                             digest_size=8).digest()
+             for c, s in zip(counts, sums)]
+    levels = [level]
+    while len(level) > 1:
+        level = [hashlib.blake2b(level[i] + level[i + 1], digest_size=8).digest()
+                 for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def differing_leaves(source_tree: list, target_tree: list) -> tuple:
+    """
+    Descend two Merkle trees from the root, following only subtrees
+    whose hashes differ.
+
+    Args:
+        source_tree: Levels from build_merkle_tree()
+        target_tree: Levels from build_merkle_tree()
+
+    Returns:
+        Tuple of (differing leaf indices, number of node comparisons)
+    """
+    top = len(source_tree) - 1
+    frontier = [0]
+    comparisons = 0
+    for level in range(top, -1, -1):
+        differing = []
+        for node in frontier:
+            comparisons += 1
+            if source_tree[level][node] != target_tree[level][node]:
+                differing.append(node)
+        if level == 0:
+            return differing, comparisons
+        frontier = [child for node in differing for child in (2 * node, 2 * node + 1)]
+    return [], comparisons
+
+
+def leaf_range(leaf: int, depth: int) -> list:
+    """Key-hash range [start, end) covered by a leaf, as hex strings."""
+    width = 1 << (64 - depth)
+    return [f"{leaf * width:016x}", f"{(leaf + 1) * width - 1:016x}"]
+
+
+def collect_leaf_rows(batches, key_index: int, depth: int, leaves: set, numeric: list) -> dict:
+    """
+    Re-read one side, keeping only rows whose key falls in `leaves`.
+
+    Returns:
+        Dictionary of canonical key -> sorted list of canonical rows
+    """
+    rows = defaultdict(list)
+    for batch in batches:
+        for row in batch:
+            canonical = tuple(canonical_row(row, numeric))
+            if key_leaf(canonical[key_index], depth) in leaves:
+                rows[canonical[key_index]].append(canonical)
+    return {k: sorted(v) for k, v in rows.items()}
+
+
+# ============================================================
+# VALIDATION
+# ============================================================
+
+def default_mapping(db_path: str) -> dict:
+    """One target per source table: <table>.csv holding SELECT * FROM table."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    tables = [row[0] for row in cursor.fetchall()]
+    mapping = {}
+    for table in tables:
+        pk = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[5] == 1]
+        mapping[table] = {'query': f'SELECT * FROM "{table}"', 'key': pk[0] if pk else None}
+    conn.close()
+    return mapping
+
+
+def validate_table(name: str, spec: dict, db_path: str, export_dir: str, pool: ProcessPoolExecutor,
+                   depth: int = MERKLE_DEPTH, chunk_size: int = CHUNK_SIZE,
+                   max_in_flight: int = 8) -> dict:
+    """
+    Validate one target table against its source query.
+
+    Args:
+        name: Target table name (<name>.csv in export_dir)
+        spec: {'query', 'key', optional 'target_columns'}
+        db_path: Source database
+        export_dir: Directory with exported CSVs
+        pool: Process pool for hashing
+        depth: Merkle depth
+        chunk_size: Rows per hashing task
+        max_in_flight: Bound on queued hashing tasks
+
+    Returns:
+        Report dictionary for the table
+    """
+    start = time.perf_counter()
+    csv_path = os.path.join(export_dir, f"{name}.csv")
+    if not os.path.exists(csv_path):
+        return {'status': 'MISSING', 'detail': f"{csv_path} not found"}
+
+    columns = source_columns(db_path, spec['query'])
+    key_index = columns.index(spec['key']) if spec.get('key') in columns else 0
+    numeric = numeric_columns(db_path, spec['query'])
+    header = csv_header(csv_path)
+    target_columns, target_key_index = target_layout(header, spec, columns, key_index)
+    if target_columns is None:
+        # Unmatched header: numeric flags only where the names line up
+        by_name = dict(zip(columns, numeric))
+        target_numeric = [by_name.get(c, False) for c in header]
+    else:
+        target_numeric = numeric
+
+    src_counts, src_sums = parallel_leaf_digests(
+        source_batches(db_path, spec['query'], chunk_size), key_index, depth, pool, max_in_flight,
+        numeric)
+    tgt_counts, tgt_sums = parallel_leaf_digests(
+        target_batches(csv_path, target_columns, chunk_size), target_key_index, depth, pool,
+        max_in_flight, target_numeric)
+
+    source_tree = build_merkle_tree(src_counts, src_sums)
+    target_tree = build_merkle_tree(tgt_counts, tgt_sums)
+    source_rows, target_rows = int(src_counts.sum()), int(tgt_counts.sum())
+
+    report = {
+        'source_rows': source_rows,
+        'target_rows': target_rows,
+        'count_match': source_rows == target_rows,
+        'digest_match': source_tree[-1][0] == target_tree[-1][0],
+        'source_digest': source_tree[-1][0].hex(),
+        'target_digest': target_tree[-1][0].hex(),
+    }
+
+    if not report['digest_match']:
+        leaves, comparisons = differing_leaves(source_tree, target_tree)
+        report['merkle_comparisons'] = comparisons
+        report['differing_ranges'] = [leaf_range(leaf, depth) for leaf in leaves]
+
+        # Only the differing ranges are re-read on both sides
+        wanted = set(leaves)
+        src_rows = collect_leaf_rows(source_batches(db_path, spec['query'], chunk_size),
+                                     key_index, depth, wanted, numeric)
+        tgt_rows = collect_leaf_rows(target_batches(csv_path, target_columns, chunk_size),
+                                     target_key_index, depth, wanted, target_numeric)
+        missing = sorted(set(src_rows) - set(tgt_rows))
+        extra = sorted(set(tgt_rows) - set(src_rows))
+        changed = sorted(k for k in set(src_rows) & set(tgt_rows) if src_rows[k] != tgt_rows[k])
+        report['missing_keys'] = missing[:MAX_REPORTED_KEYS]
+        report['extra_keys'] = extra[:MAX_REPORTED_KEYS]
+        report['changed_keys'] = changed[:MAX_REPORTED_KEYS]
+        report['differing_key_counts'] = {
+            'missing': len(missing), 'extra': len(extra), 'changed': len(changed)
+        }
+
+    report['status'] = 'PASS' if report['count_match'] and report['digest_match'] else 'FAIL'
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def validate(db_path: str = DB_PATH, export_dir: str = EXPORT_DIR, mapping: dict = None,
+             max_workers: int = MAX_WORKERS, depth: int = MERKLE_DEPTH) -> dict:
+    """
+    Validate every target table.
+
+    Args:
+        db_path: Source database
+        export_dir: Directory with exported CSVs
+        mapping: Target mapping (None = default_mapping())
+        max_workers: Worker processes
+        depth: Merkle depth
+
+    Returns:
+        Dictionary of target table -> report
+    """
+    mapping = mapping or default_mapping(db_path)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = 2 * (max_workers or os.cpu_count() or 1)
+        return {
+            name: validate_table(name, spec, db_path, export_dir, pool, depth,
+                                 max_in_flight=in_flight)
+            for name, spec in mapping.items()
+        }
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Migration Validator - Checksums with Merkle Localization")
+    print("=" * 70)
+
+    if not os.path.isdir(EXPORT_DIR):
+        print(f"⚠️ Export directory not found: {EXPORT_DIR}")
+        print("   Export the target tables as CSV first")
+        return
+
+    mapping = None
+    if os.path.exists(MAPPING_PATH):
+        with open(MAPPING_PATH, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        print(f"✅ Loaded mapping for {len(mapping)} target tables")
+
+    start = time.perf_counter()
+    results = validate(DB_PATH, EXPORT_DIR, mapping)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{'Target Table':<30} {'Source':>9} {'Target':>9} {'Digest':>8} {'Ranges':>7}  Status")
+    print("-" * 80)
+    for name, r in results.items():
+        if r['status'] == 'MISSING':
+            print(f"{name:<30} {'':>9} {'':>9} {'':>8} {'':>7}  ⚠️ MISSING")
+            continue
+        ranges = len(r.get('differing_ranges', []))
+        digest = 'match' if r['digest_match'] else 'DIFF'
+        icon = '✅' if r['status'] == 'PASS' else '❌'
+        print(f"{name:<30} {r['source_rows']:>9,} {r['target_rows']:>9,} {digest:>8} {ranges:>7}  "
+              f"{icon} {r['status']}")
+        if r['status'] == 'FAIL':
+            d = r['differing_key_counts']
+            print(f"   missing {d['missing']}, extra {d['extra']}, changed {d['changed']} "
+                  f"(located with {r['merkle_comparisons']} Merkle comparisons)")
+            for label in ('missing_keys', 'extra_keys', 'changed_keys'):
+                if r[label]:
+                    print(f"   {label}: {', '.join(r[label][:5])}")
+
+    passed = sum(1 for r in results.values() if r['status'] == 'PASS')
+    print(f"\n[STAT] {passed}/{len(results)} tables passed in {elapsed:.2f}s")
+
+    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Validation report saved to: {OUTPUT_JSON_PATH}")
+
+
+if __name__ == "__main__":
+    main()
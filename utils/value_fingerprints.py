@@ -0,0 +1,212 @@
+"""
+Value-Sampled Column Fingerprints
+=================================
+Column names alone say little about columns such as Name, Title or
+Composer. This script builds a fingerprint per column from its name plus
+a small sample of its distinct values:
+
+    tracks.Composer: Angus Young, Malcolm Young | Billy Cobham | ...
+
+and the analyzer embeds these instead of the bare names when
+VALUE_FINGERPRINTS is enabled in gemini_migration_analyzer.py.
+
+Profiling cost is capped per table, independent of its row count:
+
+    - each table is read once; tables with more than MAX_SCAN_ROWS rows
+      are read as SCAN_BLOCKS rowid-ordered blocks starting at evenly
+      spread rowids (index seeks, no full scan and no COUNT(*))
+    - distinct values are sampled with a bottom-k hash reservoir: a value
+      is kept if its hash is among the VALUES_PER_COLUMN smallest seen,
+      which is a uniform sample of the distinct values in bounded memory
+      (duplicates of a kept value are free)
+    - values and fingerprints are truncated (MAX_VALUE_CHARS,
+      MAX_FINGERPRINT_CHARS)
+
+Usage:
+    python value_fingerprints.py
+
+Author: Migration Analysis Tool
+"""
+
+import time
+import heapq
+import sqlite3
+import zlib
+
+# ============================================================
+# CONFIGURATION - Modify these variables as needed
+# ============================================================
+
+DB_PATH = "../db/chinook.db"
+
+# Distinct values kept per column
+VALUES_PER_COLUMN = 5
+
+# Rows read per table at most
+MAX_SCAN_ROWS = 20_000
+
+# Blocks the capped rows are spread over for large tables
+SCAN_BLOCKS = 20
+
+# Truncation of single values and whole fingerprints
+MAX_VALUE_CHARS = 40
+MAX_FINGERPRINT_CHARS = 240
+
+# ============================================================
+# SAMPLING
+# ============================================================
+
+class DistinctReservoir:
+    """Bottom-k hash sample of the distinct values of one column."""
+    __slots__ = ('k', 'heap', 'kept')
+
+    def __init__(self, k: int = VALUES_PER_COLUMN):
+        self.k = k
+        self.heap = []          # (-hash, value): the largest kept hash on top
+        self.kept = set()       # hashes in the heap
+
+    def add(self, value: str):
+        h = zlib.crc32(value.encode('utf-8', 'replace'))
+        if h in self.kept:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (-h, value))
+            self.kept.add(h)
+        elif h < -self.heap[0][0]:
+            removed = heapq.heapreplace(self.heap, (-h, value))
+            self.kept.discard(-removed[0])
+            self.kept.add(h)
+
+    def values(self) -> list:
+        """Sampled values, in hash order (stable across runs)."""
+        return [value for _, value in sorted(self.heap, reverse=True)]
+
+
+def _scan_rows(conn, table: str, max_rows: int = MAX_SCAN_ROWS, blocks: int = SCAN_BLOCKS):
+    """
+    Yield at most ~max_rows rows of a table.
+
+    Small tables are read whole; larger ones as rowid-ordered blocks
+    spread over the rowid range. WITHOUT ROWID tables fall back to the
+    first max_rows rows.
+    """
+    try:
+        lo, hi = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{table}"').fetchone()
+    except sqlite3.OperationalError:
+        yield from conn.execute(f'SELECT * FROM "{table}" LIMIT ?', (max_rows,))
+        return
+    if lo is None:
+        return
+    if hi - lo + 1 <= max_rows:
+        yield from conn.execute(f'SELECT * FROM "{table}"')
+        return
+    block_rows = max(1, max_rows // blocks)
+    stride = (hi - lo + 1) // blocks
+    query = f'SELECT * FROM "{table}" WHERE rowid >= ? ORDER BY rowid LIMIT ?'
+    for b in range(blocks):
+        yield from conn.execute(query, (lo + b * stride, block_rows))
+
+
+def sample_table_values(conn, table: str, k: int = VALUES_PER_COLUMN,
+                        max_rows: int = MAX_SCAN_ROWS) -> tuple:
+    """
+    Distinct-value samples of every column of one table.
+
+    Args:
+        conn: SQLite connection
+        table: Table name
+        k: Distinct values per column
+        max_rows: Row cap for the scan
+
+    Returns:
+        ({column: [values]}, rows scanned)
+    """
+    cursor = conn.execute(f'SELECT * FROM "{table}" LIMIT 0')
+    columns = [d[0] for d in cursor.description]
+    reservoirs = [DistinctReservoir(k) for _ in columns]
+    scanned = 0
+    for row in _scan_rows(conn, table, max_rows):
+        scanned += 1
+        for reservoir, value in zip(reservoirs, row):
+            if value is None or isinstance(value, bytes):
+                continue
+            value = str(value).strip()
+            if value:
+                reservoir.add(value[:MAX_VALUE_CHARS])
+    return {c: r.values() for c, r in zip(columns, reservoirs)}, scanned
+
+
+def column_fingerprints(db_path: str, columns: list = None, k: int = VALUES_PER_COLUMN,
+                        max_rows: int = MAX_SCAN_ROWS) -> tuple:
+    """
+    Value samples for "table.column" strings.
+
+    Args:
+        db_path: SQLite database path
+        columns: "table.column" strings (None = every column of the database)
+        k: Distinct values per column
+        max_rows: Row cap per table
+
+    Returns:
+        ({"table.column": [values]}, {table: {'rows': scanned, 'seconds': s}})
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if columns is None:
+            tables = [r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+        else:
+            tables = list(dict.fromkeys(c.partition('.')[0] for c in columns))
+
+        samples, profile = {}, {}
+        for table in tables:
+            start = time.perf_counter()
+            try:
+                values, scanned = sample_table_values(conn, table, k, max_rows)
+            except sqlite3.OperationalError:
+                continue   # not a table of this database
+            profile[table] = {'rows': scanned, 'seconds': time.perf_counter() - start}
+            samples.update({f"{table}.{c}": v for c, v in values.items()})
+    finally:
+        conn.close()
+    return samples, profile
+
+
+def fingerprint_text(column: str, values: list) -> str:
+    """'table.column: v1 | v2 | ...', truncated to MAX_FINGERPRINT_CHARS."""
+    if not values:
+        return column
+    return f"{column}: {' | '.join(values)}"[:MAX_FINGERPRINT_CHARS]
+
+
+def fingerprint_texts(db_path: str, columns: list) -> list:
+    """Fingerprint text per "table.column" (bare name when nothing was sampled)."""
+    samples, _ = column_fingerprints(db_path, columns)
+    return [fingerprint_text(c, samples.get(c, [])) for c in columns]
+
+
+# ============================================================
+# MAIN EXECUTION
+# ============================================================
+
+def main():
+    """Main execution function."""
+    print("=" * 70)
+    print(" Value-Sampled Column Fingerprints")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    samples, profile = column_fingerprints(DB_PATH)
+    elapsed = time.perf_counter() - start
+
+    for table, stats in profile.items():
+        print(f"\n📦 {table}: {stats['rows']:,} rows scanned in {stats['seconds'] * 1000:.1f} ms")
+        for column, values in samples.items():
+            if column.partition('.')[0] == table:
+                print(f"   {fingerprint_text(column, values)}")
+    print(f"\n✅ {len(samples)} columns profiled in {elapsed:.2f}s "
+          f"(≤{MAX_SCAN_ROWS:,} rows and {VALUES_PER_COLUMN} values per table column)")
+
+
+if __name__ == "__main__":
+    main()